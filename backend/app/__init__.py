@@ -4,14 +4,22 @@ Application factory pattern
 from flask import Flask
 from app.config import config
 from app.extensions import db, jwt, migrate, cors, swagger
+from app.utils.db_pool import build_engine_options, init_db_pool
+from app.utils.db_routing import init_db_routing
+from app.utils.json_provider import FastJSONProvider
+from app.utils.token_revocation import init_token_revocation
 
 
-def create_app(config_name='development'):
+def create_app(config_name='development', config_overrides=None):
     """Create and configure Flask application"""
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
-    # Load configuration
+    # Load configuration (overrides must be applied before engines are created)
     app.config.from_object(config[config_name])
+    if config_overrides:
+        app.config.update(config_overrides)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
 
     # Swagger configuration
     app.config['SWAGGER'] = {
@@ -30,11 +38,20 @@ def create_app(config_name='development'):
                 'name': 'Authorization',
                 'in': 'header',
                 'description': 'Enter your JWT token with "Bearer " prefix. Example: Bearer eyJhbGc...'
+            },
+            'ApiKey': {
+                'type': 'apiKey',
+                'name': 'X-API-Key',
+                'in': 'header',
+                'description': 'API key for machine clients (file endpoints only). Example: ak_1a2b3c4d5e6f_...'
             }
         },
         'security': [
             {
                 'Bearer': []
+            },
+            {
+                'ApiKey': []
             }
         ],
         'specs': [
@@ -55,13 +72,17 @@ def create_app(config_name='development'):
         app,
         origins=app.config['CORS_ORIGINS'],
         allow_headers=app.config['CORS_ALLOW_HEADERS'],
+        expose_headers=app.config['CORS_EXPOSE_HEADERS'],
         methods=app.config['CORS_METHODS'],
         supports_credentials=app.config['CORS_SUPPORTS_CREDENTIALS']
     )
 
     # Initialize other extensions
     db.init_app(app)
+    init_db_pool(app, db)
+    init_db_routing(app)
     jwt.init_app(app)
+    init_token_revocation(app, jwt)
     migrate.init_app(app, db)
     swagger.init_app(app)
 
@@ -69,6 +90,14 @@ def create_app(config_name='development'):
     from app.routes import register_blueprints
     register_blueprints(app)
 
+    # Rate limit API requests
+    from app.middleware.rate_limiter import init_rate_limiter
+    init_rate_limiter(app)
+
+    # Compress response bodies (the other after_request hooks only add headers)
+    from app.middleware.compression import init_compression
+    init_compression(app)
+
     # Register error handlers
     from app.middleware.error_handler import register_error_handlers
     register_error_handlers(app)
@@ -5,11 +5,31 @@ import os
 from datetime import timedelta
 
 
+def _env_int(name, default=None):
+    """Read an optional integer setting (default when unset)"""
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(name):
+    """Read an optional boolean setting (None when unset)"""
+    value = os.getenv(name)
+    return value.lower() in ('1', 'true', 'yes') if value not in (None, '') else None
+
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    # Short-lived access tokens; clients renew them with the refresh token
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 900)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 30 * 86400)))
+    # Revoked tokens: Redis denylist behind an in-process bloom filter that
+    # picks up other processes' revocations every TOKEN_REVOCATION_SYNC_SECONDS
+    TOKEN_REVOCATION_SYNC_SECONDS = float(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', 5))
+    TOKEN_REVOCATION_REBUILD_SECONDS = float(os.getenv('TOKEN_REVOCATION_REBUILD_SECONDS', 3600))
+    TOKEN_REVOCATION_BLOOM_CAPACITY = int(os.getenv('TOKEN_REVOCATION_BLOOM_CAPACITY', 100000))
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('TOKEN_REVOCATION_BLOOM_ERROR_RATE', 0.001))
 
     # File upload
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
@@ -19,13 +39,155 @@ class Config:
     # Database
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool: a named profile (default, web, worker, pgbouncer) plus
+    # optional per-setting overrides; see app/utils/db_pool.py
+    DB_POOL_PROFILE = os.getenv('DB_POOL_PROFILE', 'default')
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE')
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW')
+    DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT')
+    DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE')
+    DB_POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING')
+    DB_STATEMENT_TIMEOUT_MS = _env_int('DB_STATEMENT_TIMEOUT_MS')
+
+    # Read replicas (comma-separated URLs); read-only routes use them while healthy
+    SQLALCHEMY_REPLICA_URLS = [url for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url]
+    DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', 5))
+    DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5))
+    # Health checks run in a background thread; bound how long one may take
+    DB_REPLICA_CONNECT_TIMEOUT = int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', 2))
+    DB_REPLICA_CHECK_TIMEOUT_MS = int(os.getenv('DB_REPLICA_CHECK_TIMEOUT_MS', 1000))
+    # After a write, the user's reads stay on the primary for this long
+    DB_REPLICA_STICKY_SECONDS = float(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+
+    # Redis (optional): REDIS_URL, or the REDIS_HOST/PORT/PASSWORD/SSL set by the k8s config maps
+    REDIS_URL = os.getenv('REDIS_URL')
+    REDIS_HOST = os.getenv('REDIS_HOST')
+    REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+    REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
+    REDIS_SSL = bool(_env_bool('REDIS_SSL'))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.5))
+
     # AI API
     AI_API_URL = os.getenv('AI_API_URL')
     AI_API_KEY = os.getenv('AI_API_KEY')
+    AI_API_TIMEOUT = float(os.getenv('AI_API_TIMEOUT', 60))
+    AI_API_MAX_RETRIES = int(os.getenv('AI_API_MAX_RETRIES', 3))
+    AI_API_RETRY_BACKOFF = float(os.getenv('AI_API_RETRY_BACKOFF', 0.5))
+    AI_API_RETRY_BACKOFF_MAX = float(os.getenv('AI_API_RETRY_BACKOFF_MAX', 10))
+    AI_API_POOL_SIZE = int(os.getenv('AI_API_POOL_SIZE', 10))
+    # Process-wide outbound governor (0 disables a limit)
+    AI_API_RATE_LIMIT = float(os.getenv('AI_API_RATE_LIMIT', 0))
+    AI_API_RATE_BURST = float(os.getenv('AI_API_RATE_BURST', 0)) or None
+    AI_API_MAX_CONCURRENCY = int(os.getenv('AI_API_MAX_CONCURRENCY', 0))
+    AI_API_SLOT_TIMEOUT = float(os.getenv('AI_API_SLOT_TIMEOUT', 120))
+    # Split-and-merge processing for large texts
+    AI_CHUNK_MAX_CHARS = int(os.getenv('AI_CHUNK_MAX_CHARS', 100000))
+    AI_CHUNK_CONCURRENCY = int(os.getenv('AI_CHUNK_CONCURRENCY', 4))
+    # Crash recovery and retry policy
+    AI_REQUEST_LEASE_SECONDS = int(os.getenv('AI_REQUEST_LEASE_SECONDS', 600))
+    AI_MAX_ATTEMPTS = int(os.getenv('AI_MAX_ATTEMPTS', 5))
+    AI_RETRY_BACKOFF_BASE = float(os.getenv('AI_RETRY_BACKOFF_BASE', 30))
+    AI_RETRY_BACKOFF_MAX = float(os.getenv('AI_RETRY_BACKOFF_MAX', 3600))
+    AI_RECOVERY_BATCH_SIZE = int(os.getenv('AI_RECOVERY_BATCH_SIZE', 5000))
+    # Users per transaction when reconciling usage counters
+    USAGE_RECONCILE_BATCH_SIZE = int(os.getenv('USAGE_RECONCILE_BATCH_SIZE', 500))
+    # Months of AI requests kept in the database (0 = keep everything); older
+    # monthly partitions are moved to archive storage by scripts/archive_ai_requests.py
+    AI_REQUEST_RETENTION_MONTHS = int(os.getenv('AI_REQUEST_RETENTION_MONTHS', 12))
+    # Monthly partitions created ahead of time (PostgreSQL)
+    AI_REQUEST_PARTITIONS_AHEAD = int(os.getenv('AI_REQUEST_PARTITIONS_AHEAD', 3))
+
+    # Bulk delete and background storage purge
+    BULK_DELETE_MAX_CHECKSUMS = int(os.getenv('BULK_DELETE_MAX_CHECKSUMS', 1000))
+    # Purge jobs run in the background per process (0 = inline, in the request)
+    STORAGE_PURGE_WORKERS = int(os.getenv('STORAGE_PURGE_WORKERS', 2))
+    # Parallel storage deletes within one purge batch
+    STORAGE_PURGE_CONCURRENCY = int(os.getenv('STORAGE_PURGE_CONCURRENCY', 8))
+    STORAGE_PURGE_BATCH_SIZE = int(os.getenv('STORAGE_PURGE_BATCH_SIZE', 100))
+    STORAGE_PURGE_LEASE_SECONDS = int(os.getenv('STORAGE_PURGE_LEASE_SECONDS', 300))
+    STORAGE_PURGE_MAX_ATTEMPTS = int(os.getenv('STORAGE_PURGE_MAX_ATTEMPTS', 5))
+    STORAGE_PURGE_BACKOFF_BASE = float(os.getenv('STORAGE_PURGE_BACKOFF_BASE', 2))
+    STORAGE_PURGE_BACKOFF_MAX = float(os.getenv('STORAGE_PURGE_BACKOFF_MAX', 300))
+
+    # Local text extraction
+    # Request types for which only locally extracted text is sent
+    AI_TEXT_ONLY_REQUEST_TYPES = set(os.getenv('AI_TEXT_ONLY_REQUEST_TYPES', 'process,summarize').split(','))
+    TEXT_EXTRACTION_WORKERS = int(os.getenv('TEXT_EXTRACTION_WORKERS', 2))
+    TEXT_EXTRACTION_TIMEOUT = float(os.getenv('TEXT_EXTRACTION_TIMEOUT', 30))
+    TEXT_EXTRACTION_CACHE_CHARS = int(os.getenv('TEXT_EXTRACTION_CACHE_CHARS', 64 * 1024 * 1024))
+
+    # Password hashing: werkzeug method string (e.g. scrypt:32768:8:1 or
+    # pbkdf2:sha256:600000); stored hashes are upgraded on the next login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_SALT_LENGTH = int(os.getenv('PASSWORD_HASH_SALT_LENGTH', 16))
+    # Hashing process pool per web process (0 = hash inline on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    # Hashes queued or running before sign-ins are rejected with 503 (0 = 4 per worker)
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 0))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+    # API keys for machine clients: HMAC key for stored key hashes (defaults to
+    # SECRET_KEY; changing it invalidates every issued key) and in-process cache
+    API_KEY_HASH_KEY = os.getenv('API_KEY_HASH_KEY')
+    API_KEY_CACHE_TTL_SECONDS = float(os.getenv('API_KEY_CACHE_TTL_SECONDS', 30))
+    API_KEY_CACHE_SIZE = int(os.getenv('API_KEY_CACHE_SIZE', 10000))
+    API_KEY_REVOCATION_SYNC_SECONDS = float(os.getenv('API_KEY_REVOCATION_SYNC_SECONDS', 1))
+
+    # API rate limiting: RATE_LIMIT cost units per client per sliding window,
+    # shared across processes through Redis when it is configured
+    RATE_LIMIT_ENABLED = _env_bool('RATE_LIMIT_ENABLED') is not False
+    RATE_LIMIT = int(os.getenv('RATE_LIMIT', 600))
+    RATE_LIMIT_WINDOW_SECONDS = int(os.getenv('RATE_LIMIT_WINDOW_SECONDS', 60))
+    # Proxies in front of the app that append to X-Forwarded-For (e.g. 1 behind the ingress)
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', 0))
+    RATE_LIMIT_EXEMPT_BLUEPRINTS = ('health', 'metrics', 'flasgger')
+    # Verified access tokens remembered per process to skip re-checking signatures
+    RATE_LIMIT_IDENTITY_CACHE_SIZE = int(os.getenv('RATE_LIMIT_IDENTITY_CACHE_SIZE', 10000))
+
+    # ASGI serving mode (asgi.py): requests run in a pool of ASGI_THREADS
+    # threads per process and, with ASYNC_IO, storage and AI API I/O runs as
+    # coroutines on the server's event loop. asgi.py turns ASYNC_IO on.
+    ASYNC_IO = bool(_env_bool('ASYNC_IO'))
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 32))
+    # Seconds a request thread waits for a storage coroutine before cancelling it
+    STORAGE_IO_TIMEOUT = float(os.getenv('STORAGE_IO_TIMEOUT', 60))
+
+    # Bearer token the Prometheus scraper sends to /metrics (unset = no check;
+    # the ingress only routes /api, so the endpoint is cluster-internal)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Cache-Control for responses carrying an ETag: clients may keep them but
+    # must revalidate (If-None-Match) before reuse
+    API_CACHE_CONTROL = os.getenv('API_CACHE_CONTROL', 'private, no-cache')
+
+    # Response compression, negotiated from Accept-Encoding in the order
+    # below (brotli and zstd only when their packages are installed)
+    COMPRESSION_ENABLED = _env_bool('COMPRESSION_ENABLED') is not False
+    COMPRESSION_ALGORITHMS = os.getenv('COMPRESSION_ALGORITHMS', 'br,zstd,gzip').split(',')
+    # Smaller bodies gain less than the encoding costs
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    # Low levels keep most of the savings at a fraction of the CPU
+    # (benchmarks/bench_compression.py)
+    COMPRESSION_LEVELS = {
+        'gzip': int(os.getenv('COMPRESSION_GZIP_LEVEL', 1)),
+        'br': int(os.getenv('COMPRESSION_BROTLI_LEVEL', 4)),
+        'zstd': int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3)),
+    }
+    # Already compressed formats; entries ending in '/' match a whole type
+    # (structured +xml/+json subtypes such as SVG are still compressed)
+    COMPRESSION_EXCLUDED_MIMETYPES = (
+        'image/', 'video/', 'audio/', 'font/woff', 'font/woff2',
+        'application/zip', 'application/gzip', 'application/x-gzip', 'application/x-bzip2',
+        'application/x-7z-compressed', 'application/x-rar-compressed', 'application/zstd',
+        'application/pdf', 'application/octet-stream',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
 
     # CORS Configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
-    CORS_ALLOW_HEADERS = ['Content-Type', 'Authorization']
+    CORS_ALLOW_HEADERS = ['Content-Type', 'Authorization', 'If-None-Match']
+    CORS_EXPOSE_HEADERS = ['Retry-After', 'X-RateLimit-Limit', 'X-RateLimit-Remaining', 'X-RateLimit-Reset', 'ETag']
     CORS_METHODS = ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']
     CORS_SUPPORTS_CREDENTIALS = True
 
@@ -43,6 +205,9 @@ class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    DB_POOL_PROFILE = os.getenv('DB_POOL_PROFILE', 'web')
+    # 0 turns the timeout off
+    DB_STATEMENT_TIMEOUT_MS = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
     
     # Additional production settings
     SESSION_COOKIE_SECURE = True
@@ -54,6 +219,13 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
+    SQLALCHEMY_REPLICA_URLS = []
+    REDIS_URL = None
+    REDIS_HOST = None
+    TEXT_EXTRACTION_WORKERS = 0
+    STORAGE_PURGE_WORKERS = 0
+    PASSWORD_HASH_WORKERS = 0
+    RATE_LIMIT_ENABLED = False
 
 
 config = {
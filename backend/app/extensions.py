@@ -7,7 +7,9 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from flasgger import Swagger
 
-db = SQLAlchemy()
+from app.utils.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 migrate = Migrate()
 cors = CORS()
@@ -0,0 +1,98 @@
+# Response compression middleware
+"""
+Compresses response bodies with the best encoding both sides support:
+brotli or zstd when their packages are installed and the client accepts
+them, else gzip. Skipped for bodies under COMPRESSION_MIN_SIZE, formats
+that are already compressed (COMPRESSION_EXCLUDED_MIMETYPES), streamed
+and file responses (exports, send_file) and responses that are already
+encoded. A compressed body that would not be smaller is sent as is.
+"""
+import gzip
+
+from flask import current_app, request
+
+from app.utils.metrics import RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_BYTES
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional
+    zstandard = None
+
+ENCODERS = {'gzip': lambda data, level: gzip.compress(data, compresslevel=level, mtime=0)}
+if brotli is not None:
+    ENCODERS['br'] = lambda data, level: brotli.compress(data, quality=level)
+if zstandard is not None:
+    ENCODERS['zstd'] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+
+# Statuses without a body to compress
+SKIPPED_STATUSES = (204, 206, 304)
+
+
+def is_compressible(mimetype, excluded):
+    """Check a MIME type against the exclusion list"""
+    if not mimetype:
+        return False
+    if mimetype.endswith(('+xml', '+json')):
+        return True
+    return not any(mimetype.startswith(entry) if entry.endswith('/') else mimetype == entry
+                   for entry in excluded)
+
+
+def negotiate(accept_encodings, algorithms):
+    """
+    Pick the encoding the client rates highest; ties go to the earlier
+    entry in algorithms (the server's preference)
+    Returns: encoding name, or None to send the body as is
+    """
+    best, best_quality = None, 0
+    for name in algorithms:
+        if name not in ENCODERS:
+            continue
+        quality = accept_encodings[name]
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def _compress_response(response):
+    config = current_app.config
+    if (request.method == 'HEAD' or response.status_code < 200 or response.status_code in SKIPPED_STATUSES
+            or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or not is_compressible(response.mimetype, config['COMPRESSION_EXCLUDED_MIMETYPES'])):
+        return response
+
+    # The body depends on Accept-Encoding from here on, whatever is sent
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings, config['COMPRESSION_ALGORITHMS'])
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < config['COMPRESSION_MIN_SIZE']:
+        return response
+    compressed = ENCODERS[encoding](data, config['COMPRESSION_LEVELS'][encoding])
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # Encodings are different bytes for the same representation
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    RESPONSE_COMPRESSION.labels(encoding=encoding).inc()
+    RESPONSE_COMPRESSION_BYTES.labels(encoding=encoding, direction='in').inc(len(data))
+    RESPONSE_COMPRESSION_BYTES.labels(encoding=encoding, direction='out').inc(len(compressed))
+    return response
+
+
+def init_compression(app):
+    """Compress responses when the client accepts it"""
+    if app.config.get('COMPRESSION_ENABLED', True):
+        app.after_request(_compress_response)
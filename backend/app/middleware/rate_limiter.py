@@ -1,15 +1,224 @@
 # Rate limiting middleware
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+"""
+Sliding-window rate limiting shared by every worker through Redis (or kept
+per process when Redis is not configured).
 
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
-)
+Each client (API key or JWT identity, else IP address) has a budget of RATE_LIMIT
+cost units per RATE_LIMIT_WINDOW_SECONDS. A request spends its route's cost,
+1 unless the view is decorated with @rate_limit_cost(n). The window slides:
+the previous fixed window's usage counts in proportion to how much of it
+still overlaps, which smooths bursts at window edges for the price of two
+counters per client.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
 
+from flask import current_app, g, request
+from flask_jwt_extended import decode_token
 
-def init_rate_limiter(app):
-    """Initialize rate limiter with Flask app"""
-    limiter.init_app(app)
+from app.services.api_key_service import ApiKeyService
+from app.utils.decorators import API_KEY_HEADER
+from app.utils.metrics import RATE_LIMIT_DECISIONS
+from app.utils.redis_client import get_redis
+from app.utils.responses import error_response
+
+# Returns {allowed, used}: checks and spends the cost atomically
+SLIDING_WINDOW_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+    + math.floor(tonumber(redis.call('GET', KEYS[2]) or '0') * tonumber(ARGV[3]))
+local cost = tonumber(ARGV[2])
+if used + cost > tonumber(ARGV[1]) then
+    return {0, used}
+end
+redis.call('INCRBY', KEYS[1], cost)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {1, used + cost}
+"""
+
+
+def rate_limit_cost(cost):
+    """Set how many units of the client's budget a route spends (0 exempts it)"""
+    def decorator(view):
+        view.rate_limit_cost = cost
+        return view
+    return decorator
+
+
+class LocalWindowStore:
+    """Per-process window counters, for development and tests"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, window_index, limit, cost, previous_weight):
+        with self._lock:
+            windows = self._counts.setdefault(key, {})
+            current = windows.get(window_index, 0)
+            used = current + math.floor(windows.get(window_index - 1, 0) * previous_weight)
+            if used + cost > limit:
+                return False, used
+            # Only the current and previous windows are ever read
+            self._counts[key] = {
+                index: count for index, count in windows.items() if index >= window_index - 1
+            }
+            self._counts[key][window_index] = current + cost
+            return True, used + cost
+
+
+class RedisWindowStore:
+    """Window counters in Redis, checked and updated in one round trip"""
+
+    KEY_PREFIX = 'ratelimit:'
+
+    def __init__(self, client, window):
+        self.client = client
+        self.window = window
+        self.script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key, window_index, limit, cost, previous_weight):
+        allowed, used = self.script(
+            keys=[f'{self.KEY_PREFIX}{key}:{window_index}', f'{self.KEY_PREFIX}{key}:{window_index - 1}'],
+            args=[limit, cost, previous_weight, self.window * 2]
+        )
+        return bool(allowed), int(used)
+
+
+class RateLimiter:
+    """Sliding-window limiter over a window store"""
+
+    def __init__(self, limit, window, store):
+        self.limit = limit
+        self.window = window
+        self.store = store
+
+    def hit(self, key, cost=1, now=None):
+        """
+        Spend cost units of key's budget if it has that many left
+        Returns: (allowed, remaining, seconds until the current window ends)
+        """
+        now = time.time() if now is None else now
+        window_index, offset = divmod(now, self.window)
+        previous_weight = 1 - offset / self.window
+        allowed, used = self.store.hit(key, int(window_index), self.limit, cost, previous_weight)
+        return allowed, max(self.limit - used, 0), math.ceil(self.window - offset)
+
+
+class TokenIdentityCache:
+    """
+    Identities of recently verified access tokens. Verifying a JWT costs
+    far more than the limit check itself, and a client sends the same token
+    for its whole lifetime, so each token's signature is checked once per
+    process. Revocation is left to the route: a revoked token still spends
+    its owner's budget.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # token -> (identity, expiry in epoch seconds)
+        self._lock = threading.Lock()
+
+    def identity(self, token):
+        """The token's identity, or None if it is invalid or expired"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                self._entries.move_to_end(token)
+        if entry is None:
+            try:
+                claims = decode_token(token)
+            except Exception:
+                return None  # The route itself answers 401
+            entry = (claims.get(current_app.config['JWT_IDENTITY_CLAIM']), claims.get('exp', math.inf))
+            with self._lock:
+                self._entries[token] = entry
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        identity, expires_at = entry
+        return identity if expires_at > time.time() else None
+
+
+def _bearer_token():
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    return token.strip() if scheme == 'Bearer' else None
+
+
+def _client_key():
+    """API key or JWT identity when the request carries a valid one, else the client IP"""
+    raw_key = request.headers.get(API_KEY_HEADER)
+    if raw_key:
+        principal = ApiKeyService.authenticate_request(raw_key)
+        if principal is not None:
+            return f'apikey:{principal.id}'
+    token = _bearer_token()
+    if token:
+        identity = current_app.extensions['rate_limiter_identities'].identity(token)
+        if identity is not None:
+            return f'user:{identity}'
+    proxies = current_app.config.get('RATE_LIMIT_TRUSTED_PROXIES', 0)
+    if proxies and len(request.access_route) >= proxies:
+        return f'ip:{request.access_route[-proxies]}'
+    return f'ip:{request.remote_addr}'
+
+
+def _get_limiter():
+    limiter = current_app.extensions.get('rate_limiter')
+    if limiter is None:
+        config = current_app.config
+        window = config.get('RATE_LIMIT_WINDOW_SECONDS', 60)
+        client = get_redis()
+        store = RedisWindowStore(client, window) if client is not None else LocalWindowStore()
+        limiter = RateLimiter(config.get('RATE_LIMIT', 600), window, store)
+        current_app.extensions['rate_limiter'] = limiter
     return limiter
+
+
+def _check_rate_limit():
+    config = current_app.config
+    if not config.get('RATE_LIMIT_ENABLED', True) or request.method == 'OPTIONS':
+        return None
+    if request.endpoint is None or request.blueprint in config.get('RATE_LIMIT_EXEMPT_BLUEPRINTS', ()):
+        return None
+    cost = getattr(current_app.view_functions.get(request.endpoint), 'rate_limit_cost', 1)
+    if cost <= 0:
+        return None
+
+    limiter = _get_limiter()
+    try:
+        allowed, remaining, reset = limiter.hit(_client_key(), cost)
+    except Exception as e:
+        # Limiting is best effort: never fail requests because Redis is unreachable
+        RATE_LIMIT_DECISIONS.labels(result='error').inc()
+        current_app.logger.warning(f"Rate limit check failed: {str(e)}")
+        return None
+
+    g.rate_limit = (limiter.limit, remaining, reset)
+    if not allowed:
+        RATE_LIMIT_DECISIONS.labels(result='limited').inc()
+        response, status_code = error_response(f"Rate limit exceeded, retry in {reset} seconds", 429)
+        response.headers['Retry-After'] = str(reset)
+        return response, status_code
+    RATE_LIMIT_DECISIONS.labels(result='allowed').inc()
+    return None
+
+
+def _add_rate_limit_headers(response):
+    rate_limit = g.pop('rate_limit', None)
+    if rate_limit is not None:
+        limit, remaining, reset = rate_limit
+        response.headers['X-RateLimit-Limit'] = str(limit)
+        response.headers['X-RateLimit-Remaining'] = str(remaining)
+        response.headers['X-RateLimit-Reset'] = str(reset)
+    return response
+
+
+def init_rate_limiter(app):
+    """Check every API request against the client's rate limit"""
+    app.extensions['rate_limiter_identities'] = TokenIdentityCache(
+        app.config.get('RATE_LIMIT_IDENTITY_CACHE_SIZE', 10000)
+    )
+    app.before_request(_check_rate_limit)
+    app.after_request(_add_rate_limit_headers)
@@ -3,6 +3,11 @@ Database models
 """
 from app.models.user import User
 from app.models.file import File
-from app.models.ai_request import AIRequest
+from app.models.ai_request import AIRequest, IllegalTransitionError
+from app.models.usage import UsageCounter, RequestStatusCounter, FileListVersion
+from app.models.delete_job import DeleteJob, StoragePurgeTask
+from app.models.archive import AIRequestArchive
+from app.models.api_key import ApiKey
 
-__all__ = ['User', 'File', 'AIRequest']
\ No newline at end of file
+__all__ = ['User', 'File', 'AIRequest', 'IllegalTransitionError', 'UsageCounter', 'RequestStatusCounter',
+           'FileListVersion', 'DeleteJob', 'StoragePurgeTask', 'AIRequestArchive', 'ApiKey']
@@ -3,10 +3,39 @@ AI Request model for tracking file processing
 """
 from app.extensions import db
 from datetime import datetime
+from sqlalchemy import update
+
+
+class IllegalTransitionError(ValueError):
+    """Raised for a status change the AI request lifecycle does not allow"""
 
 
 class AIRequest(db.Model):
     __tablename__ = 'ai_requests'
+    __table_args__ = (
+        # Keyset pagination of a user's history: (created_at, id) newest first
+        db.Index('ix_ai_requests_user_created', 'user_id', 'created_at', 'id'),
+        # Latest request for a file (processing status)
+        db.Index('ix_ai_requests_file_created', 'file_checksum', 'created_at'),
+        # Recovery scans: expired leases and due retries
+        db.Index('ix_ai_requests_status_lease', 'status', 'lease_expires_at'),
+        db.Index('ix_ai_requests_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    # Statuses after which a request is never picked up again automatically
+    TERMINAL_STATUSES = ('completed', 'failed', 'dead_letter')
+    # Statuses a worker may still act on; such rows are never archived
+    ACTIVE_STATUSES = ('pending', 'processing', 'retrying')
+
+    # Request lifecycle: allowed transitions from each status
+    TRANSITIONS = {
+        'pending': ('processing',),
+        'processing': ('completed', 'failed', 'retrying', 'dead_letter'),
+        'retrying': ('processing',),
+        'dead_letter': ('retrying',),
+        'completed': (),
+        'failed': (),
+    }
 
     id = db.Column(db.Integer, primary_key=True)
     file_checksum = db.Column(db.String(64), db.ForeignKey('files.checksum'), nullable=False)
@@ -21,18 +50,70 @@ class AIRequest(db.Model):
     status = db.Column(db.String(20), default='pending')
     error_message = db.Column(db.Text, nullable=True)
 
-    # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Retry bookkeeping: a 'processing' request whose lease has expired is
+    # assumed abandoned by a crashed worker and is rescheduled by the reaper
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+
+    # Split-and-merge progress (chunks_total is NULL for single-call requests)
+    chunks_total = db.Column(db.Integer, nullable=True)
+    chunks_completed = db.Column(db.Integer, default=0)
+
+    # Timestamps. On PostgreSQL the table is range-partitioned by month on
+    # created_at (see the partitioning migration and ArchiveService)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     completed_at = db.Column(db.DateTime, nullable=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'file_checksum': self.file_checksum,
-            'request_type': self.request_type,
-            'status': self.status,
-            'response': self.response,
-            'error_message': self.error_message,
-            'created_at': self.created_at.isoformat(),
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
-        }
+    @classmethod
+    def transition_statement(cls, expected, new, *criteria, **values):
+        """
+        Build a compare-and-set UPDATE that moves rows still in the expected
+        status (and matching criteria) to the new status. Rows changed by
+        someone else in the meantime are simply not matched. Returns the
+        user_id of each moved row so usage counters can follow.
+        """
+        if new not in cls.TRANSITIONS.get(expected, ()):
+            raise IllegalTransitionError(f"Illegal AI request transition: {expected} -> {new}")
+        values['status'] = new
+        if new in cls.TERMINAL_STATUSES:
+            values.setdefault('completed_at', datetime.utcnow())
+        return update(cls)\
+            .where(cls.status == expected, *criteria)\
+            .values(**values)\
+            .returning(cls.user_id)\
+            .execution_options(synchronize_session=False)
+
+    @property
+    def progress(self):
+        """Percent complete, derived from status and segment counts"""
+        if self.status == 'completed':
+            return 100
+        if self.chunks_total:
+            return int((self.chunks_completed or 0) * 100 / self.chunks_total)
+        return 0
+
+    # Public fields -> columns each is built from, for sparse fieldsets (?fields=)
+    FIELDS = {
+        'id': ('id',),
+        'file_checksum': ('file_checksum',),
+        'request_type': ('request_type',),
+        'status': ('status',),
+        'response': ('response',),
+        'error_message': ('error_message',),
+        'progress': ('status', 'chunks_total', 'chunks_completed'),
+        'chunks_total': ('chunks_total',),
+        'chunks_completed': ('chunks_completed',),
+        'attempts': ('attempts',),
+        'max_attempts': ('max_attempts',),
+        'next_attempt_at': ('next_attempt_at',),
+        'created_at': ('created_at',),
+        'completed_at': ('completed_at',),
+    }
+    # Potentially large fields left out of list responses unless requested
+    LIST_DEFERRED_FIELDS = ('response',)
+
+    def to_dict(self, fields=None):
+        """Serialize the request; fields limits the output (and attribute access) to those names"""
+        return {name: getattr(self, name) for name in fields or self.FIELDS}
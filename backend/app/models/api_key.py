@@ -0,0 +1,39 @@
+"""
+API keys for machine clients
+"""
+from app.extensions import db
+from datetime import datetime
+
+
+class ApiKey(db.Model):
+    __tablename__ = 'api_keys'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+
+    # Keys look like ak_<prefix>_<secret>; the prefix finds the row and only
+    # an HMAC of the secret is stored
+    prefix = db.Column(db.String(16), unique=True, nullable=False)
+    key_hash = db.Column(db.String(64), nullable=False)
+    # Comma-separated, e.g. 'files:read,files:write'
+    scopes = db.Column(db.String(255), nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def scope_list(self):
+        return self.scopes.split(',') if self.scopes else []
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'prefix': self.prefix,
+            'scopes': self.scope_list,
+            'created_at': self.created_at,
+            'expires_at': self.expires_at,
+            'revoked_at': self.revoked_at
+        }
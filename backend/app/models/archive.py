@@ -0,0 +1,31 @@
+"""
+Archived AI request partitions
+"""
+from app.extensions import db
+from datetime import datetime
+
+
+class AIRequestArchive(db.Model):
+    """One month of AI requests moved out of the database into storage"""
+    __tablename__ = 'ai_request_archives'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Partition name of the month, e.g. ai_requests_p202401
+    label = db.Column(db.String(64), nullable=False, index=True)
+    range_start = db.Column(db.DateTime, nullable=False)
+    range_end = db.Column(db.DateTime, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    # Gzip-compressed JSON lines, one request per line
+    storage_path = db.Column(db.String(500), nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'label': self.label,
+            'range_start': self.range_start,
+            'range_end': self.range_end,
+            'row_count': self.row_count,
+            'storage_path': self.storage_path,
+            'archived_at': self.archived_at
+        }
@@ -0,0 +1,67 @@
+"""
+Bulk delete jobs and their background storage purge tasks
+"""
+from app.extensions import db
+from datetime import datetime
+
+
+class DeleteJob(db.Model):
+    __tablename__ = 'delete_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # 'purging' until every storage object is handled, then 'completed'
+    # or 'completed_with_errors' if some objects could not be removed
+    status = db.Column(db.String(30), nullable=False, default='purging')
+    files_deleted = db.Column(db.Integer, nullable=False, default=0)
+    requests_deleted = db.Column(db.Integer, nullable=False, default=0)
+    objects_total = db.Column(db.Integer, nullable=False, default=0)
+    objects_purged = db.Column(db.Integer, nullable=False, default=0)
+    objects_failed = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def progress(self):
+        """Percent of storage objects handled"""
+        if not self.objects_total:
+            return 100
+        return int((self.objects_purged + self.objects_failed) * 100 / self.objects_total)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'files_deleted': self.files_deleted,
+            'requests_deleted': self.requests_deleted,
+            'objects_total': self.objects_total,
+            'objects_purged': self.objects_purged,
+            'objects_failed': self.objects_failed,
+            'progress': self.progress,
+            'created_at': self.created_at,
+            'completed_at': self.completed_at
+        }
+
+
+class StoragePurgeTask(db.Model):
+    __tablename__ = 'storage_purge_tasks'
+    __table_args__ = (
+        # Workers claim due tasks: status = 'pending' AND next_attempt_at <= now
+        db.Index('ix_storage_purge_tasks_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('delete_jobs.id', ondelete='CASCADE'),
+                       nullable=False, index=True)
+    # Checked before purging: the same content may have been uploaded again since
+    checksum = db.Column(db.String(64), nullable=False)
+    storage_path = db.Column(db.String(500), nullable=False)
+
+    # pending -> done | failed; a claimed task stays pending with next_attempt_at
+    # pushed out as its lease, so a crashed worker's tasks are picked up again
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
@@ -1,12 +1,19 @@
 """
 File model
 """
-from app.extensions import db
 from datetime import datetime
 
+from sqlalchemy import DDL, event
+
+from app.extensions import db
+
 
 class File(db.Model):
     __tablename__ = 'files'
+    __table_args__ = (
+        # Keyset pagination of a user's files: (uploaded_at, checksum) newest first
+        db.Index('ix_files_user_uploaded', 'user_id', 'uploaded_at', 'checksum'),
+    )
 
     # Use checksum as primary key
     checksum = db.Column(db.String(64), primary_key=True)
@@ -23,17 +30,110 @@ class File(db.Model):
     processed_at = db.Column(db.DateTime, nullable=True)
     processing_result = db.Column(db.Text, nullable=True)
 
+    # Most recent AI request, maintained when requests are created so status
+    # lookups never scan the request history (use_alter: the tables reference
+    # each other). PostgreSQL drops this foreign key once ai_requests is
+    # partitioned, and the pointer may then outlive an archived request.
+    latest_request_id = db.Column(
+        db.Integer,
+        db.ForeignKey('ai_requests.id', use_alter=True, name='fk_files_latest_request_id'),
+        nullable=True
+    )
+
     # Relationship to AI requests
-    ai_requests = db.relationship('AIRequest', backref='file', lazy=True)
-
-    def to_dict(self):
-        return {
-            'checksum': self.checksum,
-            'filename': self.original_filename,
-            'size': self.file_size,
-            'mime_type': self.mime_type,
-            'uploaded_at': self.uploaded_at.isoformat(),
-            'is_processed': self.is_processed,
-            'processed_at': self.processed_at.isoformat() if self.processed_at else None,
-            'processing_result': self.processing_result
-        }
\ No newline at end of file
+    ai_requests = db.relationship('AIRequest', backref='file', lazy=True,
+                                  foreign_keys='AIRequest.file_checksum')
+    latest_request = db.relationship('AIRequest', foreign_keys=[latest_request_id],
+                                     post_update=True)
+
+    # Public fields -> columns each is built from, for sparse fieldsets (?fields=)
+    FIELDS = {
+        'checksum': ('checksum',),
+        'filename': ('original_filename',),
+        'size': ('file_size',),
+        'mime_type': ('mime_type',),
+        'uploaded_at': ('uploaded_at',),
+        'is_processed': ('is_processed',),
+        'processed_at': ('processed_at',),
+        'processing_result': ('processing_result',),
+        'latest_request_id': ('latest_request_id',),
+    }
+    # Potentially large fields left out of list responses unless requested
+    LIST_DEFERRED_FIELDS = ('processing_result',)
+
+    # Public fields named differently from their attribute
+    FIELD_ATTRIBUTES = {'filename': 'original_filename', 'size': 'file_size'}
+
+    def to_dict(self, fields=None):
+        """Serialize the file; fields limits the output (and attribute access) to those names"""
+        attributes = self.FIELD_ATTRIBUTES
+        return {name: getattr(self, attributes.get(name, name)) for name in fields or self.FIELDS}
+
+
+# Full-text search index over filename and processing result, kept in step by
+# the database itself so every write path (upload, mark_as_processed, AI
+# completion, deletes) updates it in its own transaction. These objects are
+# not mapped; SearchService queries them and migrations/env.py leaves them out
+# of autogenerate.
+#
+# PostgreSQL: a stored generated tsvector (filename weighted A, result B) with
+# a GIN index on (user_id, search_vector) via btree_gin for per-user scoping.
+# Words are split on anything but letters and digits, like SQLite's unicode61.
+SEARCH_RESULT_MAX_CHARS = 100000
+
+POSTGRES_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    f"""
+    ALTER TABLE files ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple',
+            regexp_replace(original_filename, '[^[:alnum:]]+', ' ', 'g')), 'A') ||
+        setweight(to_tsvector('simple',
+            regexp_replace(left(coalesce(processing_result, ''), {SEARCH_RESULT_MAX_CHARS}),
+                           '[^[:alnum:]]+', ' ', 'g')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ix_files_search ON files USING gin (user_id, search_vector)",
+)
+
+# SQLite: an external-content FTS5 table over files, maintained by triggers.
+# user_id is indexed as a token so MATCH scopes the search to one user.
+SQLITE_SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+        user_id, original_filename, processing_result,
+        content='files', content_rowid='rowid', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts (rowid, user_id, original_filename, processing_result)
+        VALUES (new.rowid, new.user_id, new.original_filename, new.processing_result);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files BEGIN
+        INSERT INTO files_fts (files_fts, rowid, user_id, original_filename, processing_result)
+        VALUES ('delete', old.rowid, old.user_id, old.original_filename, old.processing_result);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS files_fts_update
+    AFTER UPDATE OF user_id, original_filename, processing_result ON files BEGIN
+        INSERT INTO files_fts (files_fts, rowid, user_id, original_filename, processing_result)
+        VALUES ('delete', old.rowid, old.user_id, old.original_filename, old.processing_result);
+        INSERT INTO files_fts (rowid, user_id, original_filename, processing_result)
+        VALUES (new.rowid, new.user_id, new.original_filename, new.processing_result);
+    END
+    """,
+)
+
+# Names of the unmapped search objects, for migrations/env.py
+SEARCH_SCHEMA_OBJECTS = ('search_vector', 'ix_files_search', 'files_fts')
+
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(File.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(File.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+# Triggers go with the table; the FTS table would otherwise outlive it
+event.listen(File.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS files_fts').execute_if(dialect='sqlite'))
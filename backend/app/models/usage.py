@@ -0,0 +1,35 @@
+"""
+Per-user usage counters, maintained incrementally for the dashboard
+"""
+from app.extensions import db
+
+
+class UsageCounter(db.Model):
+    """File totals for one user and MIME type ('' when the type is unknown)"""
+    __tablename__ = 'usage_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    mime_type = db.Column(db.String(100), primary_key=True, default='')
+    file_count = db.Column(db.BigInteger, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    processed_count = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class RequestStatusCounter(db.Model):
+    """Number of a user's AI requests currently in each status"""
+    __tablename__ = 'request_status_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    request_count = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class FileListVersion(db.Model):
+    """
+    Counter bumped whenever anything in a user's file list changes, so list
+    responses can be validated (ETag) without reading the files themselves
+    """
+    __tablename__ = 'file_list_versions'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
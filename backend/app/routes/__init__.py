@@ -4,11 +4,17 @@ Blueprint registration
 """
 from app.routes.auth import auth_bp
 from app.routes.files import files_bp
+from app.routes.ai import ai_bp
 from app.routes.health import health_bp
+from app.routes.admin import admin_bp
+from app.routes.metrics import metrics_bp
 
 
 def register_blueprints(app):
     """Register all blueprints"""
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(files_bp, url_prefix='/api/files')
+    app.register_blueprint(ai_bp, url_prefix='/api/ai')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(metrics_bp)  # served at /metrics for the Prometheus ServiceMonitor
     app.register_blueprint(health_bp)  # health_bp already has url_prefix='/api/health' in its definition
\ No newline at end of file
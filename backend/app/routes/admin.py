@@ -0,0 +1,103 @@
+# Administration routes
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+
+from app.services.recovery_service import RecoveryService
+from app.utils.decorators import admin_required
+from app.utils.responses import success_response, error_response
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/ai-requests/dead-letter', methods=['GET'])
+@jwt_required()
+@admin_required()
+def list_dead_letters():
+    """List dead-lettered AI requests
+    ---
+    tags:
+      - Admin
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        default: 100
+        description: Maximum number of requests to return
+    responses:
+      200:
+        description: Dead-lettered requests retrieved successfully
+      401:
+        description: Unauthorized - missing or invalid token
+      403:
+        description: Admin access required
+    """
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    requests_ = RecoveryService.get_dead_letters(limit)
+
+    return success_response({
+        'requests': [ai_request.to_dict() for ai_request in requests_]
+    }, "Dead-lettered requests retrieved successfully", 200)
+
+
+@admin_bp.route('/ai-requests/requeue', methods=['POST'])
+@jwt_required()
+@admin_required()
+def requeue_dead_letters():
+    """Bulk requeue dead-lettered AI requests
+    ---
+    tags:
+      - Admin
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+              description: Requests to requeue (all dead letters if omitted)
+            limit:
+              type: integer
+              minimum: 1
+              maximum: 1000
+              description: Maximum number of requests to requeue
+    responses:
+      200:
+        description: Requests requeued
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                requeued:
+                  type: integer
+      400:
+        description: Bad request - invalid ids or limit
+      403:
+        description: Admin access required
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+        return error_response("ids must be a list of integers", 400)
+
+    limit = data.get('limit')
+    if limit is not None:
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+            return error_response("limit must be a positive integer", 400)
+        limit = min(limit, 1000)
+
+    requeued = RecoveryService.requeue_dead_letters(ids, limit)
+
+    return success_response({'requeued': requeued}, f"{requeued} requests requeued", 200)
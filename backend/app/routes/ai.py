@@ -0,0 +1,144 @@
+# AI request routes
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.models.ai_request import AIRequest
+from app.services.ai_service import AIService
+from app.utils.db_routing import read_only
+from app.utils.fields import list_fields, parse_fields
+from app.utils.pagination import keyset_meta
+from app.utils.responses import success_response, error_response
+
+ai_bp = Blueprint('ai', __name__)
+
+MAX_PER_PAGE = 100
+
+
+@ai_bp.route('/history', methods=['GET'])
+@jwt_required()
+@read_only
+def get_history():
+    """List the user's AI requests, newest first
+    ---
+    tags:
+      - AI
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: cursor
+        type: string
+        description: Opaque cursor from the previous page's next_cursor
+      - in: query
+        name: per_page
+        type: integer
+        default: 20
+        description: Items per page (max 100)
+      - in: query
+        name: total
+        type: string
+        enum: [none, estimate, exact]
+        default: none
+        description: Whether to include a total count
+      - in: query
+        name: fields
+        type: string
+        description: Comma-separated fields to return (defaults to all but response)
+    responses:
+      200:
+        description: AI request history retrieved successfully
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                requests:
+                  type: array
+                  items:
+                    type: object
+                pagination:
+                  type: object
+                  properties:
+                    per_page:
+                      type: integer
+                    next_cursor:
+                      type: string
+                    has_more:
+                      type: boolean
+                    total:
+                      type: integer
+                    total_is_estimate:
+                      type: boolean
+      400:
+        description: Invalid cursor or total mode
+      401:
+        description: Unauthorized - missing or invalid token
+    """
+    user_id = int(get_jwt_identity())  # Convert string ID to integer
+
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+
+    try:
+        fields = parse_fields(request.args.get('fields'), AIRequest, default=list_fields(AIRequest))
+        page = AIService.get_request_history_page(
+            user_id,
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            total=request.args.get('total', 'none'),
+            fields=fields
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    return success_response({
+        'requests': [ai_request.to_dict(fields) for ai_request in page.items],
+        'pagination': keyset_meta(page, per_page)
+    }, "AI request history retrieved successfully", 200)
+
+
+@ai_bp.route('/requests/<int:request_id>', methods=['GET'])
+@jwt_required()
+@read_only
+def get_request(request_id):
+    """Get a specific AI request
+    ---
+    tags:
+      - AI
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: request_id
+        type: integer
+        required: true
+        description: AI request ID
+      - in: query
+        name: fields
+        type: string
+        description: Comma-separated fields to return (defaults to all)
+    responses:
+      200:
+        description: AI request retrieved successfully
+      401:
+        description: Unauthorized - missing or invalid token
+      404:
+        description: AI request not found
+    """
+    user_id = int(get_jwt_identity())  # Convert string ID to integer
+
+    try:
+        fields = parse_fields(request.args.get('fields'), AIRequest)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    ai_request = AIService.get_request_by_id(request_id, user_id, fields)
+    if not ai_request:
+        return error_response("AI request not found", 404)
+
+    return success_response({
+        'request': ai_request.to_dict(fields)
+    }, "AI request retrieved successfully", 200)
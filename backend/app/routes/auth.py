@@ -2,16 +2,32 @@
 Authentication routes
 """
 from flask import Blueprint, request
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token, get_jwt, get_jwt_identity, jwt_required
+)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
 from flasgger import swag_from
+from app.middleware.rate_limiter import rate_limit_cost
+from app.services.api_key_service import ApiKeyService
 from app.services.auth_service import AuthService
+from app.services.password_service import PasswordHashingBusy
 from app.utils.responses import success_response, error_response
+from app.utils.token_revocation import get_revocation_list
 
 auth_bp = Blueprint('auth', __name__)
 auth_service = AuthService()
 
 
+def _busy_response(e):
+    """503 with Retry-After for a saturated password hashing pool"""
+    response, status_code = error_response(str(e), 503)
+    response.headers['Retry-After'] = '1'
+    return response, status_code
+
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit_cost(5)
 def register():
     """Register a new user
     ---
@@ -62,6 +78,8 @@ def register():
                   type: string
       400:
         description: Bad request - validation error
+      503:
+        description: Too many sign-ins in progress, retry after the Retry-After delay
       500:
         description: Internal server error
     """
@@ -75,11 +93,14 @@ def register():
         return success_response(user.to_dict(), 'User registered successfully', 201)
     except ValueError as e:
         return error_response(str(e), 400)
+    except PasswordHashingBusy as e:
+        return _busy_response(e)
     except Exception as e:
         return error_response(str(e), 500)
 
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit_cost(5)
 def login():
     """Login user
     ---
@@ -121,7 +142,10 @@ def login():
               properties:
                 access_token:
                   type: string
-                  description: JWT access token
+                  description: Short-lived JWT access token
+                refresh_token:
+                  type: string
+                  description: Long-lived JWT for POST /api/auth/refresh
                 user:
                   type: object
                   properties:
@@ -133,6 +157,8 @@ def login():
                       type: string
       401:
         description: Invalid credentials
+      503:
+        description: Too many sign-ins in progress, retry after the Retry-After delay
       500:
         description: Internal server error
     """
@@ -144,24 +170,72 @@ def login():
         )
         user_dict = user.to_dict()
         # Use only user ID as JWT identity (must be string for JWT 'sub' claim)
-        token = create_access_token(identity=str(user_dict['id']))
+        identity = str(user_dict['id'])
 
         return success_response({
-            'access_token': token,
+            'access_token': create_access_token(identity=identity),
+            'refresh_token': create_refresh_token(identity=identity),
             'user': user_dict
         }, 'Login successful')
     except ValueError as e:
         return error_response(str(e), 401)
+    except PasswordHashingBusy as e:
+        return _busy_response(e)
     except Exception as e:
         return error_response(str(e), 500)
 
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Get a new access token
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    description: Send the refresh token (not the access token) as the Bearer token.
+    responses:
+      200:
+        description: Token refreshed
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                access_token:
+                  type: string
+      401:
+        description: Missing, expired or revoked refresh token
+    """
+    return success_response({
+        'access_token': create_access_token(identity=get_jwt_identity())
+    }, 'Token refreshed')
+
+
 @auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
 def logout():
-    """Logout user (client-side token removal)
+    """Logout user by revoking their tokens
     ---
     tags:
       - Authentication
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            refresh_token:
+              type: string
+              description: Refresh token to revoke along with the presented token
     responses:
       200:
         description: Logout successful
@@ -174,7 +248,135 @@ def logout():
             message:
               type: string
               example: Logout successful
+      400:
+        description: Invalid refresh token
+      401:
+        description: Missing or invalid token
+    """
+    revocation_list = get_revocation_list()
+    claims = get_jwt()
+    revocation_list.revoke(claims['jti'], claims['exp'])
+
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            refresh_claims = decode_token(refresh_token)
+        except ExpiredSignatureError:
+            refresh_claims = None  # Unusable anyway
+        except (PyJWTError, JWTExtendedException):
+            return error_response('Invalid refresh token', 400)
+        if refresh_claims:
+            if refresh_claims.get('sub') != get_jwt_identity() or refresh_claims.get('type') != 'refresh':
+                return error_response('Invalid refresh token', 400)
+            revocation_list.revoke(refresh_claims['jti'], refresh_claims['exp'])
+
+    return success_response(None, 'Logout successful')
+
+
+@auth_bp.route('/api-keys', methods=['POST'])
+@jwt_required()
+def create_api_key():
+    """Create an API key for machine clients
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    description: The key is returned only in this response. Send it in the X-API-Key header to call file endpoints.
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - name
+            - scopes
+          properties:
+            name:
+              type: string
+              example: ingestion-bot
+            scopes:
+              type: array
+              items:
+                type: string
+                enum: [files:read, files:write]
+            expires_in_days:
+              type: integer
+              example: 90
+    responses:
+      201:
+        description: API key created
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                key:
+                  type: string
+                api_key:
+                  type: object
+      400:
+        description: Invalid name, scopes or lifetime
+      401:
+        description: Missing or invalid token
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        api_key, raw_key = ApiKeyService.create_key(
+            int(get_jwt_identity()), data.get('name'), data.get('scopes'), data.get('expires_in_days')
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+    return success_response({'key': raw_key, 'api_key': api_key.to_dict()}, 'API key created', 201)
+
+
+@auth_bp.route('/api-keys', methods=['GET'])
+@jwt_required()
+def list_api_keys():
+    """List the current user's API keys
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: API keys (without their secrets)
+      401:
+        description: Missing or invalid token
+    """
+    api_keys = ApiKeyService.list_keys(int(get_jwt_identity()))
+    return success_response({'api_keys': [api_key.to_dict() for api_key in api_keys]})
+
+
+@auth_bp.route('/api-keys/<int:key_id>', methods=['DELETE'])
+@jwt_required()
+def revoke_api_key(key_id):
+    """Revoke an API key
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: key_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: API key revoked
+      401:
+        description: Missing or invalid token
+      404:
+        description: API key not found
     """
-    # JWT is stateless, so logout is handled client-side by removing the token
-    # This endpoint exists for consistency and can be extended for token blacklisting
-    return success_response(None, 'Logout successful')
\ No newline at end of file
+    api_key = ApiKeyService.revoke_key(int(get_jwt_identity()), key_id)
+    if not api_key:
+        return error_response('API key not found', 404)
+    return success_response(api_key.to_dict(), 'API key revoked')
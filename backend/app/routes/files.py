@@ -1,16 +1,28 @@
 # File management routes
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
 
+from app.middleware.rate_limiter import rate_limit_cost
+from app.models.file import File
 from app.services.file_service import FileService
 from app.services.ai_service import AIService
-from app.utils.responses import success_response, error_response
+from app.services.bulk_delete_service import BulkDeleteService
+from app.services.search_service import SearchService
+from app.services.usage_service import UsageService
+from app.utils.conditional import is_not_modified, make_etag, not_modified_response, with_validators
+from app.utils.db_routing import read_only
+from app.utils.decorators import current_user_id, jwt_or_api_key_required
+from app.utils.fields import list_fields, parse_fields
+from app.utils.pagination import keyset_meta
+from app.utils.responses import success_response, error_response, streamed_list_response
 
 files_bp = Blueprint('files', __name__)
 
+MAX_PER_PAGE = 100
+
 
 @files_bp.route('/upload', methods=['POST'])
-@jwt_required()
+@rate_limit_cost(10)
+@jwt_or_api_key_required('files:write')
 def upload_file():
     """Upload a file and process with AI
     ---
@@ -63,7 +75,7 @@ def upload_file():
       401:
         description: Unauthorized - missing or invalid token
     """
-    user_id = int(get_jwt_identity())  # Convert string ID to integer
+    user_id = current_user_id()
     print(user_id)
     # Check if file is in request
     if 'file' not in request.files:
@@ -90,7 +102,8 @@ def upload_file():
         return success_response({
             'file': file_record.to_dict(),
             'ai_processing': {
-                'status': 'processing' if ai_success else 'failed',
+                # Failed attempts may have been scheduled for retry
+                'status': 'processing' if ai_success else (ai_request.status if ai_request else 'failed'),
                 'message': ai_message,
                 'request_id': ai_request.id if ai_request else None
             }
@@ -107,9 +120,12 @@ def upload_file():
 
 
 @files_bp.route('/', methods=['GET'])
-@jwt_required()
+@jwt_or_api_key_required('files:read')
+@read_only
 def list_files():
     """List user's files with pagination
+    Cursor pagination is used unless a page number is given; each response
+    carries the cursor for the next page.
     ---
     tags:
       - Files
@@ -117,15 +133,32 @@ def list_files():
       - Bearer: []
     parameters:
       - in: query
-        name: page
-        type: integer
-        default: 1
-        description: Page number
+        name: cursor
+        type: string
+        description: Opaque cursor from the previous page's next_cursor
       - in: query
         name: per_page
         type: integer
         default: 20
-        description: Items per page
+        description: Items per page (max 100)
+      - in: query
+        name: total
+        type: string
+        enum: [none, estimate, exact]
+        default: none
+        description: Whether to include a total count
+      - in: query
+        name: page
+        type: integer
+        description: Page number (legacy offset pagination)
+      - in: query
+        name: fields
+        type: string
+        description: Comma-separated fields to return (defaults to all but processing_result)
+      - in: header
+        name: If-None-Match
+        type: string
+        description: ETag from an earlier response; answered with 304 if unchanged
     responses:
       200:
         description: Files retrieved successfully
@@ -157,37 +190,388 @@ def list_files():
                 pagination:
                   type: object
                   properties:
-                    page:
-                      type: integer
                     per_page:
                       type: integer
+                    next_cursor:
+                      type: string
+                    has_more:
+                      type: boolean
                     total:
                       type: integer
-                    pages:
-                      type: integer
+                    total_is_estimate:
+                      type: boolean
+      304:
+        description: Not modified - the If-None-Match ETag is still current
+      400:
+        description: Invalid cursor or total mode
       401:
         description: Unauthorized - missing or invalid token
     """
-    user_id = int(get_jwt_identity())  # Convert string ID to integer
-
+    user_id = current_user_id()
+
+    # The list version moves with every change to the user's files, so an
+    # unchanged list is answered from one primary-key lookup
+    etag = make_etag('files', user_id, UsageService.get_file_list_version(user_id), request.query_string)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+    try:
+        fields = parse_fields(request.args.get('fields'), File, default=list_fields(File))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    if 'page' not in request.args:
+        try:
+            page = FileService.get_user_files_page(
+                user_id,
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                total=request.args.get('total', 'none'),
+                fields=fields
+            )
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        return with_validators(success_response({
+            'files': [file.to_dict(fields) for file in page.items],
+            'pagination': keyset_meta(page, per_page)
+        }, "Files retrieved successfully", 200), etag)
+
+    # Legacy offset pagination
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-
-    pagination = FileService.get_user_files(user_id, page, per_page)
+    pagination = FileService.get_user_files(user_id, page, per_page, fields=fields)
 
-    return success_response({
-        'files': [file.to_dict() for file in pagination.items],
+    return with_validators(success_response({
+        'files': [file.to_dict(fields) for file in pagination.items],
         'pagination': {
             'page': pagination.page,
             'per_page': pagination.per_page,
             'total': pagination.total,
             'pages': pagination.pages
         }
-    }, "Files retrieved successfully", 200)
+    }, "Files retrieved successfully", 200), etag)
+
+
+@files_bp.route('/stats', methods=['GET'])
+@jwt_or_api_key_required('files:read')
+@read_only
+def get_stats():
+    """Get the user's dashboard usage stats
+    ---
+    tags:
+      - Files
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Stats retrieved successfully
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                files:
+                  type: object
+                  properties:
+                    count:
+                      type: integer
+                    total_bytes:
+                      type: integer
+                    processed:
+                      type: integer
+                    unprocessed:
+                      type: integer
+                by_mime_type:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      mime_type:
+                        type: string
+                      count:
+                        type: integer
+                      total_bytes:
+                        type: integer
+                ai_requests:
+                  type: object
+                  description: Request count per status
+      401:
+        description: Unauthorized - missing or invalid token
+    """
+    user_id = current_user_id()
+
+    return success_response(UsageService.get_user_stats(user_id), "Stats retrieved successfully", 200)
+
+
+@files_bp.route('/export', methods=['GET'])
+@rate_limit_cost(10)
+@jwt_or_api_key_required('files:read')
+def export_files():
+    """Export all of the user's files
+    The array is streamed as it is read from the database, newest first,
+    so any number of files can be fetched in one response.
+    ---
+    tags:
+      - Files
+    security:
+      - Bearer: []
+      - ApiKey: []
+    parameters:
+      - in: query
+        name: fields
+        type: string
+        description: Comma-separated fields to return (defaults to all but processing_result)
+    responses:
+      200:
+        description: Files exported successfully
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                files:
+                  type: array
+                  items:
+                    type: object
+      400:
+        description: Unknown field
+      401:
+        description: Unauthorized - missing or invalid token
+    """
+    user_id = current_user_id()
+    try:
+        fields = parse_fields(request.args.get('fields'), File, default=list_fields(File))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    return streamed_list_response(
+        'files',
+        FileService.iter_user_files(user_id, fields),
+        lambda file: file.to_dict(fields),
+        message="Files exported successfully"
+    )
+
+
+@files_bp.route('/search', methods=['GET'])
+@rate_limit_cost(2)
+@jwt_or_api_key_required('files:read')
+@read_only
+def search_files():
+    """Full-text search over the user's filenames and processing results
+    Every word must match as a prefix; filename matches rank above matches in
+    the processing result.
+    ---
+    tags:
+      - Files
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+        description: Words to search for
+      - in: query
+        name: cursor
+        type: string
+        description: Opaque cursor from the previous page's next_cursor
+      - in: query
+        name: per_page
+        type: integer
+        default: 20
+        description: Items per page (max 100)
+      - in: query
+        name: fields
+        type: string
+        description: Comma-separated fields to return (defaults to all but processing_result)
+    responses:
+      200:
+        description: Search results, best match first
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                files:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      checksum:
+                        type: string
+                      filename:
+                        type: string
+                      score:
+                        type: number
+                pagination:
+                  type: object
+                  properties:
+                    per_page:
+                      type: integer
+                    next_cursor:
+                      type: string
+                    has_more:
+                      type: boolean
+      400:
+        description: Missing query, unknown fields or invalid cursor
+      401:
+        description: Unauthorized - missing or invalid token
+    """
+    user_id = current_user_id()
+
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+    try:
+        fields = parse_fields(request.args.get('fields'), File, default=list_fields(File))
+        page = SearchService.search_files(
+            user_id,
+            request.args.get('q'),
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            fields=fields
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    return success_response({
+        'files': [dict(file.to_dict(fields), score=rank) for file, rank in page.items],
+        'pagination': keyset_meta(page, per_page)
+    }, "Search completed successfully", 200)
+
+
+@files_bp.route('/bulk-delete', methods=['POST'])
+@rate_limit_cost(5)
+@jwt_or_api_key_required('files:write')
+def bulk_delete_files():
+    """Delete many files at once; storage objects are purged in the background
+    ---
+    tags:
+      - Files
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            checksums:
+              type: array
+              items:
+                type: string
+              description: Checksums of the files to delete (max BULK_DELETE_MAX_CHECKSUMS)
+            all:
+              type: boolean
+              description: Delete all of the user's files instead
+    responses:
+      202:
+        description: Files deleted; storage purge queued
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: success
+            data:
+              type: object
+              properties:
+                job:
+                  type: object
+                  properties:
+                    id:
+                      type: integer
+                    status:
+                      type: string
+                    files_deleted:
+                      type: integer
+                    objects_total:
+                      type: integer
+                    progress:
+                      type: integer
+      400:
+        description: Invalid request body or deletion failed
+      401:
+        description: Unauthorized - missing or invalid token
+    """
+    user_id = current_user_id()
+
+    data = request.get_json(silent=True) or {}
+    checksums = data.get('checksums')
+
+    if data.get('all') is True:
+        if checksums is not None:
+            return error_response("Provide either checksums or all, not both", 400)
+        checksums = None
+    else:
+        if not isinstance(checksums, list) or not checksums \
+                or not all(isinstance(checksum, str) for checksum in checksums):
+            return error_response("checksums must be a non-empty list of strings", 400)
+        checksums = list(dict.fromkeys(checksums))
+        max_checksums = current_app.config.get('BULK_DELETE_MAX_CHECKSUMS', 1000)
+        if len(checksums) > max_checksums:
+            return error_response(f"At most {max_checksums} checksums per request", 400)
+
+    success, message, job = BulkDeleteService.delete_files(user_id, checksums)
+
+    if not success:
+        return error_response(message, 400)
+
+    return success_response({
+        'job': job.to_dict()
+    }, message, 202)
+
+
+@files_bp.route('/delete-jobs/<int:job_id>', methods=['GET'])
+@jwt_or_api_key_required('files:read')
+@read_only
+def get_delete_job(job_id):
+    """Get the progress of a bulk delete job
+    ---
+    tags:
+      - Files
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: job_id
+        type: integer
+        required: true
+        description: Delete job ID
+    responses:
+      200:
+        description: Delete job retrieved successfully
+      401:
+        description: Unauthorized - missing or invalid token
+      404:
+        description: Delete job not found
+    """
+    user_id = current_user_id()
+
+    job = BulkDeleteService.get_job(job_id, user_id)
+    if not job:
+        return error_response("Delete job not found", 404)
+
+    return success_response({
+        'job': job.to_dict()
+    }, "Delete job retrieved successfully", 200)
 
 
 @files_bp.route('/<string:checksum>', methods=['GET'])
-@jwt_required()
+@jwt_or_api_key_required('files:read')
+@read_only
 def get_file(checksum):
     """Get specific file details by checksum
     ---
@@ -201,6 +585,14 @@ def get_file(checksum):
         type: string
         required: true
         description: File checksum (SHA256)
+      - in: query
+        name: fields
+        type: string
+        description: Comma-separated fields to return (defaults to all)
+      - in: header
+        name: If-None-Match
+        type: string
+        description: ETag from an earlier response; answered with 304 if unchanged
     responses:
       200:
         description: File retrieved successfully
@@ -227,6 +619,8 @@ def get_file(checksum):
                       type: integer
                     is_processed:
                       type: boolean
+      304:
+        description: Not modified - the If-None-Match ETag is still current
       401:
         description: Unauthorized - missing or invalid token
       403:
@@ -234,24 +628,45 @@ def get_file(checksum):
       404:
         description: File not found
     """
-    user_id = int(get_jwt_identity())  # Convert string ID to integer
-
-    file_record = FileService.get_file_by_checksum(checksum)
-
-    if not file_record:
+    user_id = current_user_id()
+
+    try:
+        fields = parse_fields(request.args.get('fields'), File)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    file_record = None
+    if request.if_none_match:
+        # Conditional request: compare validators before loading the file
+        validator = FileService.get_file_validator(checksum)
+    else:
+        file_record = FileService.get_file_by_checksum(checksum, fields)
+        validator = FileService.file_validator(file_record)
+
+    if not validator:
         return error_response("File not found", 404)
 
     # Check if user owns the file
-    if file_record.user_id != user_id:
+    if validator.user_id != user_id:
         return error_response("Access denied", 403)
 
-    return success_response({
-        'file': file_record.to_dict()
-    }, "File retrieved successfully", 200)
+    etag = make_etag('file', checksum, tuple(validator), fields)
+    last_modified = max(filter(None, (validator.uploaded_at, validator.processed_at)), default=None)
+    if is_not_modified(etag):
+        return not_modified_response(etag, last_modified)
+
+    if file_record is None:
+        file_record = FileService.get_file_by_checksum(checksum, fields)
+        if not file_record:
+            return error_response("File not found", 404)
+
+    return with_validators(success_response({
+        'file': file_record.to_dict(fields)
+    }, "File retrieved successfully", 200), etag, last_modified)
 
 
 @files_bp.route('/<string:checksum>', methods=['DELETE'])
-@jwt_required()
+@jwt_or_api_key_required('files:write')
 def delete_file(checksum):
     """Delete a file by checksum
     ---
@@ -286,7 +701,7 @@ def delete_file(checksum):
       404:
         description: File not found
     """
-    user_id = int(get_jwt_identity())  # Convert string ID to integer
+    user_id = current_user_id()
 
     success, message = FileService.delete_file(checksum, user_id)
 
@@ -297,7 +712,8 @@ def delete_file(checksum):
 
 
 @files_bp.route('/<string:checksum>/processing-status', methods=['GET'])
-@jwt_required()
+@jwt_or_api_key_required('files:read')
+@read_only
 def get_processing_status(checksum):
     """Get file processing status
     ---
@@ -311,6 +727,10 @@ def get_processing_status(checksum):
         type: string
         required: true
         description: File checksum (SHA256)
+      - in: header
+        name: If-None-Match
+        type: string
+        description: ETag from an earlier response; answered with 304 if unchanged
     responses:
       200:
         description: Processing status retrieved successfully
@@ -342,9 +762,14 @@ def get_processing_status(checksum):
                       type: integer
                     status:
                       type: string
+                    progress:
+                      type: integer
+                      description: Percent complete (0-100)
                     created_at:
                       type: string
                       format: date-time
+      304:
+        description: Not modified - the If-None-Match ETag is still current
       401:
         description: Unauthorized - missing or invalid token
       403:
@@ -352,26 +777,39 @@ def get_processing_status(checksum):
       404:
         description: File not found
     """
-    user_id = int(get_jwt_identity())  # Convert string ID to integer
-
-    file_record = FileService.get_file_by_checksum(checksum)
-
-    if not file_record:
+    user_id = current_user_id()
+
+    file_record = latest_request = None
+    if request.if_none_match:
+        # Pollers send back the ETag and get an empty 304 until something
+        # moves, without loading the result or the request's response
+        validator = FileService.get_file_validator(checksum, with_request=True)
+    else:
+        file_record, latest_request = FileService.get_file_with_latest_request(checksum)
+        validator = FileService.file_validator(file_record, latest_request, with_request=True)
+
+    if not validator:
         return error_response("File not found", 404)
 
     # Check if user owns the file
-    if file_record.user_id != user_id:
+    if validator.user_id != user_id:
         return error_response("Access denied", 403)
 
-    # Get latest AI request for this file
-    latest_request = None
-    if file_record.ai_requests:
-        latest_request = max(file_record.ai_requests, key=lambda r: r.created_at)
+    etag = make_etag('processing-status', checksum, tuple(validator))
+    last_modified = max(filter(None, (validator.uploaded_at, validator.processed_at, validator.completed_at)),
+                        default=None)
+    if is_not_modified(etag):
+        return not_modified_response(etag, last_modified)
 
-    return success_response({
+    if file_record is None:
+        file_record, latest_request = FileService.get_file_with_latest_request(checksum)
+        if not file_record:
+            return error_response("File not found", 404)
+
+    return with_validators(success_response({
         'checksum': file_record.checksum,
         'is_processed': file_record.is_processed,
-        'processed_at': file_record.processed_at.isoformat() if file_record.processed_at else None,
+        'processed_at': file_record.processed_at,
         'processing_result': file_record.processing_result,
         'latest_request': latest_request.to_dict() if latest_request else None
-    }, "Processing status retrieved successfully", 200)
+    }, "Processing status retrieved successfully", 200), etag, last_modified)
@@ -1,5 +1,5 @@
 # Health check routes
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
 from datetime import datetime
 
 health_bp = Blueprint('health', __name__, url_prefix='/api/health')
@@ -26,7 +26,7 @@ def health_check():
     """
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow()
     }), 200
 
 
@@ -50,7 +50,12 @@ def readiness_check():
               format: date-time
     """
     # TODO: Add database connectivity check
-    return jsonify({
+    body = {
         'status': 'ready',
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+        'timestamp': datetime.utcnow()
+    }
+    routing = current_app.extensions.get('db_routing')
+    if routing is not None:
+        # Informational only: reads fall back to the primary without replicas
+        body['replicas'] = routing.health()
+    return jsonify(body), 200
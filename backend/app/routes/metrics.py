@@ -0,0 +1,36 @@
+# Prometheus metrics route
+import hmac
+
+from flask import Blueprint, Response, current_app, request
+
+from app.utils.metrics import render_metrics
+from app.utils.responses import error_response
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint
+    ---
+    tags:
+      - Health
+    produces:
+      - text/plain
+    parameters:
+      - in: header
+        name: Authorization
+        type: string
+        description: Bearer METRICS_TOKEN, when one is configured
+    responses:
+      200:
+        description: Metrics in the Prometheus text exposition format
+      401:
+        description: METRICS_TOKEN is configured and was not sent
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    sent = request.headers.get('Authorization', '').encode()
+    if token and not hmac.compare_digest(sent, f'Bearer {token}'.encode()):
+        return error_response("Metrics token required", 401)
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
@@ -1,13 +1,41 @@
 # AI API integration service
+import asyncio
 import os
+import queue
+import random
+import time
+import threading
 import requests
 import base64
-from datetime import datetime
+from contextlib import ExitStack
+from types import SimpleNamespace
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError, as_completed
+from datetime import datetime, timedelta
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from sqlalchemy import update
 
 from app.extensions import db
 from app.models.ai_request import AIRequest
 from app.models.file import File
+from app.services.archive_service import ArchiveService
+from app.services.extraction_service import TextExtractionService
+from app.services.rate_governor import RateGovernor, RateGovernorTimeout
+from app.services.usage_service import UsageService
+from app.utils import aio
+from app.utils.db_routing import read_only
+from app.utils.fields import projection
+from app.utils.pagination import paginate_keyset
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# One pooled session per worker process, shared by all request threads
+_http_session = None
+_http_session_lock = threading.Lock()
+
+# Process-wide governor shared by every outbound AI API call
+_rate_governor = None
 
 
 class AIService:
@@ -29,28 +57,58 @@ class AIService:
         if file_record.is_processed:
             return True, "File already processed", None
 
-        # Create AI request record
+        # Create AI request record, leased to this worker for its first attempt
         ai_request = AIRequest(
             file_checksum=file_checksum,
             user_id=user_id,
             request_type=request_type,
-            status='processing'
+            status='processing',
+            attempts=1,
+            max_attempts=current_app.config.get('AI_MAX_ATTEMPTS', 5),
+            lease_expires_at=AIService._lease_deadline()
         )
 
         try:
             db.session.add(ai_request)
+            db.session.flush()
+            # Point the file at its newest request in the same transaction;
+            # ids only grow, so a concurrent older request cannot win
+            db.session.execute(
+                update(File)
+                .where(File.checksum == file_checksum)
+                .where((File.latest_request_id.is_(None)) | (File.latest_request_id < ai_request.id))
+                .values(latest_request_id=ai_request.id)
+                .execution_options(synchronize_session=False)
+            )
+            # latest_request_id is part of the file list
+            UsageService.record_file_list_change([file_record.user_id])
+            UsageService.record_status_change([user_id], None, ai_request.status)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             return False, f"Failed to create AI request: {str(e)}", None
 
+        return AIService.run_request(ai_request, file_record)
+
+    @staticmethod
+    def run_request(ai_request, file_record):
+        """
+        Run one processing attempt for an AI request the caller has leased
+        Returns: (success, message, ai_request)
+        """
+        # Snapshot what later steps need; commits below expire the instances
+        request_id = ai_request.id
+        attempts = ai_request.attempts
+        max_attempts = ai_request.max_attempts
+        request_type = ai_request.request_type
+
         # Get AI API configuration
         ai_api_url = current_app.config.get('AI_API_URL')
         ai_api_key = current_app.config.get('AI_API_KEY')
 
         if not ai_api_url or not ai_api_key:
-            AIService._update_request_status(ai_request.id, 'failed',
-                                            error_message="AI API not configured")
+            AIService.transition(request_id, 'processing', 'failed',
+                                 error_message="AI API not configured")
             return False, "AI API not configured", ai_request
 
         # Read file content
@@ -58,125 +116,565 @@ class AIService:
             with open(file_record.filepath, 'rb') as f:
                 file_content = f.read()
         except Exception as e:
-            AIService._update_request_status(ai_request.id, 'failed',
-                                            error_message=f"Failed to read file: {str(e)}")
+            AIService._record_failure(request_id, attempts, max_attempts,
+                                      f"Failed to read file: {str(e)}")
             return False, f"Failed to read file: {str(e)}", ai_request
 
-        # Encode file content to base64 for API transmission
-        file_base64 = base64.b64encode(file_content).decode('utf-8')
+        # Send only locally extracted text when the request type allows it,
+        # otherwise encode the whole file to base64 for API transmission
+        text = None
+        if request_type in current_app.config.get('AI_TEXT_ONLY_REQUEST_TYPES', ()):
+            text = TextExtractionService.get_text(file_record, file_content)
+            if text is not None and not text.strip():
+                # Nothing to read locally (e.g. a scanned PDF): the provider needs the file itself
+                text = None
+        file_base64 = None if text is not None else base64.b64encode(file_content).decode('utf-8')
+
+        # Large texts are split into bounded segments processed in parallel
+        max_chars = current_app.config.get('AI_CHUNK_MAX_CHARS', 100000)
+        chunks = AIService._split_text(text, max_chars) if text is not None else []
 
         # Send request to AI API
         try:
-            response = AIService._send_to_ai_api(
-                ai_api_url,
-                ai_api_key,
-                file_record,
-                file_base64
-            )
+            if len(chunks) > 1:
+                response = AIService._process_chunks(
+                    ai_api_url,
+                    ai_api_key,
+                    file_record,
+                    chunks,
+                    request_id
+                )
+            else:
+                response = AIService._send_to_ai_api(
+                    ai_api_url,
+                    ai_api_key,
+                    file_record,
+                    file_base64,
+                    text=text
+                )
 
             if response.get('success'):
                 result = response.get('result', '')
-
-                # Update AI request
-                AIService._update_request_status(
-                    ai_request.id,
-                    'completed',
-                    response=result
-                )
-
-                # Mark file as processed
-                file_record.is_processed = True
-                file_record.processed_at = datetime.utcnow()
-                file_record.processing_result = result
-                db.session.commit()
-
+                if not AIService._complete_request(request_id, file_record.checksum, result):
+                    return False, "AI request is no longer leased by this worker", ai_request
                 return True, "File processed successfully", ai_request
             else:
                 error_msg = response.get('error', 'Unknown error')
-                AIService._update_request_status(
-                    ai_request.id,
-                    'failed',
-                    error_message=error_msg
+                AIService._record_failure(
+                    request_id,
+                    attempts,
+                    max_attempts,
+                    error_msg,
+                    retryable=response.get('retryable', True)
                 )
                 return False, f"AI processing failed: {error_msg}", ai_request
 
         except Exception as e:
-            AIService._update_request_status(
-                ai_request.id,
-                'failed',
-                error_message=str(e)
-            )
+            db.session.rollback()
+            AIService._record_failure(request_id, attempts, max_attempts, str(e))
             return False, f"Failed to process file: {str(e)}", ai_request
 
     @staticmethod
-    def _send_to_ai_api(api_url, api_key, file_record, file_base64):
-        """Send file to AI API for processing"""
+    def transition(request_id, expected, new, commit=True, **values):
+        """
+        Move a request from the expected status to a new one with a single
+        conditional UPDATE. Raises IllegalTransitionError for transitions the
+        lifecycle does not allow.
+        Returns: True if this caller won the transition
+        """
+        user_ids = db.session.execute(
+            AIRequest.transition_statement(expected, new, AIRequest.id == request_id, **values)
+        ).scalars().all()
+        UsageService.record_status_change(user_ids, expected, new)
+        if commit:
+            db.session.commit()
+        return len(user_ids) == 1
+
+    @staticmethod
+    def _complete_request(request_id, file_checksum, result):
+        """
+        Complete the request and mark its file processed in one transaction
+        Returns: False if the lease was lost (e.g. reaped) and nothing changed
+        """
+        now = datetime.utcnow()
+        try:
+            if not AIService.transition(request_id, 'processing', 'completed', commit=False,
+                                        response=result, completed_at=now, lease_expires_at=None):
+                db.session.rollback()
+                current_app.logger.warning(f"AI request {request_id} completed after losing its lease")
+                return False
+
+            # The first request to complete sets the file's result
+            processed = db.session.execute(
+                update(File)
+                .where(File.checksum == file_checksum, File.is_processed.isnot(True))
+                .values(is_processed=True, processed_at=now, processing_result=result)
+                .returning(File.user_id, File.mime_type)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if processed:
+                UsageService.record_file_change(processed.user_id, processed.mime_type, processed=1)
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _lease_deadline(now=None):
+        """Time after which an unfinished 'processing' request is considered abandoned"""
+        lease = current_app.config.get('AI_REQUEST_LEASE_SECONDS', 600)
+        return (now or datetime.utcnow()) + timedelta(seconds=lease)
+
+    @staticmethod
+    def retry_backoff(attempts):
+        """Delay before the next attempt: exponential in attempts, capped, with jitter"""
+        base = current_app.config.get('AI_RETRY_BACKOFF_BASE', 30)
+        cap = current_app.config.get('AI_RETRY_BACKOFF_MAX', 3600)
+        delay = min(base * (2 ** max(attempts - 1, 0)), cap)
+        return timedelta(seconds=delay * random.uniform(0.9, 1.1))
+
+    @staticmethod
+    def _record_failure(request_id, attempts, max_attempts, error_message, retryable=True):
+        """
+        Record a failed attempt: schedule a retry while attempts remain,
+        otherwise move the request to the dead-letter state
+        Returns: the new status, or None if the lease was already lost
+        """
+        values = {'error_message': error_message, 'lease_expires_at': None}
+        if not retryable:
+            status = 'failed'
+        elif (attempts or 0) < (max_attempts or 1):
+            status = 'retrying'
+            values['next_attempt_at'] = datetime.utcnow() + AIService.retry_backoff(attempts or 1)
+        else:
+            status = 'dead_letter'
+
+        try:
+            if AIService.transition(request_id, 'processing', status, **values):
+                return status
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to update AI request status: {str(e)}")
+        return None
+
+    @staticmethod
+    def _split_text(text, max_chars):
+        """
+        Split text into segments of at most max_chars, preferring line and
+        then word boundaries. Concatenating the segments gives back the input.
+        """
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = min(start + max_chars, len(text))
+            if end < len(text):
+                cut = text.rfind('\n', start, end)
+                if cut <= start:
+                    cut = text.rfind(' ', start, end)
+                if cut > start:
+                    end = cut + 1
+            chunks.append(text[start:end])
+            start = end
+        return chunks
+
+    @staticmethod
+    def _merge_chunk_results(results):
+        """Deterministically merge per-segment results in segment order"""
+        return '\n\n'.join(results[index] for index in sorted(results))
+
+    @staticmethod
+    def _process_chunks(api_url, api_key, file_record, chunks, request_id):
+        """
+        Process text segments concurrently and merge their results.
+        Progress is recorded on the parent AIRequest as segments complete.
+        Returns: response dict shaped like _send_to_ai_api's
+        """
+        app = current_app._get_current_object()
+        total = len(chunks)
+        # Worker threads get a detached snapshot, never the session-bound record
+        file_info = SimpleNamespace(
+            original_filename=file_record.original_filename,
+            mime_type=file_record.mime_type,
+            file_size=file_record.file_size,
+            checksum=file_record.checksum
+        )
+        AIRequest.query.filter_by(id=request_id, status='processing').update(
+            {'chunks_total': total, 'chunks_completed': 0}
+        )
+        db.session.commit()
+
+        def _send_chunk(index, chunk):
+            with app.app_context():
+                return AIService._send_to_ai_api(
+                    api_url, api_key, file_info, None, text=chunk, segment=(index, total)
+                )
+
+        results = {}
+        concurrency = current_app.config.get('AI_CHUNK_CONCURRENCY', 4)
+        with ExitStack() as stack:
+            if aio.is_enabled():
+                completed, cancel = AIService._send_chunks_async(api_url, api_key, file_info, chunks, concurrency)
+            else:
+                executor = stack.enter_context(ThreadPoolExecutor(max_workers=min(concurrency, total)))
+                futures = {
+                    executor.submit(_send_chunk, index, chunk): index
+                    for index, chunk in enumerate(chunks)
+                }
+                completed = ((futures[future], future.result()) for future in as_completed(futures))
+
+                def cancel():
+                    for pending in futures:
+                        pending.cancel()
+
+            for index, response in completed:
+                if not response.get('success'):
+                    cancel()
+                    error = response.get('error', 'Unknown error')
+                    return {
+                        'success': False,
+                        'error': f"Segment {index + 1}/{total} failed: {error}",
+                        'retryable': response.get('retryable', True)
+                    }
+
+                results[index] = response.get('result', '')
+                # Progress also renews the lease so long documents are not reaped
+                AIRequest.query.filter_by(id=request_id, status='processing').update({
+                    'chunks_completed': len(results),
+                    'lease_expires_at': AIService._lease_deadline()
+                })
+                db.session.commit()
+
+        return {
+            'success': True,
+            'result': AIService._merge_chunk_results(results)
+        }
+
+    @staticmethod
+    def _send_chunks_async(api_url, api_key, file_info, chunks, concurrency):
+        """
+        Send segments as coroutines on the I/O loop (ASYNC_IO), at most
+        concurrency at a time, instead of from a thread per segment
+        Returns: (iterator of (index, response) in completion order, cancel function)
+        """
+        total = len(chunks)
+        completed = queue.Queue()
+
+        async def _send_all():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def _send(index, chunk):
+                async with semaphore:
+                    try:
+                        response = await AIService._send_to_ai_api_async(
+                            api_url, api_key, file_info, None, text=chunk, segment=(index, total)
+                        )
+                    except Exception as e:
+                        response = {'success': False, 'error': str(e), 'retryable': True}
+                completed.put((index, response))
+
+            await asyncio.gather(*(_send(index, chunk) for index, chunk in enumerate(chunks)))
+
+        future = aio.submit(_send_all())
+        # Wakes the reader at once if the loop cancels or fails the batch
+        future.add_done_callback(lambda done: completed.put(None))
+        # Segments run in waves of concurrency calls
+        deadline = time.monotonic() + AIService._call_timeout() * -(-total // concurrency)
+
+        def _results():
+            pending = set(range(total))
+            while pending:
+                try:
+                    item = completed.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    item = None
+                if item is None:
+                    yield min(pending), {'success': False, 'error': "did not finish", 'retryable': True}
+                    return
+                pending.discard(item[0])
+                yield item
+
+        return _results(), future.cancel
+
+    @staticmethod
+    def _get_rate_governor():
+        """Get the process-wide governor for outbound AI API calls"""
+        global _rate_governor
+        if _rate_governor is None:
+            with _http_session_lock:
+                if _rate_governor is None:
+                    _rate_governor = RateGovernor(
+                        rate=current_app.config.get('AI_API_RATE_LIMIT', 0),
+                        burst=current_app.config.get('AI_API_RATE_BURST'),
+                        max_concurrency=current_app.config.get('AI_API_MAX_CONCURRENCY', 0)
+                    )
+        return _rate_governor
+
+    @staticmethod
+    def _get_http_session():
+        """Get the shared, connection-pooled HTTP session for the AI API"""
+        global _http_session
+        if _http_session is None:
+            with _http_session_lock:
+                if _http_session is None:
+                    pool_size = current_app.config.get('AI_API_POOL_SIZE', 10)
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    _http_session = session
+        return _http_session
+
+    @staticmethod
+    def warm_up_http_session(connections=1):
+        """
+        Open up to connections keep-alive connections to the AI API host with
+        HEAD requests, which the provider answers without running a model
+        """
+        api_url = current_app.config.get('AI_API_URL')
+        if not api_url:
+            return 0
+        session = AIService._get_http_session()
+        timeout = current_app.config.get('AI_API_TIMEOUT', 60)
+        # Streamed responses hold their connection until read, so each HEAD opens a new one
+        responses = []
+        try:
+            for _ in range(min(connections, current_app.config.get('AI_API_POOL_SIZE', 10))):
+                responses.append(session.head(api_url, stream=True, timeout=timeout))
+        finally:
+            for response in responses:
+                # Reading the empty body returns the connection to the pool
+                response.content
+                response.close()
+        return len(responses)
+
+    @staticmethod
+    def _retry_delay(attempt, response=None):
+        """Exponential backoff, honouring Retry-After when the API sends one"""
+        base = current_app.config.get('AI_API_RETRY_BACKOFF', 0.5)
+        cap = current_app.config.get('AI_API_RETRY_BACKOFF_MAX', 10.0)
+        delay = base * (2 ** attempt)
+        if response is not None:
+            try:
+                delay = float(response.headers.get('Retry-After', delay))
+            except ValueError:
+                pass
+        return min(delay, cap)
+
+    @staticmethod
+    def _call_timeout():
+        """Longest one AI API call can take with all its retries, slot waits and backoff"""
+        config = current_app.config
+        attempts = config.get('AI_API_MAX_RETRIES', 3) + 1
+        return attempts * (config.get('AI_API_SLOT_TIMEOUT', 120) + config.get('AI_API_TIMEOUT', 60)
+                           + config.get('AI_API_RETRY_BACKOFF_MAX', 10))
+
+    @staticmethod
+    def _build_ai_api_request(api_key, file_record, file_base64, text=None, segment=None):
+        """Headers and JSON payload for one AI API call"""
         headers = {
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
         }
 
+        file_payload = {
+            'name': file_record.original_filename,
+            'mime_type': file_record.mime_type,
+            'size': file_record.file_size,
+            'checksum': file_record.checksum
+        }
+        if text is not None:
+            file_payload['text'] = text
+        else:
+            file_payload['content'] = file_base64
+
         payload = {
-            'file': {
-                'name': file_record.original_filename,
-                'mime_type': file_record.mime_type,
-                'size': file_record.file_size,
-                'content': file_base64,
-                'checksum': file_record.checksum
-            },
+            'file': file_payload,
             'options': {
                 'process_type': 'analyze',
-                'extract_text': True,
+                'extract_text': text is None,
                 'generate_summary': True
             }
         }
+        if segment is not None:
+            payload['segment'] = {'index': segment[0], 'count': segment[1]}
+        return headers, payload
 
-        try:
-            # using mock response until integration with AI service is complite
-            response = {
-                'success' : True,
-                'result' : 'Mock response, file processed'
-            }
-            # response = requests.post(
-            #     api_url,
-            #     json=payload,
-            #     headers=headers,
-            #     timeout=60
-            # )
-            # response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+    @staticmethod
+    def _send_to_ai_api(api_url, api_key, file_record, file_base64, text=None, segment=None):
+        """
+        Send file (or its extracted text) to AI API for processing.
+        segment is an optional (index, count) pair for chunked requests.
+        """
+        if aio.is_enabled():
+            try:
+                return aio.run(AIService._send_to_ai_api_async(
+                    api_url, api_key, file_record, file_base64, text=text, segment=segment
+                ), timeout=AIService._call_timeout())
+            except (TimeoutError, CancelledError):
+                # The I/O loop stalled or shut down under the call
+                return {'success': False, 'error': "AI API call did not finish", 'retryable': True}
+
+        headers, payload = AIService._build_ai_api_request(api_key, file_record, file_base64, text, segment)
+
+        session = AIService._get_http_session()
+        governor = AIService._get_rate_governor()
+        slot_timeout = current_app.config.get('AI_API_SLOT_TIMEOUT', 120)
+        timeout = current_app.config.get('AI_API_TIMEOUT', 60)
+        max_retries = current_app.config.get('AI_API_MAX_RETRIES', 3)
+
+        for attempt in range(max_retries + 1):
+            try:
+                with governor.slot(timeout=slot_timeout):
+                    response = session.post(
+                        api_url,
+                        json=payload,
+                        headers=headers,
+                        timeout=timeout
+                    )
+            except RateGovernorTimeout as e:
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'retryable': True
+                }
+            except requests.exceptions.RequestException as e:
+                if attempt < max_retries:
+                    time.sleep(AIService._retry_delay(attempt))
+                    continue
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'retryable': True
+                }
+
+            # Throttling and server errors are transient, everything else is final
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < max_retries:
+                time.sleep(AIService._retry_delay(attempt, response))
+                continue
+
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+
+            if not response.ok:
+                return {
+                    'success': False,
+                    'error': body.get('error') or f"AI API returned HTTP {response.status_code}",
+                    'retryable': response.status_code in RETRYABLE_STATUS_CODES
+                }
+            return body
 
     @staticmethod
-    def _update_request_status(request_id, status, response=None, error_message=None):
-        """Update AI request status"""
-        try:
-            ai_request = AIRequest.query.get(request_id)
-            if ai_request:
-                ai_request.status = status
-                if response:
-                    ai_request.response = response
-                if error_message:
-                    ai_request.error_message = error_message
-                if status in ['completed', 'failed']:
-                    ai_request.completed_at = datetime.utcnow()
-                db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Failed to update AI request status: {str(e)}")
+    async def _get_async_http_session():
+        """Get the running loop's connection-pooled aiohttp session for the AI API"""
+        import aiohttp
+
+        pool_size = current_app.config.get('AI_API_POOL_SIZE', 10)
+        return await aio.loop_local(
+            'ai-api-session',
+            lambda: aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=pool_size))
+        )
 
     @staticmethod
-    def get_request_history(user_id, page=1, per_page=20):
+    async def _send_to_ai_api_async(api_url, api_key, file_record, file_base64, text=None, segment=None):
+        """_send_to_ai_api as a coroutine (ASYNC_IO): same payload, retries and governor"""
+        import aiohttp
+
+        headers, payload = AIService._build_ai_api_request(api_key, file_record, file_base64, text, segment)
+
+        session = await AIService._get_async_http_session()
+        governor = AIService._get_rate_governor()
+        slot_timeout = current_app.config.get('AI_API_SLOT_TIMEOUT', 120)
+        timeout = aiohttp.ClientTimeout(total=current_app.config.get('AI_API_TIMEOUT', 60))
+        max_retries = current_app.config.get('AI_API_MAX_RETRIES', 3)
+
+        for attempt in range(max_retries + 1):
+            try:
+                async with governor.aslot(timeout=slot_timeout):
+                    async with session.post(api_url, json=payload, headers=headers, timeout=timeout) as response:
+                        status = response.status
+                        retry_delay = AIService._retry_delay(attempt, response)
+                        try:
+                            body = await response.json(content_type=None)
+                        except ValueError:
+                            body = {}
+            except RateGovernorTimeout as e:
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'retryable': True
+                }
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < max_retries:
+                    await asyncio.sleep(AIService._retry_delay(attempt))
+                    continue
+                return {
+                    'success': False,
+                    'error': str(e) or type(e).__name__,
+                    'retryable': True
+                }
+
+            # Throttling and server errors are transient, everything else is final
+            if status in RETRYABLE_STATUS_CODES and attempt < max_retries:
+                await asyncio.sleep(retry_delay)
+                continue
+
+            if not isinstance(body, dict):
+                body = {}
+            if status >= 400:
+                return {
+                    'success': False,
+                    'error': body.get('error') or f"AI API returned HTTP {status}",
+                    'retryable': status in RETRYABLE_STATUS_CODES
+                }
+            return body
+
+    @staticmethod
+    def _history_query(user_id, fields=None):
+        """
+        A user's requests within the retention window, loading only the
+        columns behind fields if given. The lower bound on created_at lets
+        PostgreSQL prune older partitions.
+        """
+        query = AIRequest.query.filter_by(user_id=user_id)
+        cutoff = ArchiveService.retention_cutoff()
+        if cutoff is not None:
+            query = query.filter(AIRequest.created_at >= cutoff)
+        if fields:
+            query = query.options(projection(AIRequest, fields, 'created_at', 'id'))
+        return query
+
+    @staticmethod
+    @read_only
+    def get_request_history(user_id, page=1, per_page=20, fields=None):
         """Get AI request history for a user"""
-        return AIRequest.query.filter_by(user_id=user_id)\
+        return AIService._history_query(user_id, fields)\
             .order_by(AIRequest.created_at.desc())\
             .paginate(page=page, per_page=per_page, error_out=False)
 
     @staticmethod
-    def get_request_by_id(request_id, user_id):
-        """Get specific AI request"""
-        return AIRequest.query.filter_by(id=request_id, user_id=user_id).first()
+    @read_only
+    def get_request_history_page(user_id, cursor=None, per_page=20, total='none', fields=None):
+        """
+        Get one page of a user's AI requests, newest first, after the given cursor,
+        loading only the columns behind fields if given
+        Returns: KeysetPage
+        """
+        return paginate_keyset(
+            AIService._history_query(user_id, fields),
+            (AIRequest.created_at, AIRequest.id),
+            cursor=cursor,
+            limit=per_page,
+            total=total
+        )
+
+    @staticmethod
+    @read_only
+    def get_request_by_id(request_id, user_id, fields=None):
+        """Get specific AI request, loading only the columns behind fields if given"""
+        query = AIRequest.query.filter_by(id=request_id, user_id=user_id)
+        if fields:
+            query = query.options(projection(AIRequest, fields, 'id'))
+        return query.first()
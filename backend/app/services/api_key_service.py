@@ -0,0 +1,141 @@
+# API key issuing and verification
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+
+from app.extensions import db
+from app.models.api_key import ApiKey
+from app.utils.api_key_cache import ApiKeyPrincipal, get_api_key_cache
+from app.utils.metrics import API_KEY_VERIFICATIONS
+
+KEY_TYPE = 'ak'
+SCOPES = ('files:read', 'files:write')
+
+
+class ApiKeyService:
+    """
+    Issue, list and revoke API keys, and verify keys presented by machine
+    clients. A key is ak_<prefix>_<secret>: the prefix is stored in clear to
+    find the row, the secret only as an HMAC-SHA256 under API_KEY_HASH_KEY.
+    The secret is 256 random bits, so a fast keyed hash is as safe as a slow
+    password hash would be and costs microseconds to check.
+    """
+
+    @staticmethod
+    def _digest(secret: str) -> str:
+        key = current_app.config.get('API_KEY_HASH_KEY') or current_app.config['SECRET_KEY']
+        return hmac.new(key.encode(), secret.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def parse(raw_key):
+        """
+        Split a presented key into its parts
+        Returns: (prefix, secret), or None if it is not shaped like a key
+        """
+        parts = (raw_key or '').strip().split('_', 2)
+        if len(parts) != 3 or parts[0] != KEY_TYPE or not parts[1] or not parts[2]:
+            return None
+        return parts[1], parts[2]
+
+    @classmethod
+    def create_key(cls, user_id, name, scopes, expires_in_days=None):
+        """
+        Issue a key for a user
+        Returns: (ApiKey, the full key, which is not stored and is shown only once)
+        Raises: ValueError for a bad name, scopes or lifetime
+        """
+        name = (name or '').strip()
+        if not name or len(name) > 100:
+            raise ValueError("Name must be 1 to 100 characters")
+        if not scopes or not isinstance(scopes, list) or any(scope not in SCOPES for scope in scopes):
+            raise ValueError(f"Scopes must be a non-empty list drawn from: {', '.join(SCOPES)}")
+        expires_at = None
+        if expires_in_days is not None:
+            if not isinstance(expires_in_days, int) or expires_in_days <= 0:
+                raise ValueError("expires_in_days must be a positive integer")
+            expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
+
+        prefix, secret = secrets.token_hex(6), secrets.token_urlsafe(32)
+        api_key = ApiKey(
+            user_id=user_id,
+            name=name,
+            prefix=prefix,
+            key_hash=cls._digest(secret),
+            scopes=','.join(sorted(set(scopes))),
+            expires_at=expires_at
+        )
+        db.session.add(api_key)
+        db.session.commit()
+        return api_key, f'{KEY_TYPE}_{prefix}_{secret}'
+
+    @staticmethod
+    def list_keys(user_id):
+        """A user's keys, newest first"""
+        return ApiKey.query.filter_by(user_id=user_id).order_by(ApiKey.id.desc()).all()
+
+    @staticmethod
+    def revoke_key(user_id, key_id):
+        """
+        Revoke one of a user's keys in every process
+        Returns: the ApiKey, or None if the user has no such key
+        """
+        api_key = ApiKey.query.filter_by(id=key_id, user_id=user_id).first()
+        if not api_key:
+            return None
+        if api_key.revoked_at is None:
+            api_key.revoked_at = datetime.utcnow()
+            db.session.commit()
+        get_api_key_cache().revoke(api_key.prefix)
+        return api_key
+
+    @staticmethod
+    def _load(prefix):
+        api_key = ApiKey.query.filter_by(prefix=prefix).first()
+        if not api_key or api_key.revoked_at is not None:
+            return None
+        # Naive UTC datetime to epoch seconds
+        expires_at = (api_key.expires_at - datetime(1970, 1, 1)).total_seconds() if api_key.expires_at else None
+        return ApiKeyPrincipal(api_key.id, api_key.user_id, api_key.prefix, api_key.key_hash,
+                               frozenset(api_key.scope_list), expires_at)
+
+    @classmethod
+    def authenticate(cls, raw_key):
+        """
+        Verify a presented key, from the in-process cache when possible
+        Returns: ApiKeyPrincipal, or None if the key is invalid, revoked or expired
+        """
+        parts = cls.parse(raw_key)
+        if parts is None:
+            API_KEY_VERIFICATIONS.labels(source='none', result='malformed').inc()
+            return None
+        prefix, secret = parts
+
+        cache = get_api_key_cache()
+        cache.sync()
+        found, principal = cache.get(prefix)
+        source = 'cache' if found else 'database'
+        if not found:
+            principal = cls._load(prefix)
+            cache.put(prefix, principal)
+
+        if principal is None or not hmac.compare_digest(principal.key_hash, cls._digest(secret)):
+            API_KEY_VERIFICATIONS.labels(source=source, result='invalid').inc()
+            return None
+        if principal.expires_at is not None and principal.expires_at <= time.time():
+            API_KEY_VERIFICATIONS.labels(source=source, result='expired').inc()
+            return None
+        API_KEY_VERIFICATIONS.labels(source=source, result='ok').inc()
+        return principal
+
+    @classmethod
+    def authenticate_request(cls, raw_key):
+        """authenticate(), memoised for the current request (the rate limiter checks keys too)"""
+        memo = request.environ.get('app.api_key_verified')
+        if memo is None or memo[0] != raw_key:
+            memo = (raw_key, cls.authenticate(raw_key))
+            request.environ['app.api_key_verified'] = memo
+        return memo[1]
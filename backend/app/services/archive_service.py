@@ -0,0 +1,339 @@
+# Monthly partitions and archival of old AI requests
+import gzip
+import json
+import re
+import tempfile
+from collections import Counter
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import column, delete, exc, func, select, table, text
+
+from app.extensions import db
+from app.models.ai_request import AIRequest
+from app.models.archive import AIRequestArchive
+from app.services.storage_service import StorageService
+from app.services.usage_service import UsageService
+
+PARTITION_PATTERN = re.compile(r'^ai_requests_p(\d{4})(\d{2})$')
+# Catches rows of months without their own partition (see ensure_partitions)
+DEFAULT_PARTITION = 'ai_requests_default'
+# Table comment on a detached partition whose rows were taken out of the usage counters
+COUNTED_MARK = 'archive: counted'
+
+
+def month_start(value, offset=0):
+    """First instant of the month containing value, shifted by offset months"""
+    months = value.year * 12 + value.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(start):
+    """Name of the monthly partition starting at start, e.g. ai_requests_p202401"""
+    return f"ai_requests_p{start:%Y%m}"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+class ArchiveService:
+    """
+    Keep ai_requests bounded: on PostgreSQL the table is range-partitioned by
+    month on created_at, and months older than the retention window are
+    detached, written to archive storage and dropped. Other databases archive
+    the same months row by row.
+    """
+
+    @staticmethod
+    def retention_cutoff(now=None):
+        """
+        Oldest created_at still kept in the database, aligned to a month
+        boundary (None when retention is disabled)
+        """
+        months = current_app.config.get('AI_REQUEST_RETENTION_MONTHS', 12)
+        if months <= 0:
+            return None
+        return month_start(now or datetime.utcnow(), -months)
+
+    @staticmethod
+    def is_partitioned():
+        """Check if ai_requests is a partitioned PostgreSQL table"""
+        if db.session.get_bind().dialect.name != 'postgresql':
+            return False
+        return db.session.execute(text(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('ai_requests')"
+        )).scalar() == 'p'
+
+    @staticmethod
+    def _partitions():
+        """Names of the monthly partitions currently attached to ai_requests"""
+        return set(db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('ai_requests')"
+        )).scalars())
+
+    @staticmethod
+    def ensure_partitions(now=None, months_ahead=None, since=None):
+        """
+        Create the monthly partitions for the current month and the next
+        months_ahead months, so inserts never land in the default partition.
+        since also covers the months from since up to now (e.g. for backfills).
+        Returns: names of the partitions created
+        """
+        if not ArchiveService.is_partitioned():
+            return []
+        now = now or datetime.utcnow()
+        if months_ahead is None:
+            months_ahead = current_app.config.get('AI_REQUEST_PARTITIONS_AHEAD', 3)
+        first = month_start(since or now)
+        months = (now.year - first.year) * 12 + now.month - first.month + months_ahead
+
+        existing = ArchiveService._partitions()
+        created = []
+        for offset in range(months + 1):
+            start = month_start(first, offset)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            try:
+                db.session.execute(text(
+                    f'CREATE TABLE "{name}" PARTITION OF ai_requests '
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{month_start(start, 1):%Y-%m-%d}')"
+                ))
+                db.session.commit()
+            except exc.IntegrityError:
+                # The default partition already holds rows of this month; they
+                # have to be moved out by hand (docs/API.md), the other months go on
+                db.session.rollback()
+                current_app.logger.error(
+                    f"Cannot create {name}: {DEFAULT_PARTITION} has rows for that month"
+                )
+                continue
+            created.append(name)
+        return created
+
+    @staticmethod
+    def _export(rows, label):
+        """
+        Write rows as gzip-compressed JSON lines to the storage backend
+        Returns: (row_count, storage_path)
+        """
+        row_count = 0
+        with tempfile.TemporaryFile() as buffer:
+            with gzip.GzipFile(fileobj=buffer, mode='wb') as archive:
+                for row in rows:
+                    archive.write(json.dumps(dict(row), default=_json_default, separators=(',', ':')).encode())
+                    archive.write(b'\n')
+                    row_count += 1
+            buffer.seek(0)
+            filename = f"archive-{label}-{datetime.utcnow():%Y%m%dT%H%M%S}.jsonl.gz"
+            success, message, storage_path = StorageService.save_file(buffer.read(), filename)
+        if not success:
+            raise RuntimeError(message)
+        return row_count, storage_path
+
+    @staticmethod
+    def _partition_table(name):
+        return table(name, *(column(c.name, c.type) for c in AIRequest.__table__.columns))
+
+    @staticmethod
+    def _detach_concurrently():
+        """DETACH PARTITION ... CONCURRENTLY (PostgreSQL 14+) only blocks other queries briefly"""
+        return db.session.get_bind().dialect.server_version_info >= (14,)
+
+    @staticmethod
+    def _alter_autocommit(statement):
+        """Run a DETACH ... CONCURRENTLY or FINALIZE, which cannot run inside a transaction"""
+        with db.session.get_bind().connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql(statement)
+
+    @staticmethod
+    def _active_count(partition):
+        return db.session.execute(
+            select(func.count()).select_from(partition)
+            .where(partition.c.status.in_(AIRequest.ACTIVE_STATUSES))
+        ).scalar()
+
+    @staticmethod
+    def _record_removed(name):
+        """
+        Take a detached partition's rows out of the usage counters and mark
+        it counted, in one transaction
+        """
+        partition = ArchiveService._partition_table(name)
+        UsageService.record_requests_removed(db.session.execute(
+            select(partition.c.user_id, partition.c.status, func.count())
+            .group_by(partition.c.user_id, partition.c.status)
+        ).all())
+        db.session.execute(text(f"COMMENT ON TABLE \"{name}\" IS '{COUNTED_MARK}'"))
+        db.session.commit()
+
+    @staticmethod
+    def _archive_partition(name, start):
+        """
+        Detach one partition, archive its rows and drop it. The counters are
+        updated with (or, detaching concurrently, right after) the detach; a
+        crash after that leaves a table that the next run picks up.
+        Returns: AIRequestArchive, or None if the partition still has active requests
+        """
+        partition = ArchiveService._partition_table(name)
+        if ArchiveService._detach_concurrently():
+            # The concurrent detach commits on its own and waits for every
+            # transaction on ai_requests, ours included: skip busy months
+            # before it and end ours first
+            active = ArchiveService._active_count(partition)
+            db.session.commit()
+            if not active:
+                ArchiveService._alter_autocommit(f'ALTER TABLE ai_requests DETACH PARTITION "{name}" CONCURRENTLY')
+                # Requeued while it ran: put the month back
+                active = ArchiveService._active_count(partition)
+                if active:
+                    db.session.execute(text(
+                        f'ALTER TABLE ai_requests ATTACH PARTITION "{name}" '
+                        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{month_start(start, 1):%Y-%m-%d}')"
+                    ))
+                    db.session.commit()
+        else:
+            db.session.execute(text(f'ALTER TABLE ai_requests DETACH PARTITION "{name}"'))
+            # Checked after detaching, so no request can be requeued in between
+            active = ArchiveService._active_count(partition)
+            if active:
+                db.session.rollback()
+        if active:
+            current_app.logger.warning(f"Not archiving {name}: {active} requests are still active")
+            return None
+
+        ArchiveService._record_removed(name)
+        return ArchiveService._archive_detached(name, start)
+
+    @staticmethod
+    def _archive_detached(name, start):
+        """Archive the rows of a detached partition and drop it"""
+        partition = ArchiveService._partition_table(name)
+        rows = db.session.execute(
+            select(partition).order_by(partition.c.id).execution_options(yield_per=1000)
+        ).mappings()
+        row_count, storage_path = ArchiveService._export(rows, name)
+
+        archive = AIRequestArchive(
+            label=name, range_start=start, range_end=month_start(start, 1),
+            row_count=row_count, storage_path=storage_path
+        )
+        db.session.add(archive)
+        db.session.execute(text(f'DROP TABLE "{name}"'))
+        db.session.commit()
+        return archive
+
+    @staticmethod
+    def _archive_partitions(cutoff):
+        """Archive every month partition that ends at or before the cutoff"""
+        if ArchiveService._detach_concurrently():
+            # A concurrent detach that was interrupted leaves the partition pending
+            pending = db.session.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass('ai_requests') AND i.inhdetachpending"
+            )).scalars().all()
+            db.session.commit()
+            for name in pending:
+                ArchiveService._alter_autocommit(f'ALTER TABLE ai_requests DETACH PARTITION "{name}" FINALIZE')
+
+        # Partitions detached by an earlier run that stopped before dropping them
+        detached = dict(db.session.execute(text(
+            "SELECT relname, obj_description(oid, 'pg_class') FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition AND relname ~ '^ai_requests_p[0-9]{6}$'"
+        )).all())
+        attached = ArchiveService._partitions()
+        db.session.commit()
+
+        archives = []
+        for name in sorted(set(detached) | attached):
+            match = PARTITION_PATTERN.match(name)
+            if not match:
+                continue
+            start = datetime(int(match.group(1)), int(match.group(2)), 1)
+            if month_start(start, 1) > cutoff:
+                continue
+            if name in attached:
+                archive = ArchiveService._archive_partition(name, start)
+            else:
+                if detached[name] != COUNTED_MARK:
+                    # Stopped between detaching and updating the counters
+                    ArchiveService._record_removed(name)
+                archive = ArchiveService._archive_detached(name, start)
+            if archive is not None:
+                archives.append(archive)
+
+        # Months that had no partition of their own cannot be detached
+        if DEFAULT_PARTITION in attached:
+            archives += ArchiveService._archive_rows(cutoff, ArchiveService._partition_table(DEFAULT_PARTITION))
+        return archives
+
+    @staticmethod
+    def _archive_rows(cutoff, requests=None):
+        """
+        Archive finished requests created before the cutoff one month at a
+        time, for databases without partitioning and for the default
+        partition. Each month is exported and deleted in one transaction.
+        """
+        requests = AIRequest.__table__ if requests is None else requests
+        finished = requests.c.status.notin_(AIRequest.ACTIVE_STATUSES)
+        archives = []
+        while True:
+            oldest = db.session.execute(
+                select(func.min(requests.c.created_at))
+                .where(requests.c.created_at < cutoff, finished)
+            ).scalar()
+            if oldest is None:
+                return archives
+
+            start = month_start(oldest)
+            in_month = (requests.c.created_at >= start, requests.c.created_at < month_start(start, 1), finished)
+            try:
+                rows = db.session.execute(
+                    select(requests).where(*in_month).order_by(requests.c.id)
+                ).mappings()
+                row_count, storage_path = ArchiveService._export(rows, partition_name(start))
+
+                removed = db.session.execute(
+                    delete(requests).where(*in_month).returning(requests.c.user_id, requests.c.status)
+                ).all()
+                UsageService.record_requests_removed(
+                    (user_id, status, count)
+                    for (user_id, status), count in Counter(tuple(row) for row in removed).items()
+                )
+                archive = AIRequestArchive(
+                    label=partition_name(start), range_start=start, range_end=month_start(start, 1),
+                    row_count=row_count, storage_path=storage_path
+                )
+                db.session.add(archive)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            archives.append(archive)
+
+    @staticmethod
+    def archive_expired(now=None):
+        """
+        Move AI requests older than the retention window to archive storage
+        Returns: list of AIRequestArchive created
+        """
+        cutoff = ArchiveService.retention_cutoff(now)
+        if cutoff is None:
+            return []
+
+        if ArchiveService.is_partitioned():
+            archives = ArchiveService._archive_partitions(cutoff)
+        else:
+            archives = ArchiveService._archive_rows(cutoff)
+
+        for archive in archives:
+            current_app.logger.info(
+                f"Archived {archive.row_count} AI requests of {archive.label} to {archive.storage_path}"
+            )
+        return archives
@@ -3,6 +3,7 @@ Authentication service - Business logic
 """
 from app.models.user import User
 from app.extensions import db
+from app.services.password_service import PasswordService
 
 
 class AuthService:
@@ -17,7 +18,7 @@ class AuthService:
             raise ValueError("User already exists")
         
         user = User(username=username, email=email)
-        user.set_password(password)
+        user.password_hash = PasswordService.hash(password)
         # todo : add support for using AD
         db.session.add(user)
         db.session.commit()
@@ -25,13 +26,24 @@ class AuthService:
         return user
     
     def authenticate_user(self, email, password):
-        """Authenticate user credentials"""
+        """
+        Authenticate user credentials, upgrading the stored hash when the
+        hashing parameters have changed
+        Raises: PasswordHashingBusy when the hashing pool is saturated
+        """
         if not email or not password:
             raise ValueError("Username and password required")
         
         user = User.query.filter_by(email=email).first()
-        
-        if not user or not user.check_password(password):
+        if not user:
+            raise ValueError("Invalid credentials")
+
+        matches, new_hash = PasswordService.verify(user.password_hash, password)
+        if not matches:
             raise ValueError("Invalid credentials")
+
+        if new_hash:
+            user.password_hash = new_hash
+            db.session.commit()
         
-        return user
\ No newline at end of file
+        return user
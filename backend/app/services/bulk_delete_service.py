@@ -0,0 +1,307 @@
+# Bulk file deletion with background storage purge
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, select, update
+
+from app.extensions import db
+from app.models.ai_request import AIRequest
+from app.models.delete_job import DeleteJob, StoragePurgeTask
+from app.models.file import File
+from app.services.storage_service import StorageService
+from app.services.usage_service import UsageService
+from app.utils.db_routing import read_only
+from app.utils.metrics import STORAGE_PURGE_OBJECTS
+
+
+class BulkDeleteService:
+    """
+    Delete many files in one set-based transaction, then purge their storage
+    objects in the background, in parallel and with retry
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls):
+        """Get or create the background purge thread pool (None = run inline)"""
+        workers = current_app.config.get('STORAGE_PURGE_WORKERS', 2)
+        if workers <= 0:
+            return None
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix='storage-purge'
+                    )
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the background purge pool; unfinished tasks stay queued in the database"""
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False, cancel_futures=True)
+                cls._executor = None
+
+    @staticmethod
+    def delete_files(user_id, checksums=None):
+        """
+        Delete the user's files (all of them when checksums is None) and their
+        AI requests in one transaction, and queue the storage objects for purging
+        Returns: (success, message, job or None)
+        """
+        criteria = [File.user_id == user_id]
+        if checksums is not None:
+            criteria.append(File.checksum.in_(checksums))
+        targets = select(File.checksum).where(*criteria).scalar_subquery()
+        now = datetime.utcnow()
+
+        try:
+            job = DeleteJob(user_id=user_id, status='purging', created_at=now)
+            db.session.add(job)
+            db.session.flush()
+
+            # Files point at their latest request, so clear that before the requests go
+            db.session.execute(
+                update(File)
+                .where(*criteria, File.latest_request_id.isnot(None))
+                .values(latest_request_id=None)
+            )
+            removed_requests = db.session.execute(
+                delete(AIRequest)
+                .where(AIRequest.file_checksum.in_(targets))
+                .returning(AIRequest.user_id, AIRequest.status)
+            ).all()
+            # RETURNING gives exactly the rows removed, so the counters below
+            # cannot drift from a concurrent upload between a count and the delete
+            removed_files = db.session.execute(
+                delete(File)
+                .where(*criteria)
+                .returning(File.checksum, File.filepath, File.mime_type, File.file_size, File.is_processed)
+            ).all()
+
+            file_totals = {}
+            for row in removed_files:
+                totals = file_totals.setdefault(row.mime_type, [0, 0, 0])
+                totals[0] += 1
+                totals[1] += row.file_size
+                totals[2] += 1 if row.is_processed else 0
+            for mime_type, (count, size, processed) in file_totals.items():
+                UsageService.record_file_change(user_id, mime_type, files=-count, size=-size, processed=-processed)
+            UsageService.record_requests_removed(
+                (request_user_id, status, count)
+                for (request_user_id, status), count in Counter(
+                    (row.user_id, row.status) for row in removed_requests
+                ).items()
+            )
+
+            purge_rows = [
+                {'job_id': job.id, 'checksum': row.checksum, 'storage_path': row.filepath,
+                 'status': 'pending', 'attempts': 0, 'next_attempt_at': now}
+                for row in removed_files
+                if row.filepath
+            ]
+            if purge_rows:
+                db.session.execute(insert(StoragePurgeTask), purge_rows)
+
+            job.files_deleted = len(removed_files)
+            job.requests_deleted = len(removed_requests)
+            job.objects_total = len(purge_rows)
+            if not purge_rows:
+                job.status = 'completed'
+                job.completed_at = now
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Failed to delete files: {str(e)}", None
+
+        if purge_rows:
+            BulkDeleteService.start_purge(job.id)
+        return True, f"{job.files_deleted} files deleted", job
+
+    @classmethod
+    def start_purge(cls, job_id):
+        """Purge a job's storage objects in the background (inline when no pool is configured)"""
+        executor = cls.get_executor()
+        if executor is None:
+            # Inline runs never wait for retries; the purge worker picks those up
+            cls._run_safely(current_app._get_current_object(), job_id, wait=False)
+            return
+        executor.submit(cls._run_safely, current_app._get_current_object(), job_id)
+
+    @classmethod
+    def _run_safely(cls, app, job_id, wait=True):
+        with app.app_context():
+            try:
+                cls.run_job(job_id, wait=wait)
+            except Exception as e:
+                db.session.rollback()
+                # Tasks stay queued; their lease expires and the purge worker retries them
+                app.logger.error(f"Storage purge for delete job {job_id} failed: {str(e)}")
+
+    @staticmethod
+    def run_job(job_id, wait=True):
+        """
+        Purge a job's due objects batch by batch. With wait=True, sleep until
+        scheduled retries are due and keep going until none are pending.
+        """
+        while True:
+            if sum(BulkDeleteService.process_due(job_id=job_id)):
+                continue
+            if not wait:
+                return
+            next_due = db.session.execute(
+                select(func.min(StoragePurgeTask.next_attempt_at))
+                .where(StoragePurgeTask.job_id == job_id, StoragePurgeTask.status == 'pending')
+            ).scalar()
+            db.session.commit()
+            if next_due is None:
+                return
+            time.sleep(min(
+                max((next_due - datetime.utcnow()).total_seconds(), 0),
+                current_app.config.get('STORAGE_PURGE_BACKOFF_MAX', 300)
+            ))
+
+    @staticmethod
+    def _claim(limit, job_id=None, now=None):
+        """
+        Lease due tasks to this worker. The conditional update makes each
+        claim exclusive; a crashed worker's tasks become due again when the
+        lease runs out.
+        Returns: claimed task rows
+        """
+        now = now or datetime.utcnow()
+        criteria = [StoragePurgeTask.status == 'pending', StoragePurgeTask.next_attempt_at <= now]
+        if job_id is not None:
+            criteria.append(StoragePurgeTask.job_id == job_id)
+        due_ids = select(StoragePurgeTask.id)\
+            .where(*criteria)\
+            .order_by(StoragePurgeTask.next_attempt_at)\
+            .limit(limit)
+        lease = timedelta(seconds=current_app.config.get('STORAGE_PURGE_LEASE_SECONDS', 300))
+
+        tasks = db.session.execute(
+            update(StoragePurgeTask)
+            .where(StoragePurgeTask.id.in_(due_ids.scalar_subquery()), *criteria)
+            .values(attempts=StoragePurgeTask.attempts + 1, next_attempt_at=now + lease)
+            .returning(StoragePurgeTask.id, StoragePurgeTask.job_id, StoragePurgeTask.checksum,
+                       StoragePurgeTask.storage_path, StoragePurgeTask.attempts)
+        ).all()
+        db.session.commit()
+        return tasks
+
+    @staticmethod
+    def _delete_objects(tasks):
+        """
+        Delete storage objects in parallel; an object that is already gone counts as deleted
+        Returns: list of (task, error or None)
+        """
+        backend = StorageService.get_backend()
+
+        def _delete(task):
+            try:
+                success, message = backend.delete(task.storage_path)
+                if success or not backend.exists(task.storage_path):
+                    return task, None
+                return task, message
+            except Exception as e:
+                return task, str(e)
+
+        concurrency = current_app.config.get('STORAGE_PURGE_CONCURRENCY', 8)
+        with ThreadPoolExecutor(max_workers=max(min(concurrency, len(tasks)), 1)) as executor:
+            return list(executor.map(_delete, tasks))
+
+    @staticmethod
+    def process_due(limit=None, job_id=None, now=None):
+        """
+        Claim one batch of due purge tasks (of one job, or of all jobs) and delete their objects
+        Returns: (purged, failed, retrying)
+        """
+        limit = limit or current_app.config.get('STORAGE_PURGE_BATCH_SIZE', 100)
+        tasks = BulkDeleteService._claim(limit, job_id, now)
+        if not tasks:
+            return 0, 0, 0
+
+        # The same content may have been uploaded again since the delete, in
+        # which case the object now belongs to the new file and must stay
+        reused = set(db.session.execute(
+            select(File.checksum).where(File.checksum.in_({task.checksum for task in tasks}))
+        ).scalars())
+        results = [(task, None) for task in tasks if task.checksum in reused]
+        results += BulkDeleteService._delete_objects([task for task in tasks if task.checksum not in reused])
+
+        max_attempts = current_app.config.get('STORAGE_PURGE_MAX_ATTEMPTS', 5)
+        backoff_base = current_app.config.get('STORAGE_PURGE_BACKOFF_BASE', 2)
+        backoff_max = current_app.config.get('STORAGE_PURGE_BACKOFF_MAX', 300)
+        finished_at = datetime.utcnow()
+        purged, failed = Counter(), Counter()
+        retrying = 0
+
+        for task, error in results:
+            if error is None:
+                values = {'status': 'done', 'last_error': None}
+            elif task.attempts >= max_attempts:
+                values = {'status': 'failed', 'last_error': error}
+            else:
+                delay = min(backoff_base * 2 ** (task.attempts - 1), backoff_max)
+                values = {'next_attempt_at': finished_at + timedelta(seconds=delay), 'last_error': error}
+
+            # Matching on attempts ignores results of a claim whose lease already
+            # expired and was taken over, so no object is counted twice
+            updated = db.session.execute(
+                update(StoragePurgeTask)
+                .where(StoragePurgeTask.id == task.id,
+                       StoragePurgeTask.status == 'pending',
+                       StoragePurgeTask.attempts == task.attempts)
+                .values(**values)
+            ).rowcount
+            if not updated:
+                continue
+            if error is None:
+                purged[task.job_id] += 1
+            elif 'status' in values:
+                failed[task.job_id] += 1
+            else:
+                retrying += 1
+
+        job_ids = set(purged) | set(failed)
+        for changed_job_id in job_ids:
+            db.session.execute(
+                update(DeleteJob)
+                .where(DeleteJob.id == changed_job_id)
+                .values(objects_purged=DeleteJob.objects_purged + purged[changed_job_id],
+                        objects_failed=DeleteJob.objects_failed + failed[changed_job_id])
+            )
+        if job_ids:
+            db.session.execute(
+                update(DeleteJob)
+                .where(DeleteJob.id.in_(job_ids),
+                       DeleteJob.status == 'purging',
+                       DeleteJob.objects_purged + DeleteJob.objects_failed >= DeleteJob.objects_total)
+                .values(status=case((DeleteJob.objects_failed > 0, 'completed_with_errors'),
+                                    else_='completed'),
+                        completed_at=finished_at)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+        STORAGE_PURGE_OBJECTS.labels(result='purged').inc(sum(purged.values()))
+        STORAGE_PURGE_OBJECTS.labels(result='failed').inc(sum(failed.values()))
+        STORAGE_PURGE_OBJECTS.labels(result='retrying').inc(retrying)
+        if failed:
+            current_app.logger.warning(
+                f"Storage purge gave up on {sum(failed.values())} objects after {max_attempts} attempts"
+            )
+        return sum(purged.values()), sum(failed.values()), retrying
+
+    @staticmethod
+    @read_only
+    def get_job(job_id, user_id):
+        """Get a user's delete job"""
+        return DeleteJob.query.filter_by(id=job_id, user_id=user_id).first()
@@ -0,0 +1,199 @@
+# Local text extraction service
+import csv
+import io
+import multiprocessing
+import signal
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from xml.etree import ElementTree
+
+from flask import current_app
+
+
+DOCX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def _extract_txt(data):
+    return data.decode('utf-8', errors='replace')
+
+
+def _extract_csv(data):
+    reader = csv.reader(io.StringIO(data.decode('utf-8', errors='replace')))
+    return '\n'.join('\t'.join(row) for row in reader)
+
+
+def _extract_pdf(data):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    reader = PdfReader(io.BytesIO(data))
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def _extract_docx(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+    paragraphs = []
+    for paragraph in root.iter(f'{WORD_NAMESPACE}p'):
+        paragraphs.append(''.join(node.text or '' for node in paragraph.iter(f'{WORD_NAMESPACE}t')))
+    return '\n'.join(paragraphs)
+
+
+EXTRACTORS = {
+    'text/plain': _extract_txt,
+    'text/csv': _extract_csv,
+    'application/pdf': _extract_pdf,
+    DOCX_MIME_TYPE: _extract_docx,
+}
+
+
+def extract_text(mime_type, data):
+    """
+    Extract plain text from file content.
+    Runs inside extraction worker processes, so it must stay picklable and
+    free of Flask state.
+    Returns: text, or None when the type is unsupported or unreadable
+    """
+    extractor = EXTRACTORS.get(mime_type)
+    if extractor is None:
+        return None
+    return extractor(data)
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker process when an extraction overruns its deadline"""
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout("Text extraction timed out")
+
+
+def extract_text_with_deadline(mime_type, data, timeout):
+    """
+    extract_text() for the worker processes: a parser stuck on a malformed
+    document is interrupted after timeout seconds, freeing the worker
+    """
+    if not hasattr(signal, 'setitimer'):
+        return extract_text(mime_type, data)
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_text(mime_type, data)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class TextExtractionService:
+    """Extract text locally before AI processing, with a per-checksum cache"""
+
+    _executor = None
+    _executor_lock = threading.Lock()
+    # checksum -> extracted text (None when it could not be extracted)
+    _cache = OrderedDict()
+    _cache_size = 0
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def supports(mime_type):
+        """Check if text can be extracted locally for this MIME type"""
+        return mime_type in EXTRACTORS
+
+    @classmethod
+    def get_executor(cls):
+        """Get or create the extraction process pool (None = run inline)"""
+        workers = current_app.config.get('TEXT_EXTRACTION_WORKERS', 2)
+        if workers <= 0:
+            return None
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    # spawn keeps workers independent of the parent's threads and DB sockets
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the extraction process pool"""
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False, cancel_futures=True)
+                cls._executor = None
+
+    @classmethod
+    def _recycle(cls, executor):
+        """
+        Replace a pool whose worker is stuck: new extractions go to a fresh
+        pool while the old one finishes its queue and exits
+        """
+        with cls._executor_lock:
+            if cls._executor is executor:
+                cls._executor = None
+        executor.shutdown(wait=False)
+
+    @classmethod
+    def get_text(cls, file_record, file_content):
+        """
+        Get extracted text for a file, using the cache when possible
+        Returns: text, or None if it cannot be extracted locally
+        """
+        if not cls.supports(file_record.mime_type):
+            return None
+
+        with cls._cache_lock:
+            if file_record.checksum in cls._cache:
+                cls._cache.move_to_end(file_record.checksum)
+                return cls._cache[file_record.checksum]
+
+        timeout = current_app.config.get('TEXT_EXTRACTION_TIMEOUT', 30)
+        try:
+            executor = cls.get_executor()
+            if executor is None:
+                text = extract_text(file_record.mime_type, file_content)
+            else:
+                future = executor.submit(extract_text_with_deadline, file_record.mime_type, file_content, timeout)
+                try:
+                    text = future.result(timeout=timeout)
+                except TimeoutError:
+                    # Still queued: drop it. Already running: its worker may be stuck
+                    if not future.cancel():
+                        cls._recycle(executor)
+                    raise
+        except Exception as e:
+            current_app.logger.warning(
+                f"Text extraction failed for {file_record.checksum}: {str(e)}"
+            )
+            return None
+
+        cls._cache_put(file_record.checksum, text)
+        return text
+
+    @classmethod
+    def _cache_put(cls, checksum, text):
+        """Store text in the LRU cache, evicting until under the size budget"""
+        max_chars = current_app.config.get('TEXT_EXTRACTION_CACHE_CHARS', 64 * 1024 * 1024)
+        size = len(text) if text else 0
+        if size > max_chars:
+            return
+        with cls._cache_lock:
+            if checksum in cls._cache:
+                return
+            cls._cache[checksum] = text
+            cls._cache_size += size
+            while cls._cache_size > max_chars:
+                _, evicted = cls._cache.popitem(last=False)
+                cls._cache_size -= len(evicted) if evicted else 0
+
+    @classmethod
+    def clear_cache(cls):
+        """Drop all cached text"""
+        with cls._cache_lock:
+            cls._cache.clear()
+            cls._cache_size = 0
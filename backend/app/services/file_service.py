@@ -2,13 +2,29 @@
 import os
 import hashlib
 import mimetypes
+from collections import namedtuple
 from werkzeug.utils import secure_filename
 from datetime import datetime
 from flask import current_app
+from sqlalchemy import select
 
 from app.extensions import db
+from app.models.ai_request import AIRequest
 from app.models.file import File
 from app.services.storage_service import StorageService
+from app.services.usage_service import UsageService
+from app.utils.db_routing import read_only, replica_reads
+from app.utils.fields import projection
+from app.utils.pagination import paginate_keyset
+
+# Columns that move whenever a file or its latest AI request changes, used as
+# HTTP validators (ETags). A request's response and error message only change
+# along with its status or attempts.
+FILE_VALIDATOR_COLUMNS = ('user_id', 'uploaded_at', 'is_processed', 'processed_at', 'latest_request_id')
+REQUEST_VALIDATOR_COLUMNS = ('status', 'attempts', 'max_attempts', 'chunks_total', 'chunks_completed',
+                             'next_attempt_at', 'completed_at')
+FileValidator = namedtuple('FileValidator', FILE_VALIDATOR_COLUMNS)
+StatusValidator = namedtuple('StatusValidator', FILE_VALIDATOR_COLUMNS + REQUEST_VALIDATOR_COLUMNS)
 
 
 class FileService:
@@ -108,6 +124,7 @@ class FileService:
 
         try:
             db.session.add(file_record)
+            UsageService.record_file_change(user_id, mime_type, files=1, size=len(file_data))
             db.session.commit()
 
             storage_type = os.getenv('STORAGE_TYPE', 'local')
@@ -123,17 +140,100 @@ class FileService:
             return False, f"Failed to save file metadata: {str(e)}", None
 
     @staticmethod
-    def get_file_by_checksum(checksum):
-        """Get file by checksum"""
-        return File.query.filter_by(checksum=checksum).first()
+    def get_file_by_checksum(checksum, fields=None):
+        """Get file by checksum, loading only the columns behind fields if given"""
+        query = File.query.filter_by(checksum=checksum)
+        if fields:
+            query = query.options(projection(File, fields, 'checksum', *FILE_VALIDATOR_COLUMNS))
+        return query.first()
+
+    @staticmethod
+    @read_only
+    def get_file_with_latest_request(checksum):
+        """
+        Get a file and its most recent AI request in one query
+        Returns: (file_record, ai_request) - either may be None
+        """
+        row = db.session.query(File, AIRequest)\
+            .outerjoin(AIRequest, AIRequest.id == File.latest_request_id)\
+            .filter(File.checksum == checksum)\
+            .first()
+        return (row[0], row[1]) if row else (None, None)
+
+    @staticmethod
+    @read_only
+    def get_file_validator(checksum, with_request=False):
+        """
+        Fetch only the columns that change when a file (and, with_request, its
+        latest AI request) changes, for building an ETag without loading
+        processing results or responses
+        Returns: FileValidator / StatusValidator, or None
+        """
+        columns = [getattr(File, name) for name in FILE_VALIDATOR_COLUMNS]
+        query = select(*columns).where(File.checksum == checksum)
+        if with_request:
+            query = query.add_columns(*(getattr(AIRequest, name) for name in REQUEST_VALIDATOR_COLUMNS))\
+                .outerjoin(AIRequest, AIRequest.id == File.latest_request_id)
+        row = db.session.execute(query).first()
+        if row is None:
+            return None
+        return StatusValidator(*row) if with_request else FileValidator(*row)
 
     @staticmethod
-    def get_user_files(user_id, page=1, per_page=20):
+    def file_validator(file_record, ai_request=None, with_request=False):
+        """The same validator as get_file_validator, from already loaded rows"""
+        if file_record is None:
+            return None
+        values = [getattr(file_record, name) for name in FILE_VALIDATOR_COLUMNS]
+        if not with_request:
+            return FileValidator(*values)
+        values += [getattr(ai_request, name) if ai_request else None for name in REQUEST_VALIDATOR_COLUMNS]
+        return StatusValidator(*values)
+
+    @staticmethod
+    @read_only
+    def get_user_files(user_id, page=1, per_page=20, fields=None):
         """Get all files for a user with pagination"""
-        return File.query.filter_by(user_id=user_id)\
+        query = File.query.filter_by(user_id=user_id)
+        if fields:
+            query = query.options(projection(File, fields, 'checksum'))
+        return query\
             .order_by(File.uploaded_at.desc())\
             .paginate(page=page, per_page=per_page, error_out=False)
 
+    @staticmethod
+    def iter_user_files(user_id, fields=None, batch_size=1000):
+        """
+        Yield all of a user's files, newest first, batch_size rows at a time
+        (a server-side cursor on PostgreSQL) so the whole set is never loaded
+        at once. Reads go to a replica when possible.
+        """
+        query = File.query.filter_by(user_id=user_id)
+        if fields:
+            query = query.options(projection(File, fields, 'uploaded_at', 'checksum'))
+        query = query.order_by(File.uploaded_at.desc(), File.checksum.desc())
+        with replica_reads():
+            yield from query.yield_per(batch_size)
+
+    @staticmethod
+    @read_only
+    def get_user_files_page(user_id, cursor=None, per_page=20, total='none', fields=None):
+        """
+        Get one page of a user's files, newest first, after the given cursor,
+        loading only the columns behind fields if given
+        Returns: KeysetPage
+        """
+        query = File.query.filter_by(user_id=user_id)
+        if fields:
+            query = query.options(projection(File, fields, 'uploaded_at', 'checksum'))
+        return paginate_keyset(
+            query,
+            (File.uploaded_at, File.checksum),
+            cursor=cursor,
+            limit=per_page,
+            total=total
+        )
+
     @staticmethod
     def delete_file(checksum, user_id):
         """Delete a file from storage and database"""
@@ -150,6 +250,10 @@ class FileService:
 
         # Delete from database
         try:
+            UsageService.record_file_change(
+                file_record.user_id, file_record.mime_type,
+                files=-1, size=-file_record.file_size, processed=-1 if file_record.is_processed else 0
+            )
             db.session.delete(file_record)
             db.session.commit()
             return True, "File deleted successfully"
@@ -174,6 +278,10 @@ class FileService:
             return False, "File not found"
 
         try:
+            if not file_record.is_processed:
+                UsageService.record_file_change(file_record.user_id, file_record.mime_type, processed=1)
+            else:
+                UsageService.record_file_list_change([file_record.user_id])
             file_record.is_processed = True
             file_record.processed_at = datetime.utcnow()
             file_record.processing_result = processing_result
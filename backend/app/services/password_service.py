@@ -0,0 +1,132 @@
+# Password hashing and verification off the request thread
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.utils.metrics import PASSWORD_HASH_REJECTED
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool is saturated; the client should retry shortly"""
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    """Normalised parameter string werkzeug stores for a method, e.g. scrypt:32768:8:1"""
+    return generate_password_hash('', method, 1).split('$', 1)[0]
+
+
+def needs_rehash(pwhash: str, method: str, salt_length: int) -> bool:
+    """Check if a stored hash was made with other parameters than the configured ones"""
+    stored_method, _, rest = pwhash.partition('$')
+    salt = rest.split('$', 1)[0]
+    return stored_method != _method_prefix(method) or len(salt) != salt_length
+
+
+def hash_password(password: str, method: str, salt_length: int) -> str:
+    """Hash a password. Runs inside hashing worker processes."""
+    return generate_password_hash(password, method, salt_length)
+
+
+def verify_password(pwhash: str, password: str, method: str,
+                    salt_length: int) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when it matches a hash with outdated parameters,
+    hash it again with the current ones. Runs inside hashing worker processes.
+    Returns: (matches, new hash or None)
+    """
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if needs_rehash(pwhash, method, salt_length):
+        return True, hash_password(password, method, salt_length)
+    return True, None
+
+
+class PasswordService:
+    """
+    Run the deliberately slow password hash in a bounded process pool so a
+    login spike cannot pin the web workers' CPU. At most
+    PASSWORD_HASH_MAX_PENDING hashes are queued or running per process;
+    beyond that callers are turned away at once with PasswordHashingBusy.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _executor_lock = threading.Lock()
+    _slots: Optional[threading.BoundedSemaphore] = None
+
+    @classmethod
+    def get_executor(cls) -> Optional[ProcessPoolExecutor]:
+        """Get or create the hashing process pool (None = hash inline)"""
+        workers = current_app.config.get('PASSWORD_HASH_WORKERS', 2)
+        if workers <= 0:
+            return None
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    pending = current_app.config.get('PASSWORD_HASH_MAX_PENDING') or workers * 4
+                    cls._slots = threading.BoundedSemaphore(pending)
+                    # spawn keeps workers independent of the parent's threads and DB sockets
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the hashing process pool"""
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False, cancel_futures=True)
+                cls._executor = None
+                cls._slots = None
+
+    @classmethod
+    def _run(cls, fn, *args):
+        executor = cls.get_executor()
+        if executor is None:
+            return fn(*args)
+
+        slots = cls._slots
+        if not slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.labels(reason='saturated').inc()
+            raise PasswordHashingBusy("Too many sign-ins in progress, please retry shortly")
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=current_app.config.get('PASSWORD_HASH_TIMEOUT', 10))
+        except TimeoutError:
+            future.cancel()
+            PASSWORD_HASH_REJECTED.labels(reason='timeout').inc()
+            raise PasswordHashingBusy("Sign-in is taking too long, please retry shortly")
+
+    @staticmethod
+    def _params():
+        return (current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+                current_app.config.get('PASSWORD_HASH_SALT_LENGTH', 16))
+
+    @classmethod
+    def hash(cls, password: str) -> str:
+        """
+        Hash a password with the configured parameters
+        Raises: PasswordHashingBusy when the pool is saturated
+        """
+        return cls._run(hash_password, password, *cls._params())
+
+    @classmethod
+    def verify(cls, pwhash: str, password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against a stored hash
+        Returns: (matches, replacement hash when the parameters changed, else None)
+        Raises: PasswordHashingBusy when the pool is saturated
+        """
+        return cls._run(verify_password, pwhash, password, *cls._params())
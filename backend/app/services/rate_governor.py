@@ -0,0 +1,150 @@
+# Outbound rate governor for AI API calls
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+
+class RateGovernorTimeout(Exception):
+    """Raised when a slot could not be obtained in time"""
+
+
+class RateGovernor:
+    """
+    Process-wide limiter for outbound calls: a token bucket caps the request
+    rate and a semaphore caps the number of calls in flight.
+    A rate or concurrency of 0 disables that limit.
+    """
+
+    def __init__(self, rate: float = 0, burst: Optional[float] = None, max_concurrency: int = 0):
+        self.rate = rate
+        self.capacity = burst if burst else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        # Coroutines waiting in aslot() for a slot, woken on release
+        self._async_waiters = deque()
+
+    def _take_token(self) -> float:
+        """Take a token if available; return seconds to wait otherwise"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """Block until a call is allowed, then hold a concurrency slot"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        if self._semaphore is not None:
+            acquired = self._semaphore.acquire(timeout=timeout) if timeout is not None \
+                else self._semaphore.acquire()
+            if not acquired:
+                raise RateGovernorTimeout("Timed out waiting for an AI API slot")
+
+        try:
+            if self.rate > 0:
+                while True:
+                    wait = self._take_token()
+                    if wait == 0:
+                        break
+                    if deadline is not None and time.monotonic() + wait > deadline:
+                        raise RateGovernorTimeout("Timed out waiting for AI API rate budget")
+                    time.sleep(wait)
+            yield
+        finally:
+            if self._semaphore is not None:
+                self._release()
+
+    def _release(self):
+        """Free a concurrency slot and wake one coroutine waiting for it"""
+        self._semaphore.release()
+        self._wake_async_waiter()
+
+    def _wake_async_waiter(self):
+        with self._lock:
+            while self._async_waiters:
+                loop, waiter = self._async_waiters.popleft()
+                if not waiter.done():
+                    try:
+                        loop.call_soon_threadsafe(_resolve, waiter)
+                        return
+                    except RuntimeError:
+                        # Its loop is closed; try the next one
+                        continue
+
+    async def _acquire_async(self, timeout):
+        """
+        Take a concurrency slot without blocking a thread: coroutines queue
+        for a wakeup from _release() while sync callers block in slot()
+        Returns: False when timeout expired first
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._semaphore.acquire(blocking=False):
+            entry = (loop, loop.create_future())
+            with self._lock:
+                self._async_waiters.append(entry)
+            # Whether a wakeup sent to this waiter was used to try for the slot
+            used = False
+            try:
+                # A slot freed before the waiter was queued would never wake it
+                if self._semaphore.acquire(blocking=False):
+                    used = True
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(entry[1], remaining)
+                except asyncio.TimeoutError:
+                    return False
+                used = True
+            finally:
+                with self._lock:
+                    try:
+                        self._async_waiters.remove(entry)
+                        woken = False
+                    except ValueError:
+                        woken = True
+                if woken and not used:
+                    # Giving up with a wakeup on its way: pass it to the next waiter
+                    self._wake_async_waiter()
+        return True
+
+    @asynccontextmanager
+    async def aslot(self, timeout: Optional[float] = None):
+        """slot() for coroutines: waits without blocking the event loop, same limits"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        if self._semaphore is not None:
+            acquired = await self._acquire_async(timeout)
+            if not acquired:
+                raise RateGovernorTimeout("Timed out waiting for an AI API slot")
+
+        try:
+            if self.rate > 0:
+                while True:
+                    wait = self._take_token()
+                    if wait == 0:
+                        break
+                    if deadline is not None and time.monotonic() + wait > deadline:
+                        raise RateGovernorTimeout("Timed out waiting for AI API rate budget")
+                    await asyncio.sleep(wait)
+            yield
+        finally:
+            if self._semaphore is not None:
+                self._release()
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
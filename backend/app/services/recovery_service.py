@@ -0,0 +1,170 @@
+# Crash recovery and retry scheduling for AI requests
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.ai_request import AIRequest
+from app.models.file import File
+from app.services.ai_service import AIService
+from app.services.usage_service import UsageService
+
+
+class RecoveryService:
+    """Reap abandoned AI requests, run scheduled retries and requeue dead letters"""
+
+    @staticmethod
+    def _batched_transition(expected, new, criteria, values, batch_size):
+        """
+        Transition rows matching criteria in id batches, one commit per batch,
+        so a large backlog never holds one long transaction
+        Returns: number of rows updated
+        """
+        total = 0
+        while True:
+            batch_ids = select(AIRequest.id)\
+                .where(AIRequest.status == expected, *criteria)\
+                .limit(batch_size)
+            user_ids = db.session.execute(AIRequest.transition_statement(
+                expected, new, AIRequest.id.in_(batch_ids.scalar_subquery()), *criteria, **values
+            )).scalars().all()
+            UsageService.record_status_change(user_ids, expected, new)
+            db.session.commit()
+            total += len(user_ids)
+            if len(user_ids) < batch_size:
+                return total
+
+    @staticmethod
+    def reap_expired_leases(now=None, batch_size=None):
+        """
+        Find 'processing' requests whose lease has expired (their worker died)
+        and reschedule them, or dead-letter them when out of attempts
+        Returns: (rescheduled, dead_lettered)
+        """
+        now = now or datetime.utcnow()
+        batch_size = batch_size or current_app.config.get('AI_RECOVERY_BATCH_SIZE', 5000)
+        expired = (AIRequest.lease_expires_at < now,)
+
+        dead_lettered = RecoveryService._batched_transition(
+            'processing', 'dead_letter',
+            expired + (AIRequest.attempts >= AIRequest.max_attempts,),
+            {
+                'error_message': 'Lease expired',
+                'completed_at': now,
+                'lease_expires_at': None
+            },
+            batch_size
+        )
+        rescheduled = RecoveryService._batched_transition(
+            'processing', 'retrying',
+            expired + (AIRequest.attempts < AIRequest.max_attempts,),
+            {
+                'error_message': 'Lease expired',
+                'next_attempt_at': now,
+                'lease_expires_at': None
+            },
+            batch_size
+        )
+
+        if rescheduled or dead_lettered:
+            current_app.logger.warning(
+                f"Reaped expired AI request leases: {rescheduled} rescheduled, "
+                f"{dead_lettered} dead-lettered"
+            )
+        return rescheduled, dead_lettered
+
+    @staticmethod
+    def claim_due_retries(limit=100, now=None):
+        """
+        Lease due 'retrying' requests to this worker. Each claim is a
+        conditional update, so concurrent schedulers never run the same attempt.
+        Returns: list of claimed request ids
+        """
+        now = now or datetime.utcnow()
+        due_ids = db.session.execute(
+            select(AIRequest.id)
+            .where(AIRequest.status == 'retrying', AIRequest.next_attempt_at <= now)
+            .order_by(AIRequest.next_attempt_at)
+            .limit(limit)
+        ).scalars().all()
+
+        claimed = []
+        for request_id in due_ids:
+            if AIService.transition(
+                request_id, 'retrying', 'processing', commit=False,
+                attempts=AIRequest.attempts + 1,
+                lease_expires_at=AIService._lease_deadline(now),
+                next_attempt_at=None
+            ):
+                claimed.append(request_id)
+        db.session.commit()
+        return claimed
+
+    @staticmethod
+    def process_due_retries(limit=100, now=None):
+        """
+        Claim and run due retries
+        Returns: (succeeded, failed)
+        """
+        succeeded = failed = 0
+        for request_id in RecoveryService.claim_due_retries(limit, now):
+            ai_request = db.session.get(AIRequest, request_id)
+            file_record = db.session.get(File, ai_request.file_checksum)
+
+            if file_record is None:
+                AIService.transition(request_id, 'processing', 'failed',
+                                     error_message="File not found")
+                failed += 1
+                continue
+
+            if file_record.is_processed:
+                AIService.transition(request_id, 'processing', 'completed',
+                                     response=file_record.processing_result)
+                succeeded += 1
+                continue
+
+            success, _, _ = AIService.run_request(ai_request, file_record)
+            if success:
+                succeeded += 1
+            else:
+                failed += 1
+        return succeeded, failed
+
+    @staticmethod
+    def requeue_dead_letters(request_ids=None, limit=None):
+        """
+        Move dead-lettered requests back to the retry queue with a fresh attempt
+        budget; request_ids=None means all of them, an empty list none
+        Returns: number of requests requeued
+        """
+        criteria = []
+        if request_ids is not None:
+            if not request_ids:
+                return 0
+            criteria.append(AIRequest.id.in_(request_ids))
+        if limit:
+            ids = select(AIRequest.id)\
+                .where(AIRequest.status == 'dead_letter', *criteria)\
+                .order_by(AIRequest.id)\
+                .limit(limit)
+            criteria.append(AIRequest.id.in_(ids.scalar_subquery()))
+
+        user_ids = db.session.execute(AIRequest.transition_statement(
+            'dead_letter', 'retrying', *criteria,
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+            error_message=None,
+            completed_at=None
+        )).scalars().all()
+        UsageService.record_status_change(user_ids, 'dead_letter', 'retrying')
+        db.session.commit()
+        return len(user_ids)
+
+    @staticmethod
+    def get_dead_letters(limit=100):
+        """Get the oldest dead-lettered requests"""
+        return AIRequest.query.filter_by(status='dead_letter')\
+            .order_by(AIRequest.id)\
+            .limit(limit)\
+            .all()
@@ -0,0 +1,100 @@
+# Full-text search over a user's files
+import re
+
+from sqlalchemy import Float, cast, column, func, literal_column, table, tuple_
+
+from app.extensions import db
+from app.models.file import File
+from app.utils.db_routing import read_only
+from app.utils.fields import projection
+from app.utils.pagination import KeysetPage, decode_cursor, encode_cursor
+
+# Letters and digits only, matching how both indexes split words
+TERM_PATTERN = re.compile(r'[^\W_]+')
+
+# FTS5 bm25() column weights: user_id, original_filename, processing_result
+SQLITE_WEIGHTS = (0.0, 2.5, 1.0)
+
+files_fts = table('files_fts', column('rowid'), column('files_fts'))
+
+
+class SearchService:
+    """
+    Ranked prefix search over filenames and AI processing results, backed by
+    a tsvector GIN index on PostgreSQL and an FTS5 table on SQLite (see
+    app/models/file.py). Every query term must match, each as a word prefix.
+    """
+
+    MAX_TERMS = 8
+
+    @staticmethod
+    def parse_terms(q):
+        """
+        Split a search string into lowercase word prefixes
+        Raises: ValueError when there is nothing to search for
+        """
+        terms = list(dict.fromkeys(TERM_PATTERN.findall((q or '').lower())))
+        if not terms:
+            raise ValueError("Search query must contain letters or digits")
+        return terms[:SearchService.MAX_TERMS]
+
+    @staticmethod
+    def _postgres_query(user_id, terms):
+        search_vector = literal_column('files.search_vector')
+        tsquery = func.to_tsquery('simple', ' & '.join(f"{term}:*" for term in terms))
+        # Filename matches (weight A) outrank result matches (weight B). Cast
+        # to double so the cursor round-trips the exact rank.
+        rank = cast(func.ts_rank(search_vector, tsquery), Float)
+        query = db.session.query(File, rank.label('rank')).filter(
+            File.user_id == user_id,
+            search_vector.op('@@')(tsquery)
+        )
+        return query, rank
+
+    @staticmethod
+    def _sqlite_query(user_id, terms):
+        prefixes = ' AND '.join(f'"{term}"*' for term in terms)
+        match = f'user_id: "{int(user_id)}" AND {{original_filename processing_result}}: ({prefixes})'
+        # bm25() is lower for better matches
+        rank = -func.bm25(literal_column('files_fts'), *SQLITE_WEIGHTS)
+        query = db.session.query(File, rank.label('rank')).join(
+            files_fts, files_fts.c.rowid == literal_column('files.rowid')
+        ).filter(
+            files_fts.c.files_fts.op('MATCH')(match),
+            File.user_id == user_id
+        )
+        return query, rank
+
+    @staticmethod
+    @read_only
+    def search_files(user_id, q, cursor=None, per_page=20, fields=None):
+        """
+        Search a user's files, best match first, one keyset page at a time
+        on (rank, checksum). Only the columns behind fields are loaded if given.
+        Returns: KeysetPage whose items are (file, rank) pairs
+        Raises: ValueError for an empty query or a malformed cursor
+        """
+        terms = SearchService.parse_terms(q)
+        dialect = db.session.get_bind(clause=File.__table__.select()).dialect.name
+        builders = {
+            'postgresql': SearchService._postgres_query,
+            'sqlite': SearchService._sqlite_query,
+        }
+        if dialect not in builders:
+            raise RuntimeError(f"Full-text search is not supported on {dialect}")
+        query, rank = builders[dialect](user_id, terms)
+
+        if fields:
+            query = query.options(projection(File, fields, 'checksum'))
+        columns = (rank, File.checksum)
+        if cursor:
+            query = query.filter(tuple_(*columns) < tuple_(*decode_cursor(cursor, columns)))
+        rows = query.order_by(rank.desc(), File.checksum.desc()).limit(per_page + 1).all()
+
+        has_more = len(rows) > per_page
+        rows = [(file, rank_value) for file, rank_value in rows[:per_page]]
+        next_cursor = None
+        if has_more:
+            last_file, last_rank = rows[-1]
+            next_cursor = encode_cursor([last_rank, last_file.checksum])
+        return KeysetPage(rows, next_cursor, has_more, None, False)
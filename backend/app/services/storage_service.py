@@ -1,9 +1,13 @@
 # Storage abstraction service for local and cloud storage
+import asyncio
 import os
 from abc import ABC, abstractmethod
+from concurrent.futures import TimeoutError
 from typing import Tuple, Optional
 from flask import current_app
 
+from app.utils import aio
+
 
 class StorageBackend(ABC):
     """Abstract base class for storage backends"""
@@ -34,11 +38,25 @@ class StorageBackend(ABC):
         """Check if file exists in storage"""
         pass
 
+    # Coroutine versions for the ASGI mode (ASYNC_IO). By default the blocking
+    # call runs in a worker thread, which is also how local files are read
+    # and written without blocking the event loop.
+
+    async def save_async(self, file_data: bytes, filename: str) -> Tuple[bool, str, Optional[str]]:
+        return await asyncio.to_thread(self.save, file_data, filename)
+
+    async def delete_async(self, storage_path: str) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.delete, storage_path)
+
+    async def exists_async(self, storage_path: str) -> bool:
+        return await asyncio.to_thread(self.exists, storage_path)
+
 
 class LocalStorageBackend(StorageBackend):
     """Local filesystem storage backend"""
 
     def __init__(self, base_path: str = None):
+        base_path = base_path or os.getenv('LOCAL_STORAGE_PATH')
         if base_path:
             self.base_path = base_path
         else:
@@ -121,18 +139,17 @@ class AzureBlobStorageBackend(StorageBackend):
         except Exception as e:
             return False, f"Failed to upload to Azure Blob Storage: {str(e)}", None
 
+    @staticmethod
+    def _blob_name(storage_path: str) -> str:
+        """Extract blob name from URL or use as-is"""
+        return storage_path.split('/')[-1] if storage_path.startswith('http') else storage_path
+
     def delete(self, storage_path: str) -> Tuple[bool, str]:
         """Delete file from Azure Blob Storage"""
         try:
-            # Extract blob name from URL or use as-is
-            if storage_path.startswith('http'):
-                blob_name = storage_path.split('/')[-1]
-            else:
-                blob_name = storage_path
-
             blob_client = self.blob_service_client.get_blob_client(
                 container=self.container_name,
-                blob=blob_name
+                blob=self._blob_name(storage_path)
             )
             blob_client.delete_blob()
             return True, "File deleted from Azure Blob Storage"
@@ -146,19 +163,50 @@ class AzureBlobStorageBackend(StorageBackend):
     def exists(self, storage_path: str) -> bool:
         """Check if blob exists"""
         try:
-            if storage_path.startswith('http'):
-                blob_name = storage_path.split('/')[-1]
-            else:
-                blob_name = storage_path
-
             blob_client = self.blob_service_client.get_blob_client(
                 container=self.container_name,
-                blob=blob_name
+                blob=self._blob_name(storage_path)
             )
             return blob_client.exists()
         except Exception:
             return False
 
+    async def _async_blob_client(self, blob_name: str):
+        """Blob client from the running loop's async service client (aiohttp transport)"""
+        from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+
+        service_client = await aio.loop_local(
+            ('azure-blob', self.connection_string),
+            lambda: AsyncBlobServiceClient.from_connection_string(self.connection_string)
+        )
+        return service_client.get_blob_client(container=self.container_name, blob=blob_name)
+
+    async def save_async(self, file_data: bytes, filename: str) -> Tuple[bool, str, Optional[str]]:
+        """Save file to Azure Blob Storage without blocking the event loop"""
+        try:
+            blob_client = await self._async_blob_client(filename)
+            await blob_client.upload_blob(file_data, overwrite=True)
+            return True, "File uploaded to Azure Blob Storage", blob_client.url
+        except Exception as e:
+            return False, f"Failed to upload to Azure Blob Storage: {str(e)}", None
+
+    async def delete_async(self, storage_path: str) -> Tuple[bool, str]:
+        """Delete file from Azure Blob Storage without blocking the event loop"""
+        try:
+            blob_client = await self._async_blob_client(self._blob_name(storage_path))
+            await blob_client.delete_blob()
+            return True, "File deleted from Azure Blob Storage"
+        except Exception as e:
+            return False, f"Failed to delete from Azure Blob Storage: {str(e)}"
+
+    async def exists_async(self, storage_path: str) -> bool:
+        """Check if blob exists without blocking the event loop"""
+        try:
+            blob_client = await self._async_blob_client(self._blob_name(storage_path))
+            return await blob_client.exists()
+        except Exception:
+            return False
+
 
 class StorageService:
     """Storage service that routes to appropriate backend"""
@@ -185,16 +233,31 @@ class StorageService:
 
         return cls._backend
 
+    @staticmethod
+    def _run_async(coro):
+        """Run a storage coroutine on the I/O loop, cancelling it after STORAGE_IO_TIMEOUT"""
+        return aio.run(coro, timeout=current_app.config.get('STORAGE_IO_TIMEOUT', 60))
+
     @classmethod
     def save_file(cls, file_data: bytes, filename: str) -> Tuple[bool, str, Optional[str]]:
         """Save file using configured backend"""
         backend = cls.get_backend()
+        if aio.is_enabled():
+            try:
+                return cls._run_async(backend.save_async(file_data, filename))
+            except TimeoutError:
+                return False, "Failed to save file: storage timed out", None
         return backend.save(file_data, filename)
 
     @classmethod
     def delete_file(cls, storage_path: str) -> Tuple[bool, str]:
         """Delete file using configured backend"""
         backend = cls.get_backend()
+        if aio.is_enabled():
+            try:
+                return cls._run_async(backend.delete_async(storage_path))
+            except TimeoutError:
+                return False, "Failed to delete file: storage timed out"
         return backend.delete(storage_path)
 
     @classmethod
@@ -207,4 +270,10 @@ class StorageService:
     def file_exists(cls, storage_path: str) -> bool:
         """Check if file exists"""
         backend = cls.get_backend()
+        if aio.is_enabled():
+            try:
+                return cls._run_async(backend.exists_async(storage_path))
+            except TimeoutError:
+                current_app.logger.warning(f"Storage timed out checking {storage_path}")
+                return False
         return backend.exists(storage_path)
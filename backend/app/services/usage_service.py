@@ -0,0 +1,207 @@
+# Per-user usage counters
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+from app.models.ai_request import AIRequest
+from app.models.file import File
+from app.models.usage import FileListVersion, RequestStatusCounter, UsageCounter
+from app.models.user import User
+from app.utils.db_routing import read_only
+
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class UsageService:
+    """
+    Maintain per-user counters in the same transaction as the change they
+    describe, so dashboard stats never need to scan files or ai_requests.
+    Callers commit; nothing here commits except reconcile().
+    """
+
+    @staticmethod
+    def _upsert(model, rows, counters, replace=False):
+        """
+        Add each row's counter values to the stored ones (or overwrite them
+        with replace=True), creating rows as needed
+        """
+        if not rows:
+            return
+        key_columns = [column.name for column in model.__table__.primary_key.columns]
+        # A stable order keeps concurrent upserts from deadlocking on each other's rows
+        rows = sorted(rows, key=lambda row: tuple(row[column] for column in key_columns))
+
+        insert = UPSERT_DIALECTS[db.session.get_bind(clause=model.__table__.insert()).dialect.name]
+        statement = insert(model).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={
+                column: getattr(statement.excluded, column) if replace
+                else getattr(model, column) + getattr(statement.excluded, column)
+                for column in counters
+            }
+        )
+        db.session.execute(statement)
+
+    @staticmethod
+    def record_file_change(user_id, mime_type, files=0, size=0, processed=0):
+        """Apply file count, byte and processed-count deltas for one user and MIME type"""
+        UsageService._upsert(UsageCounter, [{
+            'user_id': user_id,
+            'mime_type': mime_type or '',
+            'file_count': files,
+            'total_bytes': size,
+            'processed_count': processed,
+        }], ('file_count', 'total_bytes', 'processed_count'))
+        UsageService.record_file_list_change([user_id])
+
+    @staticmethod
+    def record_file_list_change(user_ids):
+        """Bump the file list version of each user, invalidating their list ETags"""
+        UsageService._upsert(FileListVersion, [
+            {'user_id': user_id, 'version': 1} for user_id in set(user_ids)
+        ], ('version',))
+
+    @staticmethod
+    @read_only
+    def get_file_list_version(user_id):
+        """Current file list version of a user (0 before their first change)"""
+        return db.session.execute(
+            select(FileListVersion.version).where(FileListVersion.user_id == user_id)
+        ).scalar() or 0
+
+    @staticmethod
+    def record_status_change(user_ids, old_status, new_status):
+        """
+        Move one request per entry in user_ids from old_status to new_status
+        (old_status is None for newly created requests)
+        """
+        rows = []
+        for user_id, count in Counter(user_ids).items():
+            if old_status is not None:
+                rows.append({'user_id': user_id, 'status': old_status, 'request_count': -count})
+            rows.append({'user_id': user_id, 'status': new_status, 'request_count': count})
+        UsageService._upsert(RequestStatusCounter, rows, ('request_count',))
+
+    @staticmethod
+    def record_requests_removed(status_totals):
+        """Subtract deleted requests, given as (user_id, status, count) rows"""
+        UsageService._upsert(RequestStatusCounter, [
+            {'user_id': user_id, 'status': status, 'request_count': -count}
+            for user_id, status, count in status_totals
+            if status is not None
+        ], ('request_count',))
+
+    @staticmethod
+    @read_only
+    def get_user_stats(user_id):
+        """
+        Dashboard stats from the counters; cost depends on the number of MIME
+        types and statuses, not on the number of files
+        """
+        usage = UsageCounter.query.filter_by(user_id=user_id)\
+            .filter(UsageCounter.file_count != 0)\
+            .all()
+        usage.sort(key=lambda row: row.total_bytes, reverse=True)
+        statuses = RequestStatusCounter.query.filter_by(user_id=user_id)\
+            .filter(RequestStatusCounter.request_count != 0)\
+            .all()
+
+        file_count = sum(row.file_count for row in usage)
+        processed = sum(row.processed_count for row in usage)
+        return {
+            'files': {
+                'count': file_count,
+                'total_bytes': sum(row.total_bytes for row in usage),
+                'processed': processed,
+                'unprocessed': file_count - processed,
+            },
+            'by_mime_type': [
+                {
+                    'mime_type': row.mime_type or None,
+                    'count': row.file_count,
+                    'total_bytes': row.total_bytes,
+                }
+                for row in usage
+            ],
+            'ai_requests': {row.status: row.request_count for row in statuses},
+        }
+
+    @staticmethod
+    def _lock_counters(user_ids):
+        """
+        Delete the counter rows of the given users, waiting for transactions
+        that are changing them. Rows are locked in primary key order, the
+        order _upsert writes them in, so reconcile cannot deadlock a writer.
+        """
+        for model in (UsageCounter, RequestStatusCounter):
+            key_columns = list(model.__table__.primary_key.columns)
+            db.session.execute(
+                select(*key_columns).where(model.user_id.in_(user_ids))
+                .order_by(*key_columns).with_for_update()
+            ).all()
+            db.session.execute(delete(model).where(model.user_id.in_(user_ids)))
+
+    @staticmethod
+    def _recount(user_ids):
+        """Rebuild the counters of the given users from files and ai_requests"""
+        # Clear the counters before reading the totals: a change committed
+        # before the lock is in the totals, one still in flight waits for the
+        # lock (or the rebuilt row) and then adds its delta on top
+        UsageService._lock_counters(user_ids)
+
+        file_totals = db.session.execute(
+            select(
+                File.user_id,
+                func.coalesce(File.mime_type, ''),
+                func.count(),
+                func.coalesce(func.sum(File.file_size), 0),
+                func.sum(case((File.is_processed.is_(True), 1), else_=0)),
+            )
+            .where(File.user_id.in_(user_ids))
+            .group_by(File.user_id, func.coalesce(File.mime_type, ''))
+        ).all()
+        status_totals = db.session.execute(
+            select(AIRequest.user_id, AIRequest.status, func.count())
+            .where(AIRequest.user_id.in_(user_ids), AIRequest.status.isnot(None))
+            .group_by(AIRequest.user_id, AIRequest.status)
+        ).all()
+
+        # A writer may have created a new row since the delete; its change is
+        # already in the totals, so the totals overwrite it
+        UsageService._upsert(UsageCounter, [
+            {'user_id': user_id, 'mime_type': mime_type, 'file_count': count,
+             'total_bytes': size, 'processed_count': processed}
+            for user_id, mime_type, count, size, processed in file_totals
+        ], ('file_count', 'total_bytes', 'processed_count'), replace=True)
+        UsageService._upsert(RequestStatusCounter, [
+            {'user_id': user_id, 'status': status, 'request_count': count}
+            for user_id, status, count in status_totals
+        ], ('request_count',), replace=True)
+
+    @staticmethod
+    def reconcile(user_ids=None, batch_size=None):
+        """
+        Recompute counters from the source tables to repair any drift, one
+        transaction per batch of users
+        Returns: number of users reconciled
+        """
+        batch_size = batch_size or current_app.config.get('USAGE_RECONCILE_BATCH_SIZE', 500)
+        if user_ids is None:
+            user_ids = db.session.execute(select(User.id).order_by(User.id)).scalars().all()
+
+        for start in range(0, len(user_ids), batch_size):
+            batch = list(user_ids[start:start + batch_size])
+            try:
+                UsageService._recount(batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return len(user_ids)
@@ -0,0 +1,99 @@
+# Coroutine bridge for the ASGI serving mode (asgi.py)
+"""
+Under asgi.py each request runs in a thread of the ASGI server's pool, and
+with ASYNC_IO set the I/O-bound calls it makes (storage, AI API) run as
+coroutines on the server's event loop, which multiplexes their sockets
+instead of each call holding a connection pool slot and a thread of its
+own. Code outside the server (scripts, tests) gets a private loop thread.
+
+Coroutines are scheduled from synchronous code with run() / submit() and
+run in a copy of the caller's context, so current_app works in them. They
+must not touch the database session, which belongs to the calling thread.
+"""
+import asyncio
+import threading
+import weakref
+from concurrent.futures import TimeoutError
+
+from flask import current_app
+
+_server_loop = None
+_private_loop = None
+_private_loop_lock = threading.Lock()
+
+# Clients bound to one event loop (aiohttp sessions, async SDK clients)
+_loop_resources = weakref.WeakKeyDictionary()
+
+
+def is_enabled():
+    """Check if I/O should go through coroutines (set by asgi.py)"""
+    return bool(current_app.config.get('ASYNC_IO'))
+
+
+def set_server_loop(loop):
+    """Run coroutines on the ASGI server's loop from now on"""
+    global _server_loop
+    _server_loop = loop
+
+
+def get_loop():
+    """The server's loop when serving under ASGI, else a private loop thread"""
+    global _private_loop
+    if _server_loop is not None and _server_loop.is_running():
+        return _server_loop
+    if _private_loop is None:
+        with _private_loop_lock:
+            if _private_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='aio-loop', daemon=True).start()
+                _private_loop = loop
+    return _private_loop
+
+
+def submit(coro):
+    """
+    Schedule a coroutine from a synchronous thread
+    Returns: concurrent.futures.Future (cancel() cancels the coroutine)
+    """
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("aio.submit() called from the event loop it would wait on")
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def run(coro, timeout=None):
+    """
+    Run a coroutine from a synchronous thread and return its result
+    Raises: concurrent.futures.TimeoutError after timeout seconds, having
+    cancelled the coroutine
+    """
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+async def loop_local(key, factory):
+    """Get the running loop's instance of a client, creating it with factory() on first use"""
+    resources = _loop_resources.setdefault(asyncio.get_running_loop(), {})
+    if key not in resources:
+        resources[key] = factory()
+    return resources[key]
+
+
+async def close_loop_resources():
+    """Close the running loop's clients (ASGI lifespan shutdown)"""
+    resources = _loop_resources.pop(asyncio.get_running_loop(), {})
+    for resource in resources.values():
+        close = getattr(resource, 'close', None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
@@ -0,0 +1,116 @@
+# In-process cache of verified API keys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+
+from app.utils.redis_client import get_redis
+
+# What a request authenticated by an API key may do; key_hash is the stored HMAC
+ApiKeyPrincipal = namedtuple('ApiKeyPrincipal', 'id user_id prefix key_hash scopes expires_at')
+
+
+class ApiKeyCache:
+    """
+    API key rows by prefix, kept for a short TTL so machine clients sending
+    many requests cost no database round trip per request. Unknown and
+    revoked prefixes are cached too (as None) so a misconfigured client
+    retrying a dead key does not hit the database either.
+
+    Revoking a key evicts it here at once and logs its prefix in a Redis
+    sorted set; other processes read the log at most once per sync interval
+    and evict what it names. Without Redis (or while it is unreachable) the
+    TTL bounds how long another process may keep accepting a revoked key.
+    """
+
+    REVOKED_LOG_KEY = 'auth:apikey-revoked-log'
+    # Log entries are re-read this far back to allow for clock skew between writers
+    CLOCK_SKEW_SECONDS = 5
+
+    def __init__(self, ttl, maxsize, sync_interval):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.sync_interval = sync_interval
+        self._entries = OrderedDict()  # prefix -> (principal or None, monotonic time cached)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_at = None  # monotonic time of the last sync attempt
+        self._synced_until = time.time()  # epoch seconds up to which the log has been read
+
+    def get(self, prefix):
+        """
+        Look up a prefix
+        Returns: (found, principal or None)
+        """
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is None:
+                return False, None
+            principal, cached_at = entry
+            if time.monotonic() - cached_at >= self.ttl:
+                del self._entries[prefix]
+                return False, None
+            self._entries.move_to_end(prefix)
+            return True, principal
+
+    def put(self, prefix, principal):
+        with self._lock:
+            self._entries[prefix] = (principal, time.monotonic())
+            self._entries.move_to_end(prefix)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, prefix):
+        with self._lock:
+            self._entries.pop(prefix, None)
+
+    def revoke(self, prefix):
+        """Evict a revoked key here and tell the other processes"""
+        self.evict(prefix)
+        client = get_redis()
+        if client is None:
+            return
+        now = time.time()
+        try:
+            pipeline = client.pipeline()
+            pipeline.zadd(self.REVOKED_LOG_KEY, {prefix: now})
+            # Older entries no longer matter: caches have dropped those keys anyway
+            pipeline.zremrangebyscore(self.REVOKED_LOG_KEY, '-inf', now - self.ttl - self.CLOCK_SKEW_SECONDS)
+            pipeline.execute()
+        except Exception as e:
+            current_app.logger.warning(f"Could not publish API key revocation: {str(e)}")
+
+    def sync(self):
+        """Evict keys revoked by other processes, at most once per interval"""
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            client = get_redis()
+            if client is None:
+                return
+            now = time.time()
+            revoked = client.zrangebyscore(self.REVOKED_LOG_KEY, self._synced_until - self.CLOCK_SKEW_SECONDS, '+inf')
+            for prefix in revoked:
+                self.evict(prefix.decode())
+            self._synced_until = now
+        except Exception as e:
+            current_app.logger.warning(f"Could not sync API key revocations: {str(e)}")
+        finally:
+            self._synced_at = time.monotonic()
+            self._sync_lock.release()
+
+
+def get_api_key_cache():
+    """The current app's ApiKeyCache"""
+    cache = current_app.extensions.get('api_key_cache')
+    if cache is None:
+        cache = ApiKeyCache(
+            ttl=current_app.config.get('API_KEY_CACHE_TTL_SECONDS', 30),
+            maxsize=current_app.config.get('API_KEY_CACHE_SIZE', 10000),
+            sync_interval=current_app.config.get('API_KEY_REVOCATION_SYNC_SECONDS', 1)
+        )
+        current_app.extensions['api_key_cache'] = cache
+    return cache
@@ -0,0 +1,41 @@
+# HTTP conditional requests (ETag / If-None-Match)
+import hashlib
+
+from flask import current_app, request
+from werkzeug.http import unquote_etag
+
+
+def make_etag(*parts):
+    """
+    Weak ETag over the values a response is built from. Weak because the
+    same content may be sent compressed or not.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def is_not_modified(etag):
+    """Check if the client's If-None-Match already names this ETag"""
+    # Only If-None-Match is honoured: Last-Modified is informational, since not
+    # every change to these resources moves a timestamp
+    return request.if_none_match.contains_weak(unquote_etag(etag)[0])
+
+
+def _set_validators(response, etag, last_modified):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = current_app.config.get('API_CACHE_CONTROL', 'private, no-cache')
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    """Empty 304 response carrying the validators"""
+    return _set_validators(current_app.response_class(status=304), etag, last_modified)
+
+
+def with_validators(result, etag, last_modified=None):
+    """Add ETag, Last-Modified and Cache-Control to a (response, status_code) result"""
+    response, status_code = result
+    _set_validators(response, etag, last_modified)
+    return response, status_code
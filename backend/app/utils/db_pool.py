@@ -0,0 +1,149 @@
+# Database connection pool profiles and telemetry
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.utils.metrics import (
+    DB_POOL_CHECKOUT_WAIT, DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_CONNECTIONS, register_pool_gauges,
+    report_pool_gauges
+)
+
+
+# Named pool profiles; individual DB_POOL_* settings override the profile
+POOL_PROFILES = {
+    # Balanced defaults for a single process
+    'default': {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    },
+    # Request-serving workers: wider pool, fail fast instead of queueing requests
+    'web': {
+        'pool_size': 10,
+        'max_overflow': 5,
+        'pool_timeout': 5,
+        'pool_recycle': 900,
+        'pool_pre_ping': True,
+    },
+    # Background jobs: few connections, tolerate waiting
+    'worker': {
+        'pool_size': 2,
+        'max_overflow': 2,
+        'pool_timeout': 60,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    },
+    # PgBouncer in transaction pooling mode does the pooling; keep no client pool
+    'pgbouncer': {
+        'poolclass': NullPool,
+        'pool_pre_ping': False,
+    },
+}
+
+POOL_SETTINGS = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+    'DB_POOL_PRE_PING': 'pool_pre_ping',
+}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait for a connection and
+    updates the pool gauges on every checkout and return
+    """
+
+    # Bind name for the pool gauges, set by register_pool_gauges
+    metrics_bind = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+            self._report()
+
+    def _do_return_conn(self, record):
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self._report()
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep reporting under the same bind
+        pool = super().recreate()
+        pool.metrics_bind = self.metrics_bind
+        pool._report()
+        return pool
+
+    def _report(self):
+        if self.metrics_bind is not None:
+            report_pool_gauges(self.metrics_bind, self)
+
+
+def build_engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* configuration.
+    SQLite keeps SQLAlchemy's own pooling, which suits its locking model.
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri or make_url(uri).get_backend_name() == 'sqlite':
+        return options
+
+    profile_name = config.get('DB_POOL_PROFILE', 'default')
+    if profile_name not in POOL_PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE: {profile_name}")
+    profile = dict(POOL_PROFILES[profile_name])
+
+    if profile.get('poolclass') is not NullPool:
+        profile['poolclass'] = InstrumentedQueuePool
+        for setting, option in POOL_SETTINGS.items():
+            if config.get(setting) is not None:
+                profile[option] = config[setting]
+
+    profile.update(options)
+
+    timeout_ms = config.get('DB_STATEMENT_TIMEOUT_MS')
+    if timeout_ms and profile_name != 'pgbouncer':
+        # Session-level startup option; PgBouncer rejects these, see init_db_pool.
+        # Added to any connect_args of SQLALCHEMY_ENGINE_OPTIONS, not replaced by them
+        connect_args = dict(profile.get('connect_args') or {})
+        startup = f"-c statement_timeout={int(timeout_ms)}"
+        connect_args['options'] = f"{connect_args['options']} {startup}" if connect_args.get('options') else startup
+        profile['connect_args'] = connect_args
+    return profile
+
+
+def init_db_pool(app, db):
+    """Attach pool telemetry and per-transaction settings to the app's engines"""
+    with app.app_context():
+        engines = db.engines
+
+    timeout_ms = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+    pgbouncer = app.config.get('DB_POOL_PROFILE') == 'pgbouncer'
+
+    for bind_key, engine in engines.items():
+        name = bind_key or 'default'
+        register_pool_gauges(name, engine.pool)
+
+        @event.listens_for(engine, 'connect')
+        def _on_connect(dbapi_connection, connection_record, name=name):
+            DB_POOL_CONNECTIONS.labels(bind=name).inc()
+
+        if pgbouncer and timeout_ms and engine.dialect.name == 'postgresql':
+            # Transaction pooling can hand each transaction a different server
+            # connection, so the timeout has to be set inside every transaction
+            @event.listens_for(engine, 'begin')
+            def _set_statement_timeout(conn):
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
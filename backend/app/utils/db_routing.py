@@ -0,0 +1,279 @@
+# Read-replica routing for read-only work
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.utils.metrics import DB_READ_ROUTING, DB_REPLICA_HEALTHY, DB_REPLICA_LAG, register_pool_gauges
+from app.utils.redis_client import get_redis
+
+# Replay lag in seconds; 0 when the replica has replayed everything it received
+# (an idle primary would otherwise look like growing lag)
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class StickyPrimary:
+    """
+    Remember users who just wrote so their reads go to the primary until the
+    replicas have caught up. Uses Redis when configured so every worker
+    agrees, otherwise an in-process map.
+    """
+
+    KEY_PREFIX = 'db:primary:'
+
+    def __init__(self):
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def stick(self, user_id, seconds):
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(f'{self.KEY_PREFIX}{user_id}', 1, px=int(seconds * 1000))
+                return
+            except Exception as e:
+                current_app.logger.warning(f"Could not record primary stickiness: {str(e)}")
+        with self._lock:
+            self._local[user_id] = time.monotonic() + seconds
+
+    def is_stuck(self, user_id):
+        client = get_redis()
+        if client is not None:
+            try:
+                return bool(client.exists(f'{self.KEY_PREFIX}{user_id}'))
+            except Exception:
+                # Cannot tell; the primary is always correct
+                return True
+        with self._lock:
+            until = self._local.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._local[user_id]
+                return False
+            return True
+
+
+class ReplicaRouter:
+    """
+    Track replica health and lag and pick a replica for each read.
+    A background thread in each process checks every replica once per
+    interval and requests only read its last results, so a slow or
+    unreachable replica never holds up a request. A replica that errors,
+    lags more than max_lag or has not been checked lately is skipped.
+    """
+
+    # Results older than this many intervals are not trusted
+    STALE_INTERVALS = 3
+
+    def __init__(self, engines, max_lag, check_interval, check_timeout_ms=1000, logger=None):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout_ms = check_timeout_ms
+        self.logger = logger
+        self._status = {}  # name -> (healthy, lag, checked_at)
+        self._cycle = itertools.cycle(sorted(engines))
+        self._monitor_pid = None
+        self._monitor_lock = threading.Lock()
+        self.sticky = StickyPrimary()
+
+    def check(self, name):
+        """Measure one replica's lag and record whether it is usable"""
+        engine = self.engines[name]
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.check_timeout_ms)}")
+                    lag = float(connection.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+                else:
+                    connection.execute(text('SELECT 1'))
+                    lag = 0.0
+            healthy = lag <= self.max_lag
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.warning(f"Read replica {name} unavailable: {str(e)}")
+            healthy, lag = False, None
+
+        self._status[name] = (healthy, lag, time.monotonic())
+        DB_REPLICA_HEALTHY.labels(bind=name).set(1 if healthy else 0)
+        if lag is not None:
+            DB_REPLICA_LAG.labels(bind=name).set(lag)
+        return healthy
+
+    def _ensure_monitor(self):
+        """Start this process's health check thread; threads do not survive a fork"""
+        if self._monitor_pid == os.getpid():
+            return
+        with self._monitor_lock:
+            if self._monitor_pid != os.getpid():
+                threading.Thread(target=self._monitor, name='replica-health', daemon=True).start()
+                self._monitor_pid = os.getpid()
+
+    def _monitor(self):
+        while True:
+            for name in sorted(self.engines):
+                self.check(name)
+            time.sleep(self.check_interval)
+
+    def is_healthy(self, name):
+        """Last known health; False until the first check has finished"""
+        self._ensure_monitor()
+        status = self._status.get(name)
+        if status is None or time.monotonic() - status[2] > self.check_interval * self.STALE_INTERVALS:
+            return False
+        return status[0]
+
+    def choose(self):
+        """Round-robin over healthy replicas
+        Returns: engine, or None to fall back to the primary
+        """
+        for _ in range(len(self.engines)):
+            name = next(self._cycle)
+            if self.is_healthy(name):
+                return self.engines[name]
+        return None
+
+    def health(self):
+        """Snapshot of replica status for health endpoints"""
+        return {
+            name: {'healthy': status[0], 'lag_seconds': status[1]}
+            for name, status in ((name, self._status.get(name)) for name in sorted(self.engines))
+            if status is not None
+        }
+
+
+class RoutingSession(Session):
+    """Session that sends reads inside replica_reads() to a healthy replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('use_replica') and not self._flushing \
+                and not isinstance(clause, UpdateBase):
+            engine = current_app.extensions['db_routing'].choose()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _current_user_id():
+    """User id of the current request (JWT identity or API key owner), if one was verified"""
+    if not has_request_context():
+        return None
+    api_key = g.get('api_key')
+    if api_key is not None:
+        return str(api_key.user_id)
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+@contextmanager
+def replica_reads():
+    """
+    Route reads in this block to a replica, unless replicas are disabled or
+    unhealthy, the session already wrote, or the user wrote very recently
+    """
+    from app.extensions import db
+
+    routing = current_app.extensions.get('db_routing')
+    session = db.session()
+    previous = session.info.get('use_replica', False)
+
+    use_replica = routing is not None and not session.info.get('wrote')
+    if use_replica:
+        user_id = _current_user_id()
+        use_replica = user_id is None or not routing.sticky.is_stuck(user_id)
+    if routing is not None:
+        DB_READ_ROUTING.labels(target='replica' if use_replica else 'primary').inc()
+
+    session.info['use_replica'] = use_replica
+    try:
+        yield
+    finally:
+        session.info['use_replica'] = previous
+
+
+def read_only(f):
+    """Decorator for routes and service methods that only read (use after @jwt_required())"""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return f(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _on_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if not session.info.pop('wrote', False):
+        return
+    routing = current_app.extensions.get('db_routing')
+    user_id = _current_user_id()
+    if routing is not None and user_id is not None:
+        routing.sticky.stick(user_id, current_app.config.get('DB_REPLICA_STICKY_SECONDS', 10))
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('wrote', None)
+
+
+def init_db_routing(app):
+    """
+    Enable replica routing when SQLALCHEMY_REPLICA_URLS is configured.
+    Replica engines are kept outside Flask-SQLAlchemy's binds so that
+    create_all() and migrations never touch them.
+    """
+    urls = app.config.get('SQLALCHEMY_REPLICA_URLS') or []
+    if not urls:
+        return None
+
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    connect_timeout = app.config.get('DB_REPLICA_CONNECT_TIMEOUT', 2)
+    replicas = {}
+    for index, url in enumerate(urls):
+        name = f'replica_{index}'
+        replica_options = options
+        if connect_timeout and make_url(url).get_backend_name() == 'postgresql':
+            # Give up on an unreachable replica quickly; reads then fall back to the primary
+            connect_args = dict(options.get('connect_args') or {})
+            connect_args.setdefault('connect_timeout', int(connect_timeout))
+            replica_options = dict(options, connect_args=connect_args)
+        replicas[name] = create_engine(url, **replica_options)
+        register_pool_gauges(name, replicas[name].pool)
+
+    router = ReplicaRouter(
+        replicas,
+        max_lag=app.config.get('DB_REPLICA_MAX_LAG_SECONDS', 5),
+        check_interval=app.config.get('DB_REPLICA_CHECK_INTERVAL', 5),
+        check_timeout_ms=app.config.get('DB_REPLICA_CHECK_TIMEOUT_MS', 1000),
+        logger=app.logger
+    )
+    app.extensions['db_routing'] = router
+    return router
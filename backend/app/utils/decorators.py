@@ -1,9 +1,14 @@
 # Custom decorators
 from functools import wraps
-from flask import request
-from flask_jwt_extended import get_jwt_identity
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from app.extensions import db
+from app.models.user import User
+from app.services.api_key_service import ApiKeyService
 from app.utils.responses import error_response
 
+API_KEY_HEADER = 'X-API-Key'
+
 
 def validate_json(*expected_args):
     """Decorator to validate JSON request data"""
@@ -28,13 +33,48 @@ def validate_json(*expected_args):
 
 
 def admin_required():
-    """Decorator to require admin role"""
+    """Decorator to require admin role (use after @jwt_required())"""
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
             user_id = get_jwt_identity()
-            # TODO: Check if user is admin
-            # For now, just pass through
+            user = db.session.get(User, int(user_id)) if user_id else None
+            if not user or not user.is_admin:
+                return error_response("Admin access required", 403)
             return f(*args, **kwargs)
         return wrapper
     return decorator
+
+
+def jwt_or_api_key_required(scope):
+    """
+    Decorator accepting either a JWT or an API key with the given scope in
+    the X-API-Key header. Read the caller with current_user_id().
+    """
+    def decorator(f):
+        jwt_view = jwt_required()(f)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            raw_key = request.headers.get(API_KEY_HEADER)
+            if raw_key is None:
+                g.pop('api_key', None)
+                return jwt_view(*args, **kwargs)
+
+            principal = ApiKeyService.authenticate_request(raw_key)
+            if principal is None:
+                return error_response("Invalid, expired or revoked API key", 401)
+            if scope not in principal.scopes:
+                return error_response(f"API key lacks the {scope} scope", 403)
+            g.api_key = principal
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_user_id():
+    """Id of the user authenticated by the request's API key or JWT"""
+    api_key = g.get('api_key')
+    if api_key is not None:
+        return api_key.user_id
+    return int(get_jwt_identity())
@@ -0,0 +1,35 @@
+# Sparse fieldsets (?fields=) mapped to ORM column projection
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(value, model, default=None):
+    """
+    Parse a comma-separated fields parameter against model.FIELDS
+    Returns: tuple of field names, or default when no fields are given
+    """
+    if value is None or not value.strip():
+        return default
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in model.FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(model.FIELDS)}"
+        )
+    return fields
+
+
+def list_fields(model):
+    """Fields returned by list endpoints by default: all but the heavy ones"""
+    return tuple(name for name in model.FIELDS if name not in model.LIST_DEFERRED_FIELDS)
+
+
+def projection(model, fields, *required):
+    """
+    Loader option that fetches only the columns behind the given fields plus
+    the required ones (keys, cursor and ownership columns). Touching any
+    other column raises instead of issuing a query per row.
+    """
+    columns = dict.fromkeys(required)
+    for name in fields or model.FIELDS:
+        columns.update(dict.fromkeys(model.FIELDS[name]))
+    return load_only(*(getattr(model, column) for column in columns), raiseload=True)
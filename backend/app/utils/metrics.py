@@ -0,0 +1,129 @@
+# Prometheus metrics shared across the application
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Under gunicorn every worker keeps its own values and writes them to files in
+# PROMETHEUS_MULTIPROC_DIR (set by gunicorn.conf.py before the app is imported);
+# a scrape reaches one worker, which merges the files of all of them
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+# Database connection pool
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting to check a connection out of the pool',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    'db_pool_checkout_timeouts_total',
+    'Connection checkouts that gave up after pool_timeout'
+)
+DB_POOL_CONNECTIONS = Counter(
+    'db_pool_connections_opened_total',
+    'New DBAPI connections opened',
+    ['bind']
+)
+# Pool gauges add up the live workers' pools
+DB_POOL_SIZE = Gauge('db_pool_size', 'Configured pool size', ['bind'], multiprocess_mode='livesum')
+DB_POOL_IN_USE = Gauge('db_pool_checked_out', 'Connections currently checked out', ['bind'],
+                       multiprocess_mode='livesum')
+DB_POOL_IDLE = Gauge('db_pool_checked_in', 'Idle connections held by the pool', ['bind'],
+                     multiprocess_mode='livesum')
+DB_POOL_OVERFLOW = Gauge('db_pool_overflow', 'Connections open beyond pool_size', ['bind'],
+                         multiprocess_mode='livesum')
+
+# Read replicas: the worst value seen by any live worker
+DB_REPLICA_LAG = Gauge('db_replica_lag_seconds', 'Replication replay lag at the last check', ['bind'],
+                       multiprocess_mode='livemax')
+DB_REPLICA_HEALTHY = Gauge('db_replica_healthy', '1 if the replica is used for reads, else 0', ['bind'],
+                           multiprocess_mode='livemin')
+DB_READ_ROUTING = Counter(
+    'db_read_routing_total',
+    'Read-only blocks by the database they were routed to',
+    ['target']
+)
+
+# Background storage purge
+STORAGE_PURGE_OBJECTS = Counter(
+    'storage_purge_objects_total',
+    'Storage objects handled by the purge worker',
+    ['result']
+)
+
+# Password hashing pool
+PASSWORD_HASH_REJECTED = Counter(
+    'password_hash_rejected_total',
+    'Password hash requests turned away by the hashing pool',
+    ['reason']
+)
+
+# JWT revocation checks (bloom_negative = answered without a Redis round trip)
+TOKEN_REVOCATION_CHECKS = Counter(
+    'token_revocation_checks_total',
+    'Token revocation checks by how they were answered',
+    ['result']
+)
+TOKEN_REVOCATION_SYNCS = Counter(
+    'token_revocation_syncs_total',
+    'Revocation list syncs into the in-process bloom filter',
+    ['result']
+)
+
+# API key verification (source = cache or database)
+API_KEY_VERIFICATIONS = Counter(
+    'api_key_verifications_total',
+    'API key verifications by where the key was found and the outcome',
+    ['source', 'result']
+)
+
+# API rate limiting (error = store unreachable, request let through)
+RATE_LIMIT_DECISIONS = Counter(
+    'rate_limit_decisions_total',
+    'API rate limit checks by outcome',
+    ['result']
+)
+
+# Response compression (bytes direction = in before, out after encoding)
+RESPONSE_COMPRESSION = Counter(
+    'response_compression_total',
+    'Responses compressed, by encoding',
+    ['encoding']
+)
+RESPONSE_COMPRESSION_BYTES = Counter(
+    'response_compression_bytes_total',
+    'Body bytes before and after compression, by encoding',
+    ['encoding', 'direction']
+)
+
+
+def register_pool_gauges(bind, pool):
+    """
+    Label a pool's gauges with the bind name. Only pools that report their
+    counters as connections move (InstrumentedQueuePool) are tracked: values
+    read at scrape time would only ever cover the worker that was scraped.
+    """
+    if not hasattr(pool, 'metrics_bind'):
+        return
+    pool.metrics_bind = bind
+    report_pool_gauges(bind, pool)
+
+
+def report_pool_gauges(bind, pool):
+    """Record a pool's current counters"""
+    DB_POOL_SIZE.labels(bind=bind).set(pool.size())
+    DB_POOL_IN_USE.labels(bind=bind).set(pool.checkedout())
+    DB_POOL_IDLE.labels(bind=bind).set(pool.checkedin())
+    # overflow() starts at -pool_size and counts up as connections open
+    DB_POOL_OVERFLOW.labels(bind=bind).set(max(pool.overflow(), 0))
+
+
+def render_metrics():
+    """Render all metrics in the Prometheus text format
+    Returns: (body, content_type)
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,114 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import DateTime, func, select, tuple_
+
+from app.extensions import db
+
+# One page of results; total is None unless requested
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'has_more', 'total', 'total_is_estimate'])
+
+TOTAL_MODES = ('none', 'estimate', 'exact')
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row into an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor back into typed sort key values for the given columns
+    Raises: ValueError for malformed or foreign cursors
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for column, value in zip(columns, payload):
+        if value is None:
+            raise ValueError("Invalid cursor")
+        if isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+        values.append(value)
+    return values
+
+
+def estimate_count(query):
+    """
+    Estimate the number of rows a query returns. PostgreSQL answers from the
+    planner's statistics; other databases fall back to an exact count.
+    Returns: (count, is_estimate)
+    """
+    statement = query.order_by(None).statement
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        compiled = statement.compile(dialect=connection.dialect)
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        return int(plan[0]['Plan']['Plan Rows']), True
+    count = db.session.execute(
+        select(func.count()).select_from(statement.subquery())
+    ).scalar()
+    return count, False
+
+
+def paginate_keyset(query, columns, cursor=None, limit=20, total='none'):
+    """
+    Fetch one page of a query ordered newest first by the given columns,
+    which must end with a unique column. The cursor is a row-value
+    comparison, so every page is an index range scan whatever its depth.
+    Returns: KeysetPage
+    """
+    if total not in TOTAL_MODES:
+        raise ValueError(f"total must be one of: {', '.join(TOTAL_MODES)}")
+
+    count, is_estimate = None, False
+    if total == 'exact':
+        count = query.order_by(None).count()
+    elif total == 'estimate':
+        count, is_estimate = estimate_count(query)
+
+    page_query = query
+    if cursor:
+        page_query = page_query.filter(tuple_(*columns) < tuple_(*decode_cursor(cursor, columns)))
+    rows = page_query.order_by(*[column.desc() for column in columns]).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    return KeysetPage(rows, next_cursor, has_more, count, is_estimate)
+
+
+def keyset_meta(page, per_page):
+    """Pagination block for API responses"""
+    meta = {
+        'per_page': per_page,
+        'next_cursor': page.next_cursor,
+        'has_more': page.has_more
+    }
+    if page.total is not None:
+        meta['total'] = page.total
+        meta['total_is_estimate'] = page.total_is_estimate
+    return meta
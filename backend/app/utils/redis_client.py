@@ -0,0 +1,46 @@
+# Shared Redis client
+import threading
+
+import redis
+from flask import current_app
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Get the process-wide Redis client for the current app's configuration.
+    REDIS_URL wins; otherwise REDIS_HOST/PORT/PASSWORD/SSL are used, matching
+    the Kubernetes config maps.
+    Returns: redis.Redis, or None when Redis is not configured
+    """
+    config = current_app.config
+    url = config.get('REDIS_URL')
+    host = config.get('REDIS_HOST')
+    if not url and not host:
+        return None
+
+    key = url or (host, config.get('REDIS_PORT'), config.get('REDIS_SSL'))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                options = {
+                    'socket_timeout': config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+                    'socket_connect_timeout': config.get('REDIS_SOCKET_TIMEOUT', 0.5),
+                    'health_check_interval': 30,
+                }
+                if url:
+                    client = redis.Redis.from_url(url, **options)
+                else:
+                    client = redis.Redis(
+                        host=host,
+                        port=config.get('REDIS_PORT', 6379),
+                        password=config.get('REDIS_PASSWORD') or None,
+                        ssl=config.get('REDIS_SSL', False),
+                        **options
+                    )
+                _clients[key] = client
+    return client
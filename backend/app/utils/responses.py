@@ -1,7 +1,7 @@
 """
 Standardized API responses
 """
-from flask import jsonify
+from flask import current_app, jsonify, stream_with_context
 
 
 def success_response(data, message="Success", status_code=200):
@@ -18,4 +18,30 @@ def error_response(message, status_code):
     return jsonify({
         "error": message,
         "status": "error"
-    }), status_code
\ No newline at end of file
+    }), status_code
+
+
+def streamed_list_response(key, items, serialize, extra=None, message="Success", chunk_size=500):
+    """
+    Create a success response whose data.<key> array is encoded and sent
+    item by item as the body is read, so a large result set (e.g. rows from
+    a server-side cursor) is never held in memory as one list or string.
+    extra adds fields next to the array; the envelope matches success_response.
+    """
+    dumps = current_app.json.dumps_bytes
+
+    def generate():
+        yield b'{"data":{' + dumps(key) + b':['
+        separator, chunk = b'', []
+        for item in items:
+            chunk.append(dumps(serialize(item)))
+            if len(chunk) >= chunk_size:
+                yield separator + b','.join(chunk)
+                separator, chunk = b',', []
+        if chunk:
+            yield separator + b','.join(chunk)
+        extra_fields = dumps(extra or {})[1:-1]
+        yield b']' + (b',' + extra_fields if extra_fields else b'') + b'},"message":' \
+            + dumps(message) + b',"status":"success"}\n'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
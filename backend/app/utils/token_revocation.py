@@ -0,0 +1,168 @@
+# Server-side JWT revocation
+import math
+import threading
+import time
+
+from flask import current_app
+
+from app.utils.bloom import BloomFilter
+from app.utils.metrics import TOKEN_REVOCATION_CHECKS, TOKEN_REVOCATION_SYNCS
+from app.utils.redis_client import get_redis
+
+
+class TokenRevocationList:
+    """
+    JTI denylist kept in Redis (one key per revoked token, expiring with the
+    token) with an in-process bloom filter in front of it. Most tokens were
+    never revoked, so most checks end at the bloom filter with no network
+    round trip; only bloom hits are confirmed against Redis.
+
+    Every revocation is also logged in a sorted set scored by revocation
+    time. Each process loads new log entries into its filter at most once per
+    sync interval, so a token revoked by another process may be accepted for
+    up to that long. The filter is rebuilt from the log now and then to drop
+    entries whose tokens have expired anyway. Without Redis the list is
+    per-process.
+    """
+
+    KEY_PREFIX = 'auth:revoked:'
+    LOG_KEY = 'auth:revoked-log'
+    # Log entries are re-read this far back to allow for clock skew between writers
+    CLOCK_SKEW_SECONDS = 5
+
+    def __init__(self, capacity, error_rate, sync_interval, rebuild_interval, max_lifetime):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.max_lifetime = max_lifetime
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._local = {}  # jti -> expiry (epoch seconds) when Redis is not configured
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_at = None  # monotonic time of the last sync attempt
+        self._synced_until = None  # epoch seconds up to which the log has been loaded
+        self._rebuilt_at = None  # epoch seconds of the last full rebuild
+
+    def revoke(self, jti, expires_at):
+        """Revoke a token until it expires (expires_at in epoch seconds)"""
+        now = time.time()
+        if expires_at <= now:
+            return
+        client = get_redis()
+        if client is not None:
+            pipeline = client.pipeline()
+            pipeline.set(f'{self.KEY_PREFIX}{jti}', 1, ex=math.ceil(expires_at - now))
+            pipeline.zadd(self.LOG_KEY, {jti: now})
+            pipeline.execute()
+        else:
+            with self._lock:
+                self._local[jti] = expires_at
+        with self._lock:
+            self._bloom.add(jti)
+
+    def _rebuild(self, jtis):
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            self._bloom = bloom
+
+    def _sync_redis(self, client, now):
+        if self._rebuilt_at is None or now - self._rebuilt_at >= self.rebuild_interval:
+            client.zremrangebyscore(self.LOG_KEY, '-inf', now - self.max_lifetime)
+            entries = client.zrangebyscore(self.LOG_KEY, '-inf', '+inf')
+            self._rebuild([entry.decode() for entry in entries])
+            self._rebuilt_at = now
+        else:
+            entries = client.zrangebyscore(self.LOG_KEY, self._synced_until - self.CLOCK_SKEW_SECONDS, '+inf')
+            with self._lock:
+                for entry in entries:
+                    self._bloom.add(entry.decode())
+        self._synced_until = now
+
+    def _sync_local(self, now):
+        if self._rebuilt_at is not None and now - self._rebuilt_at < self.rebuild_interval:
+            return
+        with self._lock:
+            self._local = {jti: expiry for jti, expiry in self._local.items() if expiry > now}
+            jtis = list(self._local)
+        self._rebuild(jtis)
+        self._rebuilt_at = now
+
+    def sync(self, force=False):
+        """
+        Load revocations made by other processes, at most once per interval.
+        The first sync blocks; later ones are done by whichever thread gets
+        there first while the others carry on with the current filter.
+        """
+        if not force and self._synced_at is not None \
+                and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=self._synced_at is None or force):
+            return
+        try:
+            now = time.time()
+            client = get_redis()
+            if client is not None:
+                self._sync_redis(client, now)
+            else:
+                self._sync_local(now)
+            TOKEN_REVOCATION_SYNCS.labels(result='ok').inc()
+        except Exception as e:
+            TOKEN_REVOCATION_SYNCS.labels(result='error').inc()
+            current_app.logger.warning(f"Could not sync the token revocation list: {str(e)}")
+        finally:
+            self._synced_at = time.monotonic()
+            self._sync_lock.release()
+
+    def _confirm(self, jti, default):
+        client = get_redis()
+        if client is None:
+            with self._lock:
+                return self._local.get(jti, 0) > time.time()
+        try:
+            return bool(client.exists(f'{self.KEY_PREFIX}{jti}'))
+        except Exception as e:
+            current_app.logger.warning(f"Could not check token revocation: {str(e)}")
+            return default
+
+    def is_revoked(self, jti):
+        """Check if a token has been revoked"""
+        self.sync()
+        if self._synced_until is None and get_redis() is not None:
+            # Never loaded the log (Redis unreachable so far): ask Redis directly
+            # and accept the token if it cannot answer either
+            TOKEN_REVOCATION_CHECKS.labels(result='unsynced').inc()
+            return self._confirm(jti, default=False)
+        if jti not in self._bloom:
+            TOKEN_REVOCATION_CHECKS.labels(result='bloom_negative').inc()
+            return False
+        # Probably revoked; a Redis outage fails closed
+        revoked = self._confirm(jti, default=True)
+        TOKEN_REVOCATION_CHECKS.labels(result='revoked' if revoked else 'false_positive').inc()
+        return revoked
+
+
+def get_revocation_list():
+    """The current app's TokenRevocationList"""
+    return current_app.extensions['token_revocation']
+
+
+def init_token_revocation(app, jwt):
+    """Create the app's revocation list and have flask-jwt-extended consult it"""
+    lifetimes = [app.config.get('JWT_ACCESS_TOKEN_EXPIRES'), app.config.get('JWT_REFRESH_TOKEN_EXPIRES')]
+    max_lifetime = max((value.total_seconds() for value in lifetimes if value), default=86400)
+    app.extensions['token_revocation'] = TokenRevocationList(
+        capacity=app.config.get('TOKEN_REVOCATION_BLOOM_CAPACITY', 100000),
+        error_rate=app.config.get('TOKEN_REVOCATION_BLOOM_ERROR_RATE', 0.001),
+        sync_interval=app.config.get('TOKEN_REVOCATION_SYNC_SECONDS', 5),
+        rebuild_interval=app.config.get('TOKEN_REVOCATION_REBUILD_SECONDS', 3600),
+        max_lifetime=max_lifetime
+    )
+
+    @jwt.token_in_blocklist_loader
+    def _is_token_revoked(jwt_header, jwt_payload):
+        return get_revocation_list().is_revoked(jwt_payload['jti'])
+
+    return app.extensions['token_revocation']
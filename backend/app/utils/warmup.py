@@ -0,0 +1,157 @@
+# Per-process warmup for pre-forked servers (gunicorn.conf.py)
+"""
+With preload_app the master imports the app once and forks workers that
+share its memory; preload() does the rest of the one-off setup there.
+Connections must not be shared across a fork, so every worker drops the
+ones it inherited (reset_after_fork) and opens its own before it accepts
+traffic (warm_up). The first requests after a scale-up then skip the TCP
+and TLS handshakes, process pool start-up and the lazy imports.
+"""
+import importlib
+import os
+import time
+
+from flask import current_app
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.pool import QueuePool
+
+from app.extensions import db
+from app.models import AIRequest, File
+from app.services.ai_service import AIService
+from app.services.extraction_service import TextExtractionService
+from app.services.file_service import FileService
+from app.services.password_service import PasswordService
+from app.services.storage_service import StorageService
+from app.services.usage_service import UsageService
+from app.utils.fields import list_fields
+from app.utils.redis_client import get_redis
+
+
+# Lookups behind the most frequent requests, run in the master with keys that
+# match nothing: the engine caches their compiled SQL and the workers inherit it
+PRELOAD_QUERIES = (
+    lambda: UsageService.get_file_list_version(0),
+    lambda: FileService.get_user_files_page(0, fields=list_fields(File)),
+    lambda: FileService.get_file_validator('', with_request=True),
+    lambda: FileService.get_file_with_latest_request(''),
+    lambda: UsageService.get_user_stats(0),
+    lambda: AIService.get_request_history_page(0, fields=list_fields(AIRequest)),
+    lambda: AIService.get_request_by_id(0, 0),
+)
+
+
+def _engines(app):
+    """Primary and replica engines, by name"""
+    with app.app_context():
+        engines = {bind_key or 'default': engine for bind_key, engine in db.engines.items()}
+    router = app.extensions.get('db_routing')
+    if router is not None:
+        engines.update(router.engines)
+    return engines
+
+
+def preload(app):
+    """One-off setup shared by all workers when run in the master before forking"""
+    # Otherwise done by the first query of every worker
+    configure_mappers()
+    with app.app_context():
+        # Loads the JWT algorithms on first use
+        decode_token(create_access_token(identity='0'))
+        for query in PRELOAD_QUERIES:
+            try:
+                query()
+            except Exception as e:
+                current_app.logger.warning(f"Preload query failed: {e}")
+        db.session.remove()
+    # Leave no connections behind for the workers to inherit
+    for engine in _engines(app).values():
+        engine.dispose()
+
+
+def reset_after_fork(app):
+    """Forget pooled connections inherited from the parent, leaving its sockets open"""
+    for engine in _engines(app).values():
+        engine.dispose(close=False)
+
+
+def _warm_engine(engine, connections):
+    if not isinstance(engine.pool, QueuePool):
+        # NullPool (PgBouncer) keeps nothing to warm, SQLite memory pools are per thread
+        return 0
+    # Hold them all at once so the pool ends up with that many idle connections
+    opened = []
+    try:
+        for _ in range(min(connections, engine.pool.size())):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.exec_driver_sql('SELECT 1')
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+def _import_module(name):
+    """Runs in a process pool worker: import what its real tasks will unpickle"""
+    importlib.import_module(name)
+    return os.getpid()
+
+
+def _warm_process_pool(service, workers_setting):
+    executor = service.get_executor()
+    if executor is not None:
+        # Workers are spawned on demand, one per task that finds none idle
+        tasks = [executor.submit(_import_module, service.__module__)
+                 for _ in range(current_app.config.get(workers_setting, 2))]
+        for task in tasks:
+            task.result(timeout=60)
+
+
+def _warm_redis():
+    client = get_redis()
+    if client is not None:
+        client.ping()
+
+
+def _warm_storage():
+    # Azure's constructor already talks to the container, which opens the connection
+    StorageService.get_backend()
+
+
+def _warm_routes(app):
+    # Compiles the URL map and imports what the first request would
+    app.test_client().get('/api/health/')
+
+
+def warm_up(app, connections=1):
+    """
+    Open this process's connections before it serves requests.
+    Failures are logged and skipped: readiness checks decide whether the
+    process can serve, not the warmup.
+    Returns: {step: milliseconds taken, or the error}
+    """
+    steps = {
+        f'db:{name}': lambda engine=engine: _warm_engine(engine, connections)
+        for name, engine in _engines(app).items()
+    }
+    steps.update({
+        'redis': _warm_redis,
+        'storage': _warm_storage,
+        'ai_api': lambda: AIService.warm_up_http_session(connections),
+        'text_extraction': lambda: _warm_process_pool(TextExtractionService, 'TEXT_EXTRACTION_WORKERS'),
+        'password_hashing': lambda: _warm_process_pool(PasswordService, 'PASSWORD_HASH_WORKERS'),
+        'routes': lambda: _warm_routes(app),
+    })
+
+    results = {}
+    with app.app_context():
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                step()
+                results[name] = round((time.perf_counter() - started) * 1000, 1)
+            except Exception as e:
+                current_app.logger.warning(f"Warmup step {name} failed: {e}")
+                results[name] = f"error: {e}"
+    return results
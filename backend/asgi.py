@@ -0,0 +1,33 @@
+"""
+ASGI entry point for production (uvicorn asgi:app --workers 2)
+
+The Flask app runs in a pool of ASGI_THREADS threads per process instead
+of one request per sync worker, and storage and AI API I/O runs as
+coroutines on the server's event loop (ASYNC_IO), see app/utils/aio.py.
+"""
+import asyncio
+
+from a2wsgi import WSGIMiddleware
+
+from app import create_app
+from app.utils import aio
+
+flask_app = create_app('production', {'ASYNC_IO': True})
+wsgi_app = WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_THREADS'])
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                aio.set_server_loop(asyncio.get_running_loop())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await aio.close_loop_resources()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Also bound per request for servers run without lifespan events
+    aio.set_server_loop(asyncio.get_running_loop())
+    await wsgi_app(scope, receive, send)
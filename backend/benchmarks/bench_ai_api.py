@@ -0,0 +1,82 @@
+# Benchmark the AI API client against the local stub AI server
+"""
+Measures throughput and latency of AIService._send_to_ai_api (connection
+pooling + retry/backoff) under configurable provider behaviour.
+
+    python benchmarks/bench_ai_api.py --requests 500 --concurrency 32 \\
+        --latency lognormal:120:0.4 --throttle-rate 0.05 --error-rate 0.01
+"""
+import argparse
+import base64
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import run_concurrently, print_report
+from scripts.stub_ai_server import StubAIServer, StubConfig
+from app import create_app
+from app.models.file import File
+from app.services.ai_service import AIService
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', default='lognormal:50:0.5')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--rate-cap', type=float, default=0.0)
+    parser.add_argument('--response-size', type=int, default=1024)
+    parser.add_argument('--payload-size', type=int, default=64 * 1024)
+    parser.add_argument('--pool-size', type=int, default=16)
+    parser.add_argument('--max-retries', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    stub_config = StubConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        rate_cap=args.rate_cap,
+        response_size=args.response_size,
+        retry_after=0.05,
+        seed=42,
+    )
+
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'AI_API_POOL_SIZE': args.pool_size,
+        'AI_API_MAX_RETRIES': args.max_retries,
+    })
+
+    file_record = File(
+        checksum='0' * 64,
+        original_filename='bench.pdf',
+        stored_filename='bench.pdf',
+        filepath='bench.pdf',
+        file_size=args.payload_size,
+        mime_type='application/pdf',
+        user_id=1
+    )
+    content = base64.b64encode(os.urandom(args.payload_size)).decode('utf-8')
+
+    with StubAIServer(stub_config) as server:
+        def operation(_):
+            response = AIService._send_to_ai_api(server.url, 'bench-key', file_record, content)
+            return 'ok' if response.get('success') else 'failed'
+
+        results = run_concurrently(operation, args.requests, args.concurrency, wrap=app.app_context)
+        stub_stats = server.stats()
+
+    results['stub_requests'] = stub_stats['requests']
+    results['stub_throttled'] = stub_stats['throttled'] + stub_stats['rate_capped']
+    results['stub_errors'] = stub_stats['errors']
+    results['stub_max_in_flight'] = stub_stats['max_in_flight']
+    results['bytes_sent'] = stub_stats['bytes_in']
+    print_report('AI API client', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
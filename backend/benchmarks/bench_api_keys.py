@@ -0,0 +1,89 @@
+# Benchmark API key verification against the alternatives
+"""
+Times one authentication of a machine client three ways: an API key found
+in the in-process cache, an API key looked up in the database (cache
+evicted before every check), and a password login as the bots did before
+API keys existed.
+
+    python benchmarks/bench_api_keys.py --iterations 20000 --keys 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.harness import percentile, print_report
+from app import create_app
+from app.extensions import db
+from app.models import User
+from app.services.api_key_service import ApiKeyService
+from app.services.password_service import PasswordService
+from app.utils.api_key_cache import get_api_key_cache
+
+
+def time_calls(operation, iterations):
+    """Call operation(i) iterations times; returns latencies in microseconds"""
+    micros = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        operation(i)
+        micros.append((time.perf_counter() - started) * 1e6)
+    return micros
+
+
+def report(title, micros):
+    print_report(title, {
+        'checks': len(micros),
+        'checks_per_s': round(len(micros) / (sum(micros) / 1e6)),
+        'p50_us': round(percentile(micros, 50), 1),
+        'p99_us': round(percentile(micros, 99), 1),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--keys', type=int, default=100)
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--method', default='scrypt:32768:8:1')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+        with app.app_context():
+            db.create_all()
+            user = User(username='bot', email='bot@example.com',
+                        password_hash=generate_password_hash('Bench123456', args.method))
+            db.session.add(user)
+            db.session.commit()
+            user_id, password_hash = user.id, user.password_hash
+            keys = [ApiKeyService.create_key(user_id, f'bot-{k}', ['files:read'])[1] for k in range(args.keys)]
+            cache = get_api_key_cache()
+
+            def cached(i):
+                assert ApiKeyService.authenticate(keys[i % len(keys)])
+
+            def uncached(i):
+                key = keys[i % len(keys)]
+                cache.evict(ApiKeyService.parse(key)[0])
+                assert ApiKeyService.authenticate(key)
+                db.session.remove()
+
+            def login(i):
+                assert PasswordService.verify(password_hash, 'Bench123456')[0]
+
+            for key in keys:
+                ApiKeyService.authenticate(key)
+            report('API key, cached', time_calls(cached, args.iterations))
+            report('API key, database lookup', time_calls(uncached, max(args.iterations // 10, 1)))
+            report(f'Password login ({args.method})', time_calls(login, args.logins))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
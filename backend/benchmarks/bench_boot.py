@@ -0,0 +1,127 @@
+# Benchmark first-request latency of a freshly started server against steady state
+"""
+Boots gunicorn the way a scale-up does, waits for the readiness probe, then
+times the first requests the new process serves and the same requests once
+it is warm. Each boot runs one worker so every request lands on it:
+
+- legacy: the previous Dockerfile command (sync worker, no config file)
+- cold: gunicorn.conf.py with GUNICORN_WARMUP=false
+- warm: gunicorn.conf.py, connections opened in post_fork
+
+The requests are an authenticated file listing (database) and an upload
+(storage and the stub AI provider). Local SQLite and the local stub make
+connections cheap; pass --database-url to include PostgreSQL's TCP/TLS setup.
+
+    python benchmarks/bench_boot.py --boots 5
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from benchmarks.bench_serving import BACKEND, free_port, prepare_database, stop_server
+from benchmarks.harness import percentile, print_report
+from scripts.stub_ai_server import StubAIServer, StubConfig
+
+MODES = ('legacy', 'cold', 'warm')
+
+
+def boot(mode, port, env, workdir, session):
+    if mode == 'legacy':
+        empty_config = os.path.join(workdir, 'empty.conf.py')
+        open(empty_config, 'w').close()
+        command = ['gunicorn', '-c', empty_config, '-w', '1', '-b', f'127.0.0.1:{port}', 'wsgi:app']
+    else:
+        env = dict(env, PORT=str(port), GUNICORN_WORKERS='1', GUNICORN_WARMUP=str(mode == 'warm'))
+        command = ['gunicorn', 'wsgi:app']
+    server = subprocess.Popen([sys.executable, '-m'] + command, cwd=BACKEND, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            # Like the Kubernetes readiness probe, the first request the process serves
+            if session.get(f'{base_url}/api/health/ready', timeout=5).status_code == 200:
+                return server, base_url
+        except requests.RequestException:
+            time.sleep(0.05)
+    stop_server(server)
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def timed_requests(session, base_url, token, count, start):
+    """Latency in ms of count (list, upload) pairs"""
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies = {'list': [], 'upload': []}
+    for i in range(start, start + count):
+        started = time.perf_counter()
+        session.get(f'{base_url}/api/files/', headers=headers, timeout=60).raise_for_status()
+        latencies['list'].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        files = {'file': (f'boot-{i}.txt', f'boot upload {i} {time.time_ns()}'.encode())}
+        response = session.post(f'{base_url}/api/files/upload', headers=headers, files=files, timeout=60)
+        assert response.status_code == 201, response.text
+        latencies['upload'].append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', choices=MODES + ('all',), default='all')
+    parser.add_argument('--boots', type=int, default=3)
+    parser.add_argument('--steady', type=int, default=50, help='requests per kind once warm')
+    parser.add_argument('--database-url', help='empty database to use instead of a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-boot-')
+    database_url = args.database_url or f'sqlite:///{os.path.join(workdir, "boot.db")}'
+    token = prepare_database(database_url)
+    modes = MODES if args.mode == 'all' else (args.mode,)
+    try:
+        with StubAIServer(StubConfig(response_size=256, seed=42)) as stub:
+            env = dict(os.environ, **{
+                'DATABASE_URL': database_url,
+                'LOCAL_STORAGE_PATH': os.path.join(workdir, 'files'),
+                'AI_API_URL': stub.url,
+                'AI_API_KEY': 'bench-key',
+                'RATE_LIMIT_ENABLED': 'false',
+                'REDIS_URL': '',
+                'REDIS_HOST': '',
+            })
+            counter = 0
+            for mode in modes:
+                first = {'list': [], 'upload': []}
+                steady = {'list': [], 'upload': []}
+                for _ in range(args.boots):
+                    # The probe's connection is reused, so only the server side is timed
+                    session = requests.Session()
+                    server, base_url = boot(mode, free_port(), env, workdir, session)
+                    try:
+                        for kind, ms in timed_requests(session, base_url, token, 1, counter).items():
+                            first[kind] += ms
+                        for kind, ms in timed_requests(session, base_url, token, args.steady,
+                                                       counter + 1).items():
+                            steady[kind] += ms
+                        counter += args.steady + 1
+                    finally:
+                        stop_server(server)
+                print_report(f'{mode} ({args.boots} boots)', {
+                    f'{kind}_{label}': f'{percentile(samples[kind], 50):.1f} ms'
+                    for kind in ('list', 'upload')
+                    for label, samples in (('first', first), ('steady', steady))
+                })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
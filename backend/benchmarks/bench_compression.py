@@ -0,0 +1,111 @@
+# Benchmark response compression: CPU time against bytes saved
+"""
+Encodes representative API bodies with every available encoder at a few
+levels and reports the compression ratio, the CPU time per body and the
+time the body would take over a link of --mbps, so the levels can be
+picked where the CPU spent is still repaid in transfer time:
+
+- processing_status: one file with a large processing_result (prose)
+- file_list: a page of --per-page files as List Files returns it
+- ai_history: a page of AI requests with their responses
+- small: a body just over COMPRESSION_MIN_SIZE
+
+brotli and zstd are reported only when their packages are installed.
+
+    python benchmarks/bench_compression.py --result-kb 64 --mbps 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import percentile, print_report
+from app import create_app
+from app.middleware.compression import ENCODERS
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 19)}
+
+WORDS = ('revenue quarter growth customer churn forecast pipeline region segment margin '
+         'invoice contract renewal expansion risk summary action owner deadline total').split()
+
+
+def prose(size, rng):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def build_payloads(app, args):
+    rng = random.Random(1234)
+    now = datetime(2024, 1, 1)
+
+    def file_dict(i, result=None):
+        checksum = '%064x' % rng.getrandbits(256)
+        return {
+            'checksum': checksum, 'filename': f'report-{i}.pdf', 'size': rng.randint(1000, 10 ** 7),
+            'mime_type': 'application/pdf', 'uploaded_at': now - timedelta(minutes=i),
+            'is_processed': True, 'processed_at': now - timedelta(minutes=i - 1),
+            'latest_request_id': 1000 + i, **({'processing_result': result} if result else {}),
+        }
+
+    def envelope(data):
+        return app.json.dumps_bytes({'data': data, 'message': 'Success', 'status': 'success'})
+
+    history = [{
+        'id': 1000 + i, 'file_checksum': '%064x' % rng.getrandbits(256), 'request_type': 'process',
+        'status': 'completed', 'response': json.dumps({'summary': prose(1024, rng)}),
+        'error_message': None, 'progress': 100, 'attempts': 1, 'max_attempts': 5,
+        'created_at': now, 'completed_at': now,
+    } for i in range(20)]
+    return {
+        'processing_status': envelope({'file': file_dict(0, prose(args.result_kb * 1024, rng))}),
+        'file_list': envelope({'files': [file_dict(i) for i in range(args.per_page)],
+                               'pagination': {'per_page': args.per_page, 'next_cursor': 'x' * 40}}),
+        'ai_history': envelope({'requests': history}),
+        'small': envelope({'file': file_dict(0, prose(800, rng))}),
+    }
+
+
+def measure(encode, body, level, repeat):
+    micros = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compressed = encode(body, level)
+        micros.append((time.perf_counter() - started) * 1e6)
+    return len(compressed), percentile(micros, 50)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--result-kb', type=int, default=64)
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--mbps', type=float, default=20, help='client link speed for transfer time')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    app = create_app('testing')
+    bytes_per_us = args.mbps * 1e6 / 8 / 1e6
+    print(f"Encoders: {', '.join(ENCODERS)}")
+    for name, body in build_payloads(app, args).items():
+        results = {'identity': f'{len(body)} B, transfer {len(body) / bytes_per_us / 1000:.2f} ms'}
+        for encoding, encode in ENCODERS.items():
+            for level in LEVELS[encoding]:
+                size, cpu_us = measure(encode, body, level, args.repeat)
+                total_ms = (cpu_us + size / bytes_per_us) / 1000
+                results[f'{encoding}:{level}'] = (f'{size} B ({len(body) / size:.1f}x), cpu {cpu_us:.0f} us, '
+                                                  f'{len(body) / cpu_us:.0f} MB/s, cpu+transfer {total_ms:.2f} ms')
+        print_report(f'{name} ({len(body) // 1024} KB)', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# Benchmark conditional (If-None-Match) polls against full responses
+"""
+Polls the metadata endpoints through the test client the way the dashboard
+does, once without validators (full 200 every time) and once sending back
+the ETag of the previous response (empty 304 while nothing changes).
+The file carries a large processing result, as processed files do.
+
+    python benchmarks/bench_conditional.py --iterations 2000 --result-kb 64
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+
+from benchmarks.bench_pagination import seed_files
+from benchmarks.harness import percentile, print_report
+from app import create_app
+from app.extensions import db
+from app.models import File
+
+
+def poll(client, url, headers, iterations, conditional):
+    """Request url repeatedly; returns latencies in microseconds and bytes received"""
+    micros, received, etag = [], 0, None
+    for _ in range(iterations):
+        request_headers = dict(headers, **{'If-None-Match': etag}) if conditional and etag else headers
+        started = time.perf_counter()
+        response = client.get(url, headers=request_headers)
+        received += len(response.get_data())
+        micros.append((time.perf_counter() - started) * 1e6)
+        assert response.status_code in (200, 304)
+        etag = response.headers['ETag']
+        db.session.remove()
+    return micros, received
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--result-kb', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+        with app.app_context():
+            db.create_all()
+            user_id = seed_files(args.files)
+            file_record = File.query.filter_by(user_id=user_id).first()
+            file_record.is_processed = True
+            file_record.processing_result = 'x' * (args.result_kb * 1024)
+            checksum = file_record.checksum
+            db.session.commit()
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+            client = app.test_client()
+            urls = {
+                'file': f'/api/files/{checksum}',
+                'processing-status': f'/api/files/{checksum}/processing-status',
+                'list': '/api/files/?per_page=100',
+            }
+            for name, url in urls.items():
+                for conditional in (False, True):
+                    micros, received = poll(client, url, headers, args.iterations, conditional)
+                    print_report(f"{name} ({'If-None-Match' if conditional else 'unconditional'})", {
+                        'polls': args.iterations,
+                        'p50_us': round(percentile(micros, 50), 1),
+                        'p99_us': round(percentile(micros, 99), 1),
+                        'kb_per_poll': round(received / args.iterations / 1024, 2),
+                    })
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
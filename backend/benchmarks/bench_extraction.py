@@ -0,0 +1,112 @@
+# Benchmark AI payload size and latency with and without local text extraction
+"""
+Processes synthetic DOCX documents through AIService.process_file against the
+stub AI server twice: once sending base64 file content and once sending only
+locally extracted text. The stub adds latency proportional to request size.
+
+    python benchmarks/bench_extraction.py --documents 50 --media-kb 512
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import print_report
+from scripts.stub_ai_server import StubAIServer, StubConfig
+from app import create_app
+from app.extensions import db
+from app.models import User, File
+from app.services.ai_service import AIService
+from app.services.extraction_service import TextExtractionService, DOCX_MIME_TYPE
+
+
+def build_docx(rng, paragraphs, media_kb):
+    """Build a DOCX with text paragraphs and an embedded binary media part"""
+    words = ['revenue', 'growth', 'quarter', 'customer', 'pipeline', 'forecast', 'margin']
+    body = ''.join(
+        '<w:p><w:r><w:t>' + ' '.join(rng.choice(words) for _ in range(40)) + '</w:t></w:r></w:p>'
+        for _ in range(paragraphs)
+    )
+    document = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('word/document.xml', document)
+        archive.writestr('word/media/image1.png', rng.randbytes(media_kb * 1024))
+    return buffer.getvalue()
+
+
+def run_pass(app, server, files, request_type):
+    server.state.reset_stats()
+    TextExtractionService.clear_cache()
+    started = time.perf_counter()
+    for file_record in files:
+        File.query.filter_by(checksum=file_record.checksum).update({'is_processed': False})
+        db.session.commit()
+        AIService.process_file(file_record.checksum, file_record.user_id, request_type=request_type)
+    elapsed = time.perf_counter() - started
+    stats = server.stats()
+    return {
+        'documents': len(files),
+        'elapsed_s': round(elapsed, 3),
+        'avg_latency_ms': round(elapsed / len(files) * 1000, 2),
+        'bytes_sent': stats['bytes_in'],
+        'avg_bytes_per_doc': stats['bytes_in'] // max(len(files), 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--paragraphs', type=int, default=200)
+    parser.add_argument('--media-kb', type=int, default=256)
+    parser.add_argument('--latency-per-kb', type=float, default=0.5)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'TEXT_EXTRACTION_WORKERS': args.workers,
+        'AI_API_KEY': 'bench-key',
+    })
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubAIServer(StubConfig(latency='fixed:20', latency_per_kb=args.latency_per_kb)) as server, \
+            app.app_context():
+        app.config['AI_API_URL'] = server.url
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+
+        files = []
+        for i in range(args.documents):
+            content = build_docx(rng, args.paragraphs, args.media_kb)
+            path = os.path.join(tmp, f'doc{i}.docx')
+            with open(path, 'wb') as f:
+                f.write(content)
+            file_record = File(
+                checksum=f'{i:064x}', original_filename=f'doc{i}.docx', stored_filename=f'doc{i}.docx',
+                filepath=path, file_size=len(content), mime_type=DOCX_MIME_TYPE, user_id=user.id
+            )
+            db.session.add(file_record)
+            files.append(file_record)
+        db.session.commit()
+
+        print_report('base64 file content', run_pass(app, server, files, 'ocr'))
+        print_report('extracted text only', run_pass(app, server, files, 'process'))
+        TextExtractionService.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
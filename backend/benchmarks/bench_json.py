@@ -0,0 +1,128 @@
+# Benchmark JSON serialization of a large file list
+"""
+Loads a user's files and serializes them as a list response three ways:
+
+- stdlib: the previous path, to_dict() with isoformat() on every datetime
+  and Flask's default provider (json module, sorted keys)
+- fast: the FastJSONProvider (orjson when installed) over the same list
+- streamed: streamed_list_response over a yield_per cursor, never holding
+  the whole list
+
+Reports the median time to produce the full body (query included) and the
+peak Python memory allocated while doing it (tracemalloc, separate run),
+then the time spent encoding alone, from already loaded rows.
+
+    python benchmarks/bench_json.py --items 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.bench_pagination import seed_files
+from benchmarks.harness import percentile, print_report
+from app import create_app
+from app.extensions import db
+from app.models import File
+from app.services.file_service import FileService
+from app.utils import json_provider
+from app.utils.fields import list_fields
+from app.utils.responses import streamed_list_response
+
+FIELDS = list_fields(File)
+
+
+def _legacy_dict(file_record):
+    """to_dict() as it was before the provider handled datetimes"""
+    return {name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in file_record.to_dict(FIELDS).items()}
+
+
+def build_modes(app, user_id):
+    legacy_provider = DefaultJSONProvider(app)
+
+    def load():
+        return FileService.get_user_files_page(user_id, per_page=10 ** 9, fields=FIELDS).items
+
+    def stdlib():
+        body = {'data': {'files': [_legacy_dict(f) for f in load()]}, 'message': 'ok', 'status': 'success'}
+        return legacy_provider.response(body).get_data()
+
+    def fast():
+        body = {'data': {'files': [f.to_dict(FIELDS) for f in load()]}, 'message': 'ok', 'status': 'success'}
+        return app.json.response(body).get_data()
+
+    def streamed():
+        response = streamed_list_response('files', FileService.iter_user_files(user_id, FIELDS),
+                                          lambda f: f.to_dict(FIELDS), message='ok')
+        return b''.join(response.response)
+
+    return {'stdlib': stdlib, 'fast': fast, 'streamed': streamed}
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        body = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    db.session.remove()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.remove()
+    return {
+        'body_kb': round(len(body) / 1024),
+        'median_ms': round(percentile(samples, 50), 1),
+        'peak_memory_mb': round(peak / 2 ** 20, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+        with app.app_context(), app.test_request_context():
+            db.create_all()
+            user_id = seed_files(args.items)
+            print(f"Encoder: {'orjson' if json_provider.orjson else 'json (orjson not installed)'}")
+            for mode, fn in build_modes(app, user_id).items():
+                print_report(f'{mode} ({args.items} files)', measure(fn, args.repeat))
+
+            files = FileService.get_user_files_page(user_id, per_page=10 ** 9, fields=FIELDS).items
+            legacy_provider = DefaultJSONProvider(app)
+            legacy_dicts = [_legacy_dict(f) for f in files]
+            dicts = [f.to_dict(FIELDS) for f in files]
+            encoders = {
+                'stdlib_ms': lambda: legacy_provider.dumps([_legacy_dict(f) for f in files]),
+                'fast_ms': lambda: app.json.dumps_bytes([f.to_dict(FIELDS) for f in files]),
+                'stdlib_dumps_only_ms': lambda: legacy_provider.dumps(legacy_dicts),
+                'fast_dumps_only_ms': lambda: app.json.dumps_bytes(dicts),
+            }
+            results = {}
+            for name, encode in encoders.items():
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    encode()
+                    samples.append((time.perf_counter() - started) * 1000)
+                results[name] = round(percentile(samples, 50), 1)
+            print_report('Encoding only (to_dict + dumps)', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
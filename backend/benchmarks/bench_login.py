@@ -0,0 +1,170 @@
+# Benchmark login throughput and collateral latency during a login storm
+"""
+Serves the app from a fixed pool of request threads (like a gthread worker),
+floods /api/auth/login from many clients and meanwhile probes a cheap
+non-auth endpoint. Compares hashing inline on the request thread with the
+bounded hashing process pool, which sheds excess logins with 503.
+
+    python benchmarks/bench_login.py --duration 10 --clients 32 --threads 8
+    python benchmarks/bench_login.py --mode pool --hash-workers 4 --max-pending 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from benchmarks.harness import LatencyRecorder, print_report
+from app import create_app
+from app.extensions import db
+from app.models import User
+from app.services.password_service import PasswordService
+
+PASSWORD = 'Bench123456'
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server handling requests on a fixed number of threads"""
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app, handler=_QuietRequestHandler)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def run_storm(base_url, users, clients, duration, probes):
+    """Log in continuously from clients threads while probes threads hit /api/health"""
+    logins, probe_latency = LatencyRecorder(), LatencyRecorder()
+    stop = threading.Event()
+
+    def login_loop(index):
+        session = requests.Session()
+        i = index
+        while not stop.is_set():
+            body = {'email': f'bench{i % users}@example.com', 'password': PASSWORD}
+            started = time.perf_counter()
+            retry_after = 0
+            try:
+                response = session.post(f'{base_url}/api/auth/login', json=body, timeout=60)
+                outcome = str(response.status_code)
+                retry_after = float(response.headers.get('Retry-After', 0))
+            except requests.RequestException as e:
+                outcome = f'exception:{type(e).__name__}'
+            logins.record(time.perf_counter() - started, outcome)
+            # Well-behaved clients wait as told before trying again
+            stop.wait(retry_after)
+            i += clients
+
+    def probe_loop(_):
+        session = requests.Session()
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                outcome = str(session.get(f'{base_url}/api/health/', timeout=60).status_code)
+            except requests.RequestException as e:
+                outcome = f'exception:{type(e).__name__}'
+            probe_latency.record(time.perf_counter() - started, outcome)
+            time.sleep(0.01)
+
+    with ThreadPoolExecutor(clients + probes) as pool:
+        futures = [pool.submit(login_loop, i) for i in range(clients)]
+        futures += [pool.submit(probe_loop, i) for i in range(probes)]
+        time.sleep(duration)
+        stop.set()
+        for future in futures:
+            future.result()
+    return logins, probe_latency
+
+
+def run_mode(mode, args, database_url):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'PASSWORD_HASH_METHOD': args.method,
+        'PASSWORD_HASH_WORKERS': args.hash_workers if mode == 'pool' else 0,
+        'PASSWORD_HASH_MAX_PENDING': args.max_pending,
+    })
+    server = PooledWSGIServer('127.0.0.1', 0, app, args.threads)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with app.app_context():
+            # Start the hashing workers before measuring
+            PasswordService.verify(generate_password_hash(PASSWORD, args.method), PASSWORD)
+        logins, probes = run_storm(f'http://127.0.0.1:{server.port}', args.users,
+                                   args.clients, args.duration, args.probes)
+    finally:
+        server.shutdown()
+        server.pool.shutdown()
+        with app.app_context():
+            PasswordService.shutdown()
+
+    login_summary = logins.summary(args.duration)
+    probe_summary = probes.summary(args.duration)
+    return {
+        'mode': mode,
+        'logins_per_s': round(login_summary['outcomes'].get('200', 0) / args.duration, 1),
+        'rejected_per_s': round(login_summary['outcomes'].get('503', 0) / args.duration, 1),
+        'login_outcomes': login_summary['outcomes'],
+        'login_p99_ms': login_summary['p99_ms'],
+        'health_p50_ms': probe_summary['p50_ms'],
+        'health_p99_ms': probe_summary['p99_ms'],
+        'health_max_ms': probe_summary['max_ms'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', choices=('inline', 'pool', 'both'), default='both')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--probes', type=int, default=2, help='concurrent /api/health clients')
+    parser.add_argument('--threads', type=int, default=8, help='server request threads')
+    parser.add_argument('--hash-workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--max-pending', type=int, default=0)
+    parser.add_argument('--method', default='scrypt:32768:8:1')
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': database_url})
+        with app.app_context():
+            db.create_all()
+            password_hash = generate_password_hash(PASSWORD, args.method)
+            db.session.execute(insert(User), [
+                {'username': f'bench{u}', 'email': f'bench{u}@example.com', 'password_hash': password_hash}
+                for u in range(args.users)
+            ])
+            db.session.commit()
+
+        modes = ('inline', 'pool') if args.mode == 'both' else (args.mode,)
+        for mode in modes:
+            print_report(f'Login storm ({args.clients} clients, {args.threads} request threads)',
+                         run_mode(mode, args, database_url))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# Benchmark offset vs keyset pagination of a large file list
+"""
+Seeds one user with many files and times fetching a shallow and a deep page
+with offset pagination (OFFSET + COUNT) and with keyset cursors.
+
+    python benchmarks/bench_pagination.py --rows 200000 --per-page 20
+    DATABASE_URL=postgresql://... python benchmarks/bench_pagination.py
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert
+
+from benchmarks.harness import percentile, print_report
+from app import create_app
+from app.extensions import db
+from app.models import User, File
+from app.services.file_service import FileService
+from app.utils.pagination import encode_cursor
+
+
+def seed_files(rows):
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        checksum = hashlib.sha256(str(i).encode()).hexdigest()
+        batch.append({
+            'checksum': checksum,
+            'original_filename': f'file{i}.txt',
+            'stored_filename': f'{checksum}.txt',
+            'filepath': f'uploads/{checksum}.txt',
+            'file_size': 1,
+            'mime_type': 'text/plain',
+            'user_id': user.id,
+            # Several files per second, so the checksum tie-breaker matters
+            'uploaded_at': start + timedelta(seconds=i // 4),
+            'is_processed': False,
+        })
+        if len(batch) == 10000:
+            db.session.execute(insert(File), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(File), batch)
+    db.session.commit()
+    return user.id
+
+
+def time_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(percentile(samples, 50) * 1000, 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': os.getenv(
+                'DATABASE_URL', f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            )
+        })
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            user_id = seed_files(args.rows)
+
+            deep_page = args.rows // args.per_page - 1
+            # Cursor pointing just before the deep page, as a client would hold it
+            anchor = File.query.filter_by(user_id=user_id)\
+                .order_by(File.uploaded_at.desc(), File.checksum.desc())\
+                .offset(deep_page * args.per_page - 1).first()
+            deep_cursor = encode_cursor([anchor.uploaded_at, anchor.checksum])
+
+            results = {'backend': db.engine.dialect.name, 'rows': args.rows, 'deep_page': deep_page + 1}
+            results['offset_page_1_ms'] = time_call(
+                lambda: FileService.get_user_files(user_id, 1, args.per_page), args.repeat)
+            results['offset_deep_ms'] = time_call(
+                lambda: FileService.get_user_files(user_id, deep_page + 1, args.per_page), args.repeat)
+            results['keyset_page_1_ms'] = time_call(
+                lambda: FileService.get_user_files_page(user_id, None, args.per_page), args.repeat)
+            results['keyset_deep_ms'] = time_call(
+                lambda: FileService.get_user_files_page(user_id, deep_cursor, args.per_page), args.repeat)
+            results['keyset_estimate_ms'] = time_call(
+                lambda: FileService.get_user_files_page(user_id, deep_cursor, args.per_page, 'estimate'),
+                args.repeat)
+
+            print_report('File list pagination (median)', results)
+            db.drop_all()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# Benchmark the per-request overhead of API rate limiting
+"""
+Times the rate limiter's before/after request hooks on authenticated
+requests to /api/files/ spread over many users, both with the in-process
+store and (when REDIS_URL is set) the shared Redis store, and reports the
+latency added per request. For comparison it also times a full JWT check,
+which the limiter skips for tokens it has already verified.
+
+    python benchmarks/bench_rate_limit.py --iterations 20000 --users 1000
+    REDIS_URL=redis://localhost:6379/0 python benchmarks/bench_rate_limit.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+from benchmarks.harness import LatencyRecorder, percentile, print_report
+from app import create_app
+from app.middleware import rate_limiter
+from app.utils.redis_client import get_redis
+
+
+def time_hooks(app, tokens, iterations, hooks):
+    """Run hooks in a request context for each request; returns a LatencyRecorder"""
+    recorder = LatencyRecorder()
+    for i in range(iterations):
+        headers = {'Authorization': f'Bearer {tokens[i % len(tokens)]}'}
+        with app.test_request_context('/api/files/', headers=headers):
+            started = time.perf_counter()
+            outcome = hooks()
+            recorder.record(time.perf_counter() - started, outcome)
+    return recorder
+
+
+def run_store(name, config, args):
+    app = create_app('testing', {
+        'JWT_SECRET_KEY': 'bench-secret-key-of-sufficient-length',
+        'RATE_LIMIT_ENABLED': True,
+        # High enough that every request is checked and allowed
+        'RATE_LIMIT': args.iterations * 10,
+        **config,
+    })
+    with app.app_context():
+        if name == 'redis' and get_redis() is None:
+            return None
+        tokens = [create_access_token(identity=str(u)) for u in range(args.users)]
+
+    def limiter_hooks():
+        denied = rate_limiter._check_rate_limit()
+        response = rate_limiter._add_rate_limit_headers(app.response_class())
+        if denied is not None:
+            return 'limited'
+        return 'ok' if 'X-RateLimit-Remaining' in response.headers else 'unchecked'
+
+    def jwt_only():
+        verify_jwt_in_request(optional=True)
+        return 'ok'
+
+    # Warm up (Redis script load, revocation list sync)
+    time_hooks(app, tokens, min(100, args.iterations), limiter_hooks)
+    jwt_check = time_hooks(app, tokens, args.iterations, jwt_only)
+    limit = time_hooks(app, tokens, args.iterations, limiter_hooks)
+    micros = [seconds * 1e6 for seconds in limit.latencies]
+    return {
+        'store': name,
+        'requests': len(micros),
+        'outcomes': limit.outcomes,
+        'jwt_check_p50_us': round(percentile([s * 1e6 for s in jwt_check.latencies], 50)),
+        'p50_us': round(percentile(micros, 50)),
+        'p95_us': round(percentile(micros, 95)),
+        'p99_us': round(percentile(micros, 99)),
+        'max_us': round(max(micros)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    stores = [('local', {})]
+    if os.getenv('REDIS_URL'):
+        stores.append(('redis', {'REDIS_URL': os.getenv('REDIS_URL')}))
+    for name, config in stores:
+        results = run_store(name, config, args)
+        if results is None:
+            print(f"\n== Skipping {name}: not configured")
+            continue
+        print_report(f'Rate limiter overhead per request ({args.users} users)', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
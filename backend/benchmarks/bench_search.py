@@ -0,0 +1,132 @@
+# Benchmark full-text search latency over a large corpus
+"""
+Seeds files spread over many users, with filenames and processing results
+drawn from a skewed vocabulary, then times per-user searches: a common word,
+a rare word, a short prefix, two words, and the page after the first.
+
+    python benchmarks/bench_search.py                  # 10M documents
+    python benchmarks/bench_search.py --rows 200000 --users 20
+    DATABASE_URL=postgresql://... python benchmarks/bench_search.py
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, text
+
+from benchmarks.harness import percentile, print_report
+from app import create_app
+from app.extensions import db
+from app.models import User, File
+from app.services.search_service import SearchService
+
+VOCABULARY_SIZE = 5000
+RESULT_WORDS = 40
+
+
+def _word(rank):
+    return f"w{rank}x"
+
+
+def seed_files(rows, users, seed=42):
+    rng = random.Random(seed)
+    db.session.execute(insert(User), [
+        {'username': f'bench{u}', 'email': f'bench{u}@example.com', 'password_hash': 'x'}
+        for u in range(users)
+    ])
+    db.session.commit()
+    # Zipf-like: a few words are very common, most are rare
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+    vocabulary = [_word(rank) for rank in range(VOCABULARY_SIZE)]
+
+    batch = []
+    for i in range(rows):
+        checksum = hashlib.sha256(str(i).encode()).hexdigest()
+        words = rng.choices(vocabulary, weights, k=RESULT_WORDS + 2)
+        batch.append({
+            'checksum': checksum,
+            'original_filename': f'{words[0]}-{words[1]}-{i}.pdf',
+            'stored_filename': f'{checksum}.pdf',
+            'filepath': f'uploads/{checksum}.pdf',
+            'file_size': 1,
+            'mime_type': 'application/pdf',
+            'user_id': i % users + 1,
+            'uploaded_at': datetime(2024, 1, 1),
+            'is_processed': True,
+            'processing_result': ' '.join(words[2:]),
+        })
+        if len(batch) == 10000:
+            db.session.execute(insert(File), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(insert(File), batch)
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def time_search(user_ids, q, per_page, cursor_page=False):
+    samples = []
+    for user_id in user_ids:
+        cursor = None
+        if cursor_page:
+            cursor = SearchService.search_files(user_id, q, per_page=per_page).next_cursor
+        started = time.perf_counter()
+        SearchService.search_files(user_id, q, cursor=cursor, per_page=per_page)
+        samples.append(time.perf_counter() - started)
+    return f"p50 {percentile(samples, 50) * 1000:.2f}  p95 {percentile(samples, 95) * 1000:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=50, help='users searched per query')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': os.getenv(
+                'DATABASE_URL', f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            )
+        })
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            started = time.perf_counter()
+            seed_files(args.rows, args.users)
+            seed_seconds = round(time.perf_counter() - started, 1)
+
+            user_ids = random.Random(7).sample(range(1, args.users + 1), min(args.samples, args.users))
+            results = {
+                'backend': db.engine.dialect.name,
+                'rows': args.rows,
+                'rows_per_user': args.rows // args.users,
+                'seed_s': seed_seconds,
+            }
+            queries = {
+                'common_word_ms': _word(0),
+                'rare_word_ms': _word(VOCABULARY_SIZE - 1),
+                'prefix_ms': 'w1',
+                'two_words_ms': f'{_word(3)} {_word(40)}',
+            }
+            for label, q in queries.items():
+                results[label] = time_search(user_ids, q, args.per_page)
+            results['common_word_page_2_ms'] = time_search(user_ids, _word(0), args.per_page, cursor_page=True)
+
+            print_report('Full-text search per user', results)
+            db.drop_all()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# Benchmark concurrent connection capacity: sync gunicorn workers vs. asgi.py
+"""
+Starts the production app under each serving mode as a real server process
+and holds --clients connections open, each uploading files back to back.
+Uploads call the stub AI provider inline (--latency), so every request
+spends most of its time waiting on I/O, the case where sync workers run out
+of request slots long before they run out of CPU:
+
+- sync: gunicorn -w --workers wsgi:app (one request per process)
+- asgi: uvicorn asgi:app --workers --workers (ASGI_THREADS requests per
+  process, storage and AI I/O on the event loop)
+
+Reports throughput, latency and the servers' resident memory at idle and
+under load; mem_per_connection is the growth divided by --clients. SQLite
+serializes writers, so with many clients some uploads fail on its lock;
+pass --database-url to measure against PostgreSQL.
+
+    python benchmarks/bench_serving.py --clients 64 --latency fixed:200 --duration 15
+"""
+import argparse
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from benchmarks.harness import LatencyRecorder, print_report
+from scripts.stub_ai_server import StubAIServer, StubConfig
+from app import create_app
+from app.extensions import db
+from app.models import User
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_tree_rss_kb(pid):
+    """Resident memory of a process and all its descendants (Linux /proc)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, ()))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            pass
+    return total
+
+
+def prepare_database(database_url):
+    """Create the schema and one user; return an access token for it"""
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': database_url})
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User).values(
+            username='bench', email='bench@example.com', password_hash='x'))
+        db.session.commit()
+        user_id = db.session.query(User.id).scalar()
+        token = create_access_token(identity=str(user_id))
+        db.engine.dispose()
+    return token
+
+
+def start_server(mode, port, args, env):
+    if mode == 'sync':
+        command = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers),
+                   '-b', f'127.0.0.1:{port}', '--timeout', '120', 'wsgi:app']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--workers', str(args.workers),
+                   '--host', '127.0.0.1', '--port', str(port),
+                   '--timeout-keep-alive', '120', '--no-access-log']
+    server = subprocess.Popen(command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, start_new_session=True)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{base_url}/api/health/', timeout=1)
+            return server, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+
+def run_load(base_url, token, clients, duration, server_pid):
+    """Upload from clients connections for duration seconds; sample the server's RSS meanwhile"""
+    recorder = LatencyRecorder()
+    stop = threading.Event()
+    peak_rss = [0]
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def client_loop(index):
+        session = requests.Session()
+        i = 0
+        while not stop.is_set():
+            content = f'client {index} upload {i}\n'.encode() * 64
+            started = time.perf_counter()
+            try:
+                response = session.post(f'{base_url}/api/files/upload', headers=headers, timeout=120,
+                                        files={'file': (f'c{index}-{i}.txt', content)})
+                outcome = str(response.status_code)
+            except requests.RequestException as e:
+                outcome = f'exception:{type(e).__name__}'
+            recorder.record(time.perf_counter() - started, outcome)
+            i += 1
+
+    def sample_rss():
+        while not stop.wait(0.25):
+            peak_rss[0] = max(peak_rss[0], process_tree_rss_kb(server_pid))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients + 1) as pool:
+        futures = [pool.submit(client_loop, i) for i in range(clients)]
+        futures.append(pool.submit(sample_rss))
+        time.sleep(duration)
+        stop.set()
+        for future in futures:
+            future.result()
+    # Uploads in flight at the deadline still count, over the time they took to finish
+    return recorder.summary(time.perf_counter() - started), peak_rss[0]
+
+
+def run_mode(mode, args, stub_url, workdir):
+    database_url = args.database_url or f'sqlite:///{os.path.join(workdir, mode + ".db")}'
+    token = prepare_database(database_url)
+    env = dict(os.environ, **{
+        'DATABASE_URL': database_url,
+        'LOCAL_STORAGE_PATH': os.path.join(workdir, mode + '-files'),
+        'AI_API_URL': stub_url,
+        'AI_API_KEY': 'bench-key',
+        'AI_API_POOL_SIZE': str(args.clients),
+        'ASGI_THREADS': str(args.threads),
+        'DB_POOL_SIZE': str(args.threads),
+        'RATE_LIMIT_ENABLED': 'false',
+        'TEXT_EXTRACTION_WORKERS': '0',
+        'PASSWORD_HASH_WORKERS': '0',
+        'STORAGE_PURGE_WORKERS': '0',
+        'REDIS_URL': '',
+        'REDIS_HOST': '',
+    })
+    server, base_url = start_server(mode, free_port(), args, env)
+    try:
+        idle_rss = process_tree_rss_kb(server.pid)
+        summary, peak_rss = run_load(base_url, token, args.clients, args.duration, server.pid)
+    finally:
+        stop_server(server)
+
+    return {
+        'mode': mode,
+        'uploads_per_s': round(summary['outcomes'].get('201', 0) / summary['elapsed_s'], 1),
+        'outcomes': summary['outcomes'],
+        'p50_ms': summary['p50_ms'],
+        'p99_ms': summary['p99_ms'],
+        'idle_rss_mb': round(idle_rss / 1024, 1),
+        'peak_rss_mb': round(peak_rss / 1024, 1),
+        'mem_per_connection': f'{max(0, peak_rss - idle_rss) / args.clients:.0f} KB',
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', choices=('sync', 'asgi', 'both'), default='both')
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=4, help='server processes in either mode')
+    parser.add_argument('--threads', type=int, default=32, help='ASGI_THREADS per asgi worker')
+    parser.add_argument('--latency', default='fixed:200', help='stub AI provider latency')
+    parser.add_argument('--database-url', help='empty database to use instead of a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-serving-')
+    modes = ('sync', 'asgi') if args.mode == 'both' else (args.mode,)
+    try:
+        with StubAIServer(StubConfig(latency=args.latency, response_size=256, seed=42)) as stub:
+            for mode in modes:
+                print_report(f'{mode} ({args.workers} workers, {args.clients} clients)',
+                             run_mode(mode, args, stub.url, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
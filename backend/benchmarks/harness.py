@@ -0,0 +1,80 @@
+# Shared helpers for benchmark scripts
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of numbers (nearest rank)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LatencyRecorder:
+    """Thread-safe collector of per-operation latencies and outcomes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.outcomes = {}
+
+    def record(self, seconds, outcome='ok'):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def summary(self, elapsed):
+        ms = [s * 1000 for s in self.latencies]
+        return {
+            'operations': len(ms),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_per_s': round(len(ms) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(percentile(ms, 50), 2),
+            'p95_ms': round(percentile(ms, 95), 2),
+            'p99_ms': round(percentile(ms, 99), 2),
+            'max_ms': round(max(ms), 2) if ms else 0.0,
+            'outcomes': dict(self.outcomes),
+        }
+
+
+def run_concurrently(operation, total, concurrency, wrap=None):
+    """
+    Run operation(i) total times across concurrency threads.
+    operation returns an outcome label (or None for 'ok').
+    wrap, if given, is a context manager factory entered once per worker call
+    (e.g. app.app_context).
+    Returns: summary dict
+    """
+    recorder = LatencyRecorder()
+
+    def _call(i):
+        started = time.perf_counter()
+        try:
+            if wrap is not None:
+                with wrap():
+                    outcome = operation(i)
+            else:
+                outcome = operation(i)
+        except Exception as e:
+            outcome = f"exception:{type(e).__name__}"
+        recorder.record(time.perf_counter() - started, outcome or 'ok')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(_call, range(total)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+def print_report(title, results):
+    """Print benchmark results as an aligned table"""
+    print(f"\n== {title}")
+    for key, value in results.items():
+        print(f"  {key:<20} {value}")
@@ -0,0 +1,156 @@
+"""
+Gunicorn configuration for production (gunicorn wsgi:app picks it up)
+
+Workers and threads follow the container's CPU quota (cgroup v2 cpu.max or
+v1 cfs quota), falling back to the CPUs the process may run on. Every
+setting can be pinned with a GUNICORN_* environment variable:
+
+    GUNICORN_WORKER_CLASS   gthread (default), gevent or sync
+    GUNICORN_WORKERS        default: 2 per CPU of quota, at least 2
+    GUNICORN_THREADS        gthread threads per worker (default 8)
+    GUNICORN_WORKER_CONNECTIONS  gevent greenlets per worker (default 15)
+    GUNICORN_MAX_REQUESTS   recycle a worker after this many requests (0 = never)
+    GUNICORN_PRELOAD        import the app once in the master (default true)
+    GUNICORN_WARMUP         open connections in each worker before it serves (default true)
+
+Each worker also runs TEXT_EXTRACTION_WORKERS and PASSWORD_HASH_WORKERS
+spawned processes (~80 MB each, started by the warmup). Unless set, both
+are the CPU quota shared out among the workers, at least one: more
+CPU-bound processes than CPUs only add memory. Per pod that makes
+
+    memory ~ workers * (worker RSS + 80 MB * (extraction + hashing processes))
+
+The default 0.5 CPU / 1 GiB pod runs 2 workers with 1 + 1 processes each,
+about 320 MB in spawned processes; pinning the pools higher multiplies that.
+
+Prometheus metrics are kept per worker in files under PROMETHEUS_MULTIPROC_DIR
+(default /tmp/prometheus-multiproc, emptied at startup) and merged on scrape.
+
+Keep threads (or gevent connections) within DB_POOL_SIZE + DB_MAX_OVERFLOW:
+requests past the pool wait DB_POOL_TIMEOUT for a connection.
+"""
+import math
+import os
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    return value.lower() in ('1', 'true', 'yes') if value not in (None, '') else default
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_quota(cgroup_root='/sys/fs/cgroup'):
+    """CPUs this container may use: the cgroup quota, else the CPUs in its affinity mask"""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read(os.path.join(cgroup_root, 'cpu.max'))
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+    # cgroup v1: quota is -1 when unlimited
+    quota = _read(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_quota_us'))
+    period = _read(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_period_us'))
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    try:
+        return float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return float(os.cpu_count() or 1)
+
+
+cpus = cpu_quota()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+# Two per CPU keeps a worker serving while another one is recycled or stuck
+# on the GIL; below one CPU that still means two processes sharing it
+workers = _env_int('GUNICORN_WORKERS', max(2, math.ceil(2 * cpus)))
+threads = _env_int('GUNICORN_THREADS', 8) if worker_class == 'gthread' else 1
+# The web pool profile's 10 + 5 database connections
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 15)
+
+# Read by the app's config, so set before the app is loaded
+process_pool_workers = str(max(1, math.floor(cpus / workers)))
+os.environ.setdefault('TEXT_EXTRACTION_WORKERS', process_pool_workers)
+os.environ.setdefault('PASSWORD_HASH_WORKERS', process_pool_workers)
+
+# Copy-on-write: the app and its imports are loaded once and shared
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+# Bound slow growth in long-lived workers; jitter keeps them from restarting together
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+# AI calls run inline and may retry for longer than gunicorn's 30s default
+timeout = _env_int('GUNICORN_TIMEOUT', 180)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Longer than the ingress' idle timeout so it never reuses a closed connection
+keepalive = _env_int('GUNICORN_KEEPALIVE', 75)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+warmup = _env_bool('GUNICORN_WARMUP', True)
+
+# prometheus_client picks its storage when first imported, so this has to be
+# set before the app loads; files left by a previous run would be added in
+multiproc_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+os.makedirs(multiproc_dir, exist_ok=True)
+for name in os.listdir(multiproc_dir):
+    if name.endswith('.db'):
+        os.remove(os.path.join(multiproc_dir, name))
+
+if worker_class == 'gevent' and preload_app:
+    # The preloaded app creates locks and sockets in the master, before the
+    # gevent worker would patch the standard library, so patch it here first
+    from gevent import monkey
+
+    monkey.patch_all()
+
+
+def _patch_psycopg():
+    # psycopg2 waits on its socket in C, blocking every greenlet in the
+    # worker during a query; this makes it yield to the gevent hub instead
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
+
+
+def when_ready(server):
+    """Finish the app's one-off setup in the master so the workers share it"""
+    if preload_app:
+        from app.utils.warmup import preload
+
+        preload(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    """Give the new worker its own connections before it accepts requests"""
+    from app.utils.warmup import reset_after_fork, warm_up
+
+    if worker_class == 'gevent':
+        _patch_psycopg()
+    app = server.app.wsgi()
+    reset_after_fork(app)
+    if warmup:
+        results = warm_up(app, connections=worker_connections if worker_class == 'gevent' else threads)
+        server.log.info("Worker %s warmed up: %s", worker.pid, results)
+
+
+def child_exit(server, worker):
+    """Drop the exited worker's live gauges from the merged metrics"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
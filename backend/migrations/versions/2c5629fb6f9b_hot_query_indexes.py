@@ -0,0 +1,40 @@
+"""hot query indexes
+
+Revision ID: 2c5629fb6f9b
+Revises: 5fca45dfaba3
+Create Date: 2026-10-18 22:43:55.383993
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c5629fb6f9b'
+down_revision = '5fca45dfaba3'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_ai_requests_file_created', 'ai_requests', ['file_checksum', 'created_at']),
+    ('ix_ai_requests_status_lease', 'ai_requests', ['status', 'lease_expires_at']),
+    ('ix_ai_requests_status_next_attempt', 'ai_requests', ['status', 'next_attempt_at']),
+)
+
+
+def upgrade():
+    # Build without blocking writes on PostgreSQL; CONCURRENTLY cannot run in a transaction
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True,
+                                if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
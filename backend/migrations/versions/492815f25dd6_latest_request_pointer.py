@@ -0,0 +1,41 @@
+"""latest request pointer
+
+Revision ID: 492815f25dd6
+Revises: 2c5629fb6f9b
+Create Date: 2026-10-18 22:46:10.973243
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '492815f25dd6'
+down_revision = '2c5629fb6f9b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latest_request_id', sa.Integer(), nullable=True))
+
+    # Backfill from history; served by ix_ai_requests_file_created
+    op.execute("""
+        UPDATE files SET latest_request_id = (
+            SELECT ai_requests.id FROM ai_requests
+            WHERE ai_requests.file_checksum = files.checksum
+            ORDER BY ai_requests.created_at DESC, ai_requests.id DESC
+            LIMIT 1
+        )
+    """)
+
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_files_latest_request_id', 'ai_requests',
+                                    ['latest_request_id'], ['id'], use_alter=True)
+
+
+def downgrade():
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_files_latest_request_id', type_='foreignkey')
+        batch_op.drop_column('latest_request_id')
@@ -0,0 +1,150 @@
+"""partition ai_requests by month
+
+Revision ID: 4a5dc7aa02d4
+Revises: dedd887da031
+Create Date: 2026-10-18 23:01:51.505042
+
+"""
+from datetime import datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a5dc7aa02d4'
+down_revision = 'dedd887da031'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created beyond the current month; later ones are
+# created by scripts/archive_ai_requests.py
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    'id, file_checksum, user_id, request_type, prompt, response, status, error_message, '
+    'attempts, max_attempts, lease_expires_at, next_attempt_at, chunks_total, chunks_completed, '
+    'created_at, completed_at'
+)
+
+CREATE_TABLE = """
+    CREATE TABLE ai_requests (
+        id INTEGER NOT NULL DEFAULT nextval('ai_requests_id_seq'),
+        file_checksum VARCHAR(64) NOT NULL REFERENCES files (checksum),
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        request_type VARCHAR(50) NOT NULL,
+        prompt TEXT,
+        response TEXT,
+        status VARCHAR(20),
+        error_message TEXT,
+        attempts INTEGER NOT NULL,
+        max_attempts INTEGER NOT NULL,
+        lease_expires_at TIMESTAMP WITHOUT TIME ZONE,
+        next_attempt_at TIMESTAMP WITHOUT TIME ZONE,
+        chunks_total INTEGER,
+        chunks_completed INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        completed_at TIMESTAMP WITHOUT TIME ZONE,
+        CONSTRAINT ai_requests_pkey PRIMARY KEY ({primary_key})
+    ) {partitioning}
+"""
+
+INDEXES = (
+    ('ix_ai_requests_user_created', ['user_id', 'created_at', 'id']),
+    ('ix_ai_requests_file_created', ['file_checksum', 'created_at']),
+    ('ix_ai_requests_status_lease', ['status', 'lease_expires_at']),
+    ('ix_ai_requests_status_next_attempt', ['status', 'next_attempt_at']),
+)
+
+
+def _month(value, offset=0):
+    months = value.year * 12 + value.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1)
+
+
+def _replace_table(old_name, partitioned):
+    """Recreate ai_requests (partitioned or not) and move the rows over"""
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='ai_requests')
+    op.execute(f'ALTER TABLE ai_requests RENAME TO {old_name}')
+    op.execute(f'ALTER TABLE {old_name} RENAME CONSTRAINT ai_requests_pkey TO {old_name}_pkey')
+    # The id sequence outlives the old table
+    op.execute('ALTER SEQUENCE ai_requests_id_seq OWNED BY NONE')
+
+    if partitioned:
+        # The partition key must be part of the primary key
+        op.execute(CREATE_TABLE.format(primary_key='id, created_at',
+                                       partitioning='PARTITION BY RANGE (created_at)'))
+        first = None
+        if not context.is_offline_mode():
+            first = op.get_bind().execute(sa.text(f'SELECT min(created_at) FROM {old_name}')).scalar()
+        start, end = _month(first or datetime.utcnow()), _month(datetime.utcnow(), MONTHS_AHEAD + 1)
+        while start < end:
+            op.execute(
+                f"CREATE TABLE ai_requests_p{start:%Y%m} PARTITION OF ai_requests "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{_month(start, 1):%Y-%m-%d}')"
+            )
+            start = _month(start, 1)
+        # Catches rows outside every monthly partition instead of failing the insert
+        op.execute('CREATE TABLE ai_requests_default PARTITION OF ai_requests DEFAULT')
+    else:
+        op.execute(CREATE_TABLE.format(primary_key='id', partitioning=''))
+
+    op.execute(f'INSERT INTO ai_requests ({COLUMNS}) SELECT {COLUMNS} FROM {old_name}')
+    op.execute(f'DROP TABLE {old_name}')
+    op.execute('ALTER SEQUENCE ai_requests_id_seq OWNED BY ai_requests.id')
+    for name, columns in INDEXES:
+        op.create_index(name, 'ai_requests', columns)
+
+
+def upgrade():
+    op.create_table('ai_request_archives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('label', sa.String(length=64), nullable=False),
+    sa.Column('range_start', sa.DateTime(), nullable=False),
+    sa.Column('range_end', sa.DateTime(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('storage_path', sa.String(length=500), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ai_request_archives', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ai_request_archives_label'), ['label'], unique=False)
+
+    # created_at becomes the partition key and may not be NULL
+    op.execute('UPDATE ai_requests SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('ai_requests', schema=None) as batch_op:
+            batch_op.alter_column('created_at',
+                   existing_type=sa.DATETIME(),
+                   nullable=False)
+        return
+
+    # A partitioned table can only be referenced through a unique key that
+    # includes created_at, so files.latest_request_id becomes a plain pointer
+    op.drop_constraint('fk_files_latest_request_id', 'files', type_='foreignkey')
+    _replace_table('ai_requests_unpartitioned', partitioned=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        _replace_table('ai_requests_partitioned', partitioned=False)
+        # Pointers to archived requests have nothing left to reference
+        op.execute("""
+            UPDATE files SET latest_request_id = NULL
+            WHERE latest_request_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM ai_requests WHERE ai_requests.id = files.latest_request_id)
+        """)
+        op.create_foreign_key('fk_files_latest_request_id', 'files', 'ai_requests',
+                              ['latest_request_id'], ['id'])
+    else:
+        with op.batch_alter_table('ai_requests', schema=None) as batch_op:
+            batch_op.alter_column('created_at',
+                   existing_type=sa.DATETIME(),
+                   nullable=True)
+
+    with op.batch_alter_table('ai_request_archives', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ai_request_archives_label'))
+
+    op.drop_table('ai_request_archives')
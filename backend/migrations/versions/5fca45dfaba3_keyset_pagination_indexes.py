@@ -0,0 +1,39 @@
+"""keyset pagination indexes
+
+Revision ID: 5fca45dfaba3
+Revises: 68cc4a388bcc
+Create Date: 2026-10-18 22:42:33.492507
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5fca45dfaba3'
+down_revision = '68cc4a388bcc'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_files_user_uploaded', 'files', ['user_id', 'uploaded_at', 'checksum']),
+    ('ix_ai_requests_user_created', 'ai_requests', ['user_id', 'created_at', 'id']),
+)
+
+
+def upgrade():
+    # Build without blocking writes on PostgreSQL; CONCURRENTLY cannot run in a transaction
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True,
+                                if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,41 @@
+"""recovery, chunking and admin columns
+
+Revision ID: 68cc4a388bcc
+Revises: 0d8fa91e5ccf
+Create Date: 2026-10-19 01:10:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '68cc4a388bcc'
+down_revision = '0d8fa91e5ccf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Server defaults fill in existing rows of the NOT NULL columns
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_admin', sa.Boolean(), nullable=False, server_default=sa.false()))
+    with op.batch_alter_table('ai_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='5'))
+        batch_op.add_column(sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('chunks_total', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('chunks_completed', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ai_requests', schema=None) as batch_op:
+        batch_op.drop_column('chunks_completed')
+        batch_op.drop_column('chunks_total')
+        batch_op.drop_column('next_attempt_at')
+        batch_op.drop_column('lease_expires_at')
+        batch_op.drop_column('max_attempts')
+        batch_op.drop_column('attempts')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('is_admin')
@@ -0,0 +1,84 @@
+"""full-text search index on files
+
+Revision ID: d240af0df1bf
+Revises: 4a5dc7aa02d4
+Create Date: 2026-10-18 23:08:46.629238
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd240af0df1bf'
+down_revision = '4a5dc7aa02d4'
+branch_labels = None
+depends_on = None
+
+
+POSTGRES_UPGRADE = (
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    # Adding a stored generated column rewrites the table once
+    """
+    ALTER TABLE files ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple',
+            regexp_replace(original_filename, '[^[:alnum:]]+', ' ', 'g')), 'A') ||
+        setweight(to_tsvector('simple',
+            regexp_replace(left(coalesce(processing_result, ''), 100000),
+                           '[^[:alnum:]]+', ' ', 'g')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ix_files_search ON files USING gin (user_id, search_vector)",
+)
+
+SQLITE_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE files_fts USING fts5(
+        user_id, original_filename, processing_result,
+        content='files', content_rowid='rowid', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER files_fts_insert AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts (rowid, user_id, original_filename, processing_result)
+        VALUES (new.rowid, new.user_id, new.original_filename, new.processing_result);
+    END
+    """,
+    """
+    CREATE TRIGGER files_fts_delete AFTER DELETE ON files BEGIN
+        INSERT INTO files_fts (files_fts, rowid, user_id, original_filename, processing_result)
+        VALUES ('delete', old.rowid, old.user_id, old.original_filename, old.processing_result);
+    END
+    """,
+    """
+    CREATE TRIGGER files_fts_update
+    AFTER UPDATE OF user_id, original_filename, processing_result ON files BEGIN
+        INSERT INTO files_fts (files_fts, rowid, user_id, original_filename, processing_result)
+        VALUES ('delete', old.rowid, old.user_id, old.original_filename, old.processing_result);
+        INSERT INTO files_fts (rowid, user_id, original_filename, processing_result)
+        VALUES (new.rowid, new.user_id, new.original_filename, new.processing_result);
+    END
+    """,
+    # Index the existing rows
+    "INSERT INTO files_fts (files_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX ix_files_search')
+        op.execute('ALTER TABLE files DROP COLUMN search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('files_fts_insert', 'files_fts_delete', 'files_fts_update'):
+            op.execute(f'DROP TRIGGER {trigger}')
+        op.execute('DROP TABLE files_fts')
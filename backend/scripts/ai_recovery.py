@@ -0,0 +1,46 @@
+# AI request recovery worker
+"""
+Reaps AI requests abandoned by crashed workers and runs scheduled retries.
+
+    python scripts/ai_recovery.py            # loop forever
+    python scripts/ai_recovery.py --once     # single pass (e.g. from cron)
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.recovery_service import RecoveryService
+
+
+def run_recovery(once=False, interval=15, retry_limit=100):
+    """Run reaper and retry scheduler passes"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        while True:
+            started = time.monotonic()
+            rescheduled, dead_lettered = RecoveryService.reap_expired_leases()
+            succeeded, failed = RecoveryService.process_due_retries(retry_limit)
+            print(
+                f"Recovery pass: {rescheduled} rescheduled, {dead_lettered} dead-lettered, "
+                f"{succeeded} retries succeeded, {failed} retries failed "
+                f"({time.monotonic() - started:.2f}s)",
+                flush=True
+            )
+            if once:
+                return
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reap stuck AI requests and run retries')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    parser.add_argument('--interval', type=float, default=15, help='Seconds between passes')
+    parser.add_argument('--retry-limit', type=int, default=100, help='Retries to run per pass')
+    args = parser.parse_args()
+    run_recovery(args.once, args.interval, args.retry_limit)
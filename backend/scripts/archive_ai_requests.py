@@ -0,0 +1,46 @@
+# AI request partition maintenance and archival
+"""
+Creates upcoming monthly ai_requests partitions and moves months older than
+AI_REQUEST_RETENTION_MONTHS to archive storage.
+
+    python scripts/archive_ai_requests.py            # loop forever
+    python scripts/archive_ai_requests.py --once     # single pass (e.g. from cron)
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.archive_service import ArchiveService
+
+
+def run_archival(once=False, interval=86400):
+    """Run partition maintenance and archival passes"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        while True:
+            started = time.monotonic()
+            created = ArchiveService.ensure_partitions()
+            archives = ArchiveService.archive_expired()
+            print(
+                f"Archival pass: {len(created)} partitions created, {len(archives)} months archived "
+                f"({sum(archive.row_count for archive in archives)} requests) "
+                f"({time.monotonic() - started:.2f}s)",
+                flush=True
+            )
+            if once:
+                return
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain and archive AI request partitions')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    parser.add_argument('--interval', type=float, default=86400, help='Seconds between passes')
+    args = parser.parse_args()
+    run_archival(args.once, args.interval)
@@ -0,0 +1,47 @@
+# Usage counter reconciliation job
+"""
+Recomputes per-user usage counters from files and ai_requests, repairing any
+drift in the incrementally maintained values.
+
+    python scripts/reconcile_usage.py                  # loop forever
+    python scripts/reconcile_usage.py --once           # single pass (e.g. from cron)
+    python scripts/reconcile_usage.py --once --user 42 # one user
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.usage_service import UsageService
+
+
+def run_reconcile(once=False, interval=3600, user_ids=None, batch_size=None):
+    """Run reconciliation passes"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        while True:
+            started = time.monotonic()
+            users = UsageService.reconcile(user_ids, batch_size)
+            print(
+                f"Usage reconciliation: {users} users ({time.monotonic() - started:.2f}s)",
+                flush=True
+            )
+            if once:
+                return
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recompute per-user usage counters')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    parser.add_argument('--interval', type=float, default=3600, help='Seconds between passes')
+    parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                        help='Only reconcile this user (repeatable)')
+    parser.add_argument('--batch-size', type=int, help='Users per transaction')
+    args = parser.parse_args()
+    run_reconcile(args.once, args.interval, args.user_ids, args.batch_size)
@@ -1,26 +1,352 @@
-# Seed test data script
-import sys
+# Synthetic data generator for benchmark-scale datasets
+"""
+Fills an empty database with users, files and AI requests at production-like
+volumes: per-user file counts follow a Pareto distribution, file sizes a
+lognormal one, and each file has a skewed number of AI requests. The same
+--seed always produces the same rows, so benchmark runs are comparable.
+
+    python scripts/seed_data.py                                   # 100k files
+    python scripts/seed_data.py --users 20000 --files 2000000 --requests-per-file 10
+    python scripts/seed_data.py --files 50000 --blobs --blob-workers 16
+
+Rows are written with multi-row INSERTs, or COPY on PostgreSQL. --blobs also
+writes each file's bytes (of its recorded size) to the storage backend in
+parallel. Checksums identify the synthetic rows and are not content hashes.
+Every seeded user's password is Seed123456.
+"""
+import argparse
+import csv
+import hashlib
+import io
+import math
 import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Optional
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy import func, insert, select, text, update
+from werkzeug.security import generate_password_hash
+
 from app import create_app
 from app.extensions import db
+from app.models import AIRequest, File, User
+from app.services.archive_service import ArchiveService
+from app.services.storage_service import StorageService
+from app.services.usage_service import UsageService
 
+SEED_PASSWORD = 'Seed123456'
 
-def seed_data():
-    """Seed database with test data"""
-    app = create_app()
+# (mime type, extension, share of uploads)
+MIME_TYPES = (
+    ('application/pdf', 'pdf', 35),
+    ('text/plain', 'txt', 20),
+    ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'docx', 15),
+    ('image/png', 'png', 10),
+    ('image/jpeg', 'jpg', 8),
+    ('text/csv', 'csv', 7),
+    ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx', 5),
+)
 
-    with app.app_context():
-        print("Seeding database with test data...")
+# Status of each AI request and its share
+REQUEST_STATUSES = (
+    ('completed', 85),
+    ('failed', 6),
+    ('dead_letter', 2),
+    ('retrying', 3),
+    ('processing', 2),
+    ('pending', 2),
+)
+
+WORDS = (
+    'report', 'invoice', 'contract', 'summary', 'revenue', 'quarterly', 'annual', 'budget',
+    'forecast', 'meeting', 'notes', 'project', 'proposal', 'customer', 'supplier', 'payment',
+    'policy', 'review', 'analysis', 'market', 'sales', 'growth', 'risk', 'compliance', 'audit',
+    'team', 'roadmap', 'product', 'release', 'design', 'research', 'survey', 'results', 'plan',
+    'strategy', 'legal', 'finance', 'hiring', 'training', 'security', 'incident', 'support',
+)
+
+
+@dataclass
+class SeedConfig:
+    """Volumes and distributions of the generated data"""
+    users: int = 1000
+    files: int = 100000
+    requests_per_file: float = 3.0
+    seed: int = 42
+    # Pareto shape for files per user; ~1.16 gives the 80/20 rule
+    skew: float = 1.16
+    median_file_kb: float = 64.0
+    max_file_kb: int = 16384
+    # Uploads are spread over this many days before end
+    days: int = 365
+    end: Optional[datetime] = None
+    batch_size: int = 10000
+    blobs: bool = False
+    blob_workers: int = 8
+    # insert, copy (PostgreSQL only) or auto
+    method: str = 'auto'
+
+
+class DataGenerator:
+    """Deterministic rows for a SeedConfig; ids are assigned from 1 upwards"""
+
+    def __init__(self, config: SeedConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.end = config.end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        weights = [self.rng.paretovariate(config.skew) for _ in range(config.users)]
+        self.user_cum_weights = list(_accumulate(weights))
+        self.mime_cum_weights = list(_accumulate(share for _, _, share in MIME_TYPES))
+        self.status_cum_weights = list(_accumulate(share for _, share in REQUEST_STATUSES))
+        self.next_request_id = 1
+
+    def users(self, password_hash):
+        return [
+            {'id': u, 'username': f'seed_user{u}', 'email': f'seed_user{u}@example.com',
+             'password_hash': password_hash, 'is_admin': False,
+             'created_at': self.end - timedelta(days=self.config.days + 1)}
+            for u in range(1, self.config.users + 1)
+        ]
+
+    def _text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def _requests(self, file_row):
+        """AI requests for one file, oldest first; updates the file's processing columns"""
+        rng = self.rng
+        count = int(rng.expovariate(1 / self.config.requests_per_file)) if self.config.requests_per_file else 0
+        created_at, rows = file_row['uploaded_at'], []
+        for _ in range(count):
+            created_at = min(created_at + timedelta(seconds=rng.expovariate(1 / 86400)), self.end)
+            status = REQUEST_STATUSES[_pick(rng, self.status_cum_weights)][0]
+            finished = status in AIRequest.TERMINAL_STATUSES
+            response = self._text(int(rng.lognormvariate(math.log(60), 0.8)) + 1) \
+                if status == 'completed' else None
+            rows.append({
+                'id': self.next_request_id,
+                'file_checksum': file_row['checksum'],
+                'user_id': file_row['user_id'],
+                'request_type': 'process',
+                'prompt': None,
+                'response': response,
+                'status': status,
+                'error_message': 'Upstream model error' if status in ('failed', 'dead_letter') else None,
+                'attempts': 5 if status in ('failed', 'dead_letter') else rng.randint(1, 2) if finished else 1,
+                'max_attempts': 5,
+                'lease_expires_at': created_at + timedelta(minutes=5) if status == 'processing' else None,
+                'next_attempt_at': created_at + timedelta(minutes=10) if status == 'retrying' else None,
+                'chunks_total': None,
+                'chunks_completed': 0,
+                'created_at': created_at,
+                'completed_at': created_at + timedelta(seconds=rng.uniform(1, 60)) if finished else None,
+            })
+            self.next_request_id += 1
+            if status == 'completed':
+                file_row.update(is_processed=True, processed_at=rows[-1]['completed_at'],
+                                processing_result=response)
+        if rows:
+            file_row['latest_request_id'] = rows[-1]['id']
+        return rows
+
+    def batches(self):
+        """Yield (file rows, request rows) one batch of files at a time"""
+        config, rng = self.config, self.rng
+        for start in range(0, config.files, config.batch_size):
+            file_rows, request_rows = [], []
+            for i in range(start, min(start + config.batch_size, config.files)):
+                checksum = hashlib.sha256(f'{config.seed}:{i}'.encode()).hexdigest()
+                mime_type, extension, _ = MIME_TYPES[_pick(rng, self.mime_cum_weights)]
+                size_kb = rng.lognormvariate(math.log(config.median_file_kb), 1.2)
+                file_row = {
+                    'checksum': checksum,
+                    'original_filename': f'{self._text(2).replace(" ", "_")}_{i}.{extension}',
+                    'stored_filename': f'{checksum}.{extension}',
+                    'filepath': f'uploaded_files/{checksum}.{extension}',
+                    'file_size': max(1, int(min(size_kb, config.max_file_kb) * 1024)),
+                    'mime_type': mime_type,
+                    'user_id': _pick(rng, self.user_cum_weights) + 1,
+                    'uploaded_at': self.end - timedelta(seconds=rng.uniform(0, config.days * 86400)),
+                    'is_processed': False,
+                    'processed_at': None,
+                    'processing_result': None,
+                    'latest_request_id': None,
+                }
+                request_rows += self._requests(file_row)
+                file_rows.append(file_row)
+            yield file_rows, request_rows
+
+
+def _accumulate(values):
+    total = 0
+    for value in values:
+        total += value
+        yield total
+
+
+def _pick(rng, cum_weights):
+    return rng.choices(range(len(cum_weights)), cum_weights=cum_weights)[0]
 
-        # TODO: Add test users, files, and AI requests
 
+def blob_content(config, checksum, size):
+    """Deterministic bytes for one file"""
+    return random.Random(f'{config.seed}:{checksum}').randbytes(size)
+
+
+class DataSeeder:
+    """Write a DataGenerator's rows (and optionally blobs) into the database"""
+
+    def __init__(self, config: SeedConfig, log=print):
+        self.config = config
+        self.log = log
+        self.dialect = db.engine.dialect.name
+        self.method = config.method
+        if self.method == 'auto':
+            self.method = 'copy' if self.dialect == 'postgresql' else 'insert'
+        if self.method == 'copy' and self.dialect != 'postgresql':
+            raise ValueError("COPY is only available on PostgreSQL")
+
+    def _copy(self, model, rows):
+        """Stream rows through COPY ... FROM STDIN (CSV; None becomes NULL)"""
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                value.isoformat() if isinstance(value, datetime) else value for value in row.values()
+            ])
+        buffer.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        cursor.copy_expert(
+            f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+    def _write(self, model, rows):
+        if not rows:
+            return
+        if self.method == 'copy':
+            self._copy(model, rows)
+        else:
+            db.session.execute(insert(model), rows)
+
+    def _save_blob(self, backend, file_row):
+        data = blob_content(self.config, file_row['checksum'], file_row['file_size'])
+        success, message, storage_path = backend.save(data, file_row['stored_filename'])
+        if not success:
+            raise RuntimeError(message)
+        return storage_path
+
+    def _fix_sequences(self):
+        """Move PostgreSQL id sequences past the explicitly assigned ids"""
+        if self.dialect != 'postgresql':
+            return
+        for table in ('users', 'ai_requests'):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {table}))"
+            ))
+
+    def run(self):
+        """
+        Seed the database, which must not contain users yet
+        Returns: dict of row counts, timings and throughput
+        """
+        if db.session.execute(select(func.count()).select_from(User)).scalar():
+            raise RuntimeError("The database already contains users; seed an empty database")
+
+        config = self.config
+        generator = DataGenerator(config)
+        # Migrations only partition ai_requests from the current month on;
+        # without these the backdated requests would all go to the default partition
+        created = ArchiveService.ensure_partitions(now=generator.end,
+                                                   since=generator.end - timedelta(days=config.days + 1))
+        if created:
+            self.log(f"  created {len(created)} ai_requests partitions")
+        started = time.perf_counter()
+        db.session.execute(insert(User), generator.users(generate_password_hash(SEED_PASSWORD)))
         db.session.commit()
+
+        backend = StorageService.get_backend() if config.blobs else None
+        executor = ThreadPoolExecutor(config.blob_workers) if config.blobs else None
+        files = requests_ = blob_bytes = 0
+        blob_seconds = 0.0
+        try:
+            for file_rows, request_rows in generator.batches():
+                if executor:
+                    blob_started = time.perf_counter()
+                    paths = executor.map(lambda row: self._save_blob(backend, row), file_rows)
+                    for file_row, path in zip(file_rows, paths):
+                        file_row['filepath'] = path
+                        blob_bytes += file_row['file_size']
+                    blob_seconds += time.perf_counter() - blob_started
+
+                # files and ai_requests reference each other: the pointer to
+                # the latest request is set once both rows exist
+                pointers = [{'checksum': row['checksum'], 'latest_request_id': row['latest_request_id']}
+                            for row in file_rows if row['latest_request_id']]
+                self._write(File, [dict(row, latest_request_id=None) for row in file_rows])
+                self._write(AIRequest, request_rows)
+                if pointers:
+                    db.session.execute(update(File), pointers)
+                db.session.commit()
+
+                files += len(file_rows)
+                requests_ += len(request_rows)
+                elapsed = time.perf_counter() - started
+                self.log(f"  {files} files, {requests_} AI requests "
+                         f"({(files + requests_) / elapsed:.0f} rows/s)")
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self._fix_sequences()
+        db.session.commit()
+        insert_seconds = time.perf_counter() - started
+        UsageService.reconcile()
+
+        return {
+            'method': self.method,
+            'users': config.users,
+            'files': files,
+            'ai_requests': requests_,
+            'seconds': round(insert_seconds, 2),
+            'rows_per_second': round((config.users + files + requests_) / insert_seconds),
+            'blob_mb': round(blob_bytes / 2 ** 20, 1),
+            'blob_mb_per_second': round(blob_bytes / 2 ** 20 / blob_seconds, 1) if blob_seconds else None,
+            'reconcile_seconds': round(time.perf_counter() - started - insert_seconds, 2),
+        }
+
+
+def seed_data(config=None):
+    """Seed database with synthetic data"""
+    config = config or SeedConfig()
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        print(f"Seeding {config.users} users, {config.files} files "
+              f"(~{config.requests_per_file:g} AI requests each, seed {config.seed})...", flush=True)
+        stats = DataSeeder(config, log=lambda line: print(line, flush=True)).run()
+        for name, value in stats.items():
+            print(f"  {name:<20} {value}")
         print("Test data seeded successfully!")
 
 
 if __name__ == '__main__':
-    seed_data()
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description='Seed the database with synthetic data')
+    for field in fields(SeedConfig):
+        if field.name in ('blobs', 'end'):
+            continue
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(field.default),
+                            default=field.default)
+    parser.add_argument('--blobs', action='store_true', help='Also write file contents to storage')
+    parser.add_argument('--end', type=datetime.fromisoformat,
+                        help='Newest upload date (default today); fix it for identical rows across days')
+    args = parser.parse_args()
+    seed_data(SeedConfig(**vars(args)))
@@ -0,0 +1,52 @@
+# Storage purge worker
+"""
+Deletes storage objects queued by bulk deletes: retries failed deletes and
+picks up tasks left behind by processes that stopped mid-purge.
+
+    python scripts/storage_purge.py            # loop forever
+    python scripts/storage_purge.py --once     # single pass (e.g. from cron)
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.bulk_delete_service import BulkDeleteService
+
+
+def run_purge(once=False, interval=15, batch_size=None):
+    """Run purge passes until no task is due"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        while True:
+            started = time.monotonic()
+            purged = failed = retrying = 0
+            while True:
+                batch = BulkDeleteService.process_due(batch_size)
+                if not sum(batch):
+                    break
+                purged += batch[0]
+                failed += batch[1]
+                retrying += batch[2]
+            print(
+                f"Purge pass: {purged} purged, {failed} failed, {retrying} retrying "
+                f"({time.monotonic() - started:.2f}s)",
+                flush=True
+            )
+            if once:
+                return
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Purge storage objects of deleted files')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    parser.add_argument('--interval', type=float, default=15, help='Seconds between passes')
+    parser.add_argument('--batch-size', type=int, default=None, help='Tasks claimed per batch')
+    args = parser.parse_args()
+    run_purge(args.once, args.interval, args.batch_size)
@@ -0,0 +1,393 @@
+# Local stand-in for the AI provider API
+"""
+Stub AI server for development, tests and load testing.
+
+Speaks the same JSON contract as the AI provider used by AIService
+(``{"success": bool, "result": str}``) and lets you shape its behaviour:
+
+    python scripts/stub_ai_server.py --port 8081 \\
+        --latency lognormal:200:0.5 --error-rate 0.02 \\
+        --throttle-rate 0.05 --rate-cap 50 --response-size 2048
+
+Latency specs (all values in milliseconds; --latency-per-kb adds a
+size-proportional component on top):
+    fixed:<ms>
+    uniform:<min>:<max>
+    normal:<mean>:<stddev>
+    lognormal:<median>:<sigma>
+    exponential:<mean>
+
+Runtime control endpoints:
+    GET  /stats         request counters and latency summary
+    POST /stats/reset   clear counters
+    POST /config        update any StubConfig field (JSON body)
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict, fields
+from typing import Optional
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+
+LATENCY_KINDS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+
+class LatencyModel:
+    """Sample response latencies (seconds) from a named distribution"""
+
+    def __init__(self, spec: str = 'fixed:0'):
+        kind, _, raw_params = spec.partition(':')
+        if kind not in LATENCY_KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        params = [float(p) for p in raw_params.split(':') if p]
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}[kind]
+        if len(params) != expected:
+            raise ValueError(f"Latency '{kind}' expects {expected} parameter(s)")
+        self.spec = spec
+        self.kind = kind
+        self.params = params
+
+    def sample(self, rng: random.Random) -> float:
+        """Return a latency in seconds"""
+        p = self.params
+        if self.kind == 'fixed':
+            ms = p[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == 'normal':
+            ms = rng.gauss(p[0], p[1])
+        elif self.kind == 'lognormal':
+            ms = rng.lognormvariate(math.log(max(p[0], 1e-3)), p[1])
+        else:
+            ms = rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(ms, 0.0) / 1000.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to emulate a provider-side rate cap"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> Optional[float]:
+        """Take a token; return None on success or seconds until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class StubConfig:
+    """Behaviour knobs for the stub server"""
+    latency: str = 'fixed:0'
+    latency_per_kb: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    rate_cap: float = 0.0
+    response_size: int = 256
+    max_request_kb: float = 0.0
+    retry_after: float = 1.0
+    api_key: Optional[str] = None
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls):
+        """Build configuration from STUB_AI_* environment variables"""
+        return cls(
+            latency=os.getenv('STUB_AI_LATENCY', 'fixed:0'),
+            latency_per_kb=float(os.getenv('STUB_AI_LATENCY_PER_KB', 0)),
+            error_rate=float(os.getenv('STUB_AI_ERROR_RATE', 0)),
+            throttle_rate=float(os.getenv('STUB_AI_THROTTLE_RATE', 0)),
+            rate_cap=float(os.getenv('STUB_AI_RATE_CAP', 0)),
+            response_size=int(os.getenv('STUB_AI_RESPONSE_SIZE', 256)),
+            max_request_kb=float(os.getenv('STUB_AI_MAX_REQUEST_KB', 0)),
+            retry_after=float(os.getenv('STUB_AI_RETRY_AFTER', 1)),
+            api_key=os.getenv('STUB_AI_API_KEY') or None,
+            seed=int(os.environ['STUB_AI_SEED']) if os.getenv('STUB_AI_SEED') else None,
+        )
+
+
+class StubState:
+    """Mutable server state shared between request threads"""
+
+    def __init__(self, config: StubConfig):
+        self._lock = threading.Lock()
+        self.configure(config)
+        self.reset_stats()
+
+    def configure(self, config: StubConfig):
+        latency = LatencyModel(config.latency)
+        with self._lock:
+            self.config = config
+            self.latency = latency
+            self.rng = random.Random(config.seed)
+            self.bucket = TokenBucket(config.rate_cap) if config.rate_cap > 0 else None
+
+    def update(self, **changes):
+        """Apply a partial configuration update"""
+        known = {f.name for f in fields(StubConfig)}
+        unknown = set(changes) - known
+        if unknown:
+            raise ValueError(f"Unknown config fields: {', '.join(sorted(unknown))}")
+        merged = asdict(self.config)
+        merged.update(changes)
+        self.configure(StubConfig(**merged))
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                'requests': 0,
+                'ok': 0,
+                'errors': 0,
+                'throttled': 0,
+                'rate_capped': 0,
+                'too_large': 0,
+                'unauthorized': 0,
+                'bytes_in': 0,
+                'bytes_out': 0,
+                'in_flight': 0,
+                'max_in_flight': 0,
+                'latency_total': 0.0,
+            }
+
+    def roll(self):
+        """Draw the outcome and latency for one request"""
+        with self._lock:
+            rng = self.rng
+            return rng.random(), rng.random(), self.latency.sample(rng)
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+            if key == 'in_flight':
+                self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['avg_latency_ms'] = (
+            stats['latency_total'] / stats['requests'] * 1000 if stats['requests'] else 0.0
+        )
+        stats['config'] = asdict(self.config)
+        return stats
+
+
+def _build_result(payload, size):
+    """Build a deterministic result string padded to the requested size"""
+    file_info = (payload or {}).get('file', {})
+    text = file_info.get('text')
+    content = file_info.get('content') or ''
+    segment = (payload or {}).get('segment')
+    part = f"[segment {segment['index'] + 1}/{segment['count']}] " if segment else ''
+    summary = (
+        f"Processed {file_info.get('name', 'file')} {part}"
+        f"({len(text) if text is not None else len(content)} chars). "
+    )
+    if len(summary) >= size:
+        return summary
+    return summary + ('x' * (size - len(summary)))
+
+
+def create_stub_app(config: Optional[StubConfig] = None) -> Flask:
+    """Create the stub AI Flask application"""
+    app = Flask('stub_ai_server')
+    state = StubState(config or StubConfig())
+    app.extensions['stub_state'] = state
+
+    @app.route('/', methods=['POST'])
+    @app.route('/v1/process', methods=['POST'])
+    def process():
+        started = time.monotonic()
+        state.count('requests')
+        state.count('bytes_in', request.content_length or 0)
+        cfg = state.config
+
+        auth = request.headers.get('Authorization', '')
+        if not auth.startswith('Bearer ') or (cfg.api_key and auth[7:] != cfg.api_key):
+            state.count('unauthorized')
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+        # Emulate the provider's input token limit
+        if cfg.max_request_kb and (request.content_length or 0) > cfg.max_request_kb * 1024:
+            state.count('too_large')
+            return jsonify({'success': False, 'error': 'Input exceeds token limit'}), 413
+
+        if state.bucket is not None:
+            wait = state.bucket.try_acquire()
+            if wait is not None:
+                state.count('rate_capped')
+                response = jsonify({'success': False, 'error': 'Rate limit exceeded'})
+                response.headers['Retry-After'] = f"{max(wait, 0.001):.3f}"
+                return response, 429
+
+        error_roll, throttle_roll, delay = state.roll()
+        # Model providers that take longer for larger inputs
+        delay += cfg.latency_per_kb * (request.content_length or 0) / 1024 / 1000.0
+        state.count('in_flight')
+        try:
+            time.sleep(delay)
+        finally:
+            state.count('in_flight', -1)
+            state.count('latency_total', time.monotonic() - started)
+
+        if throttle_roll < cfg.throttle_rate:
+            state.count('throttled')
+            response = jsonify({'success': False, 'error': 'Too many requests'})
+            response.headers['Retry-After'] = str(cfg.retry_after)
+            return response, 429
+
+        if error_roll < cfg.error_rate:
+            state.count('errors')
+            return jsonify({'success': False, 'error': 'Upstream model error'}), 500
+
+        payload = request.get_json(silent=True)
+        result = _build_result(payload, cfg.response_size)
+        state.count('ok')
+        state.count('bytes_out', len(result))
+        return jsonify({'success': True, 'result': result}), 200
+
+    @app.route('/stats', methods=['GET'])
+    def stats():
+        return jsonify(state.snapshot()), 200
+
+    @app.route('/stats/reset', methods=['POST'])
+    def reset_stats():
+        state.reset_stats()
+        return jsonify(state.snapshot()), 200
+
+    @app.route('/config', methods=['POST'])
+    def update_config():
+        try:
+            state.update(**(request.get_json(silent=True) or {}))
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return jsonify(asdict(state.config)), 200
+
+    return app
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that skips per-request access logging"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class StubAIServer:
+    """Run the stub AI app on a background thread (for tests and benchmarks)"""
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = '127.0.0.1',
+                 port: int = 0, quiet: bool = True):
+        self.app = create_stub_app(config)
+        self._server = make_server(
+            host, port, self.app, threaded=True,
+            request_handler=_QuietRequestHandler if quiet else None
+        )
+        self._thread = None
+
+    @property
+    def state(self) -> StubState:
+        return self.app.extensions['stub_state']
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._server.host}:{self._server.port}/v1/process"
+
+    def configure(self, **changes):
+        self.state.update(**changes)
+
+    def stats(self):
+        return self.state.snapshot()
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={'poll_interval': 0.05},
+            daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_args(argv=None):
+    defaults = StubConfig.from_env()
+    parser = argparse.ArgumentParser(description='Run the local stub AI server')
+    parser.add_argument('--host', default=os.getenv('STUB_AI_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('STUB_AI_PORT', 8081)))
+    parser.add_argument('--latency', default=defaults.latency,
+                        help='Latency distribution, e.g. fixed:100 or lognormal:200:0.5')
+    parser.add_argument('--latency-per-kb', type=float, default=defaults.latency_per_kb,
+                        help='Extra milliseconds of latency per KB of request body')
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate,
+                        help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=defaults.throttle_rate,
+                        help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--rate-cap', type=float, default=defaults.rate_cap,
+                        help='Maximum accepted requests per second (0 = unlimited)')
+    parser.add_argument('--response-size', type=int, default=defaults.response_size,
+                        help='Size of the result text in bytes')
+    parser.add_argument('--max-request-kb', type=float, default=defaults.max_request_kb,
+                        help='Reject request bodies above this size with 413 (0 = no limit)')
+    parser.add_argument('--retry-after', type=float, default=defaults.retry_after,
+                        help='Retry-After seconds sent with throttled responses')
+    parser.add_argument('--api-key', default=defaults.api_key,
+                        help='Require this bearer token (any token accepted if unset)')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = StubConfig(
+        latency=args.latency,
+        latency_per_kb=args.latency_per_kb,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        rate_cap=args.rate_cap,
+        response_size=args.response_size,
+        max_request_kb=args.max_request_kb,
+        retry_after=args.retry_after,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+    server = StubAIServer(config, host=args.host, port=args.port, quiet=False)
+    print(f"Stub AI server listening on {server.url} ({asdict(config)})", flush=True)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
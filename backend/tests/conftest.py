@@ -1,17 +1,23 @@
 # Pytest configuration and fixtures
+import hashlib
+
 import pytest
+from flask_jwt_extended import create_access_token
+
 from app import create_app
 from app.extensions import db
+from app.models import User, File
 
 
 @pytest.fixture
 def app():
     """Create application for testing"""
-    app = create_app('testing')
-    app.config.update({
+    app = create_app('testing', {
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
-        'JWT_SECRET_KEY': 'test-secret-key'
+        'JWT_SECRET_KEY': 'test-secret-key',
+        'AI_API_RETRY_BACKOFF': 0.001,
+        'AI_API_RETRY_BACKOFF_MAX': 0.01
     })
 
     with app.app_context():
@@ -34,7 +40,65 @@ def runner(app):
 
 
 @pytest.fixture
-def auth_headers(client):
+def user(app):
+    """Create a persisted test user"""
+    user = User(username='testuser', email='test@example.com')
+    user.set_password('Test123456')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
     """Get authentication headers"""
-    # TODO: Implement authentication header generation
-    return {'Authorization': 'Bearer test-token'}
+    token = create_access_token(identity=str(user.id))
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def make_file(user, tmp_path):
+    """Factory that writes content to disk and creates the matching File row"""
+    def _make_file(content=b'test file content', filename='test.txt',
+                   mime_type='text/plain', owner=None):
+        checksum = hashlib.sha256(content).hexdigest()
+        path = tmp_path / f"{checksum}-{filename}"
+        path.write_bytes(content)
+        file_record = File(
+            checksum=checksum,
+            original_filename=filename,
+            stored_filename=path.name,
+            filepath=str(path),
+            file_size=len(content),
+            mime_type=mime_type,
+            user_id=(owner or user).id,
+            is_processed=False
+        )
+        db.session.add(file_record)
+        db.session.commit()
+        return file_record
+    return _make_file
+
+
+@pytest.fixture
+def storage(app, tmp_path, monkeypatch):
+    """Local storage backend rooted in a temporary directory"""
+    from app.services.storage_service import LocalStorageBackend, StorageService
+
+    backend = LocalStorageBackend(str(tmp_path / 'uploaded_files'))
+    monkeypatch.setattr(StorageService, '_backend', backend)
+    return backend
+
+
+@pytest.fixture
+def ai_stub(app):
+    """Run the local stub AI server and point the app at it"""
+    from scripts.stub_ai_server import StubAIServer, StubConfig
+
+    server = StubAIServer(StubConfig(seed=1234, retry_after=0.001)).start()
+    app.config.update({
+        'AI_API_URL': server.url,
+        'AI_API_KEY': 'test-ai-key'
+    })
+    yield server
+    server.stop()
@@ -1,20 +1,235 @@
 # AI processing tests
+import threading
+import time
+from datetime import datetime
+
 import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import AIRequest, File, IllegalTransitionError
+from app.services.ai_service import AIService
+from app.services.rate_governor import RateGovernor
+
+
+def test_ai_process_request(app, ai_stub, make_file):
+    """Test AI processing request against the stub provider"""
+    file_record = make_file()
+
+    success, message, ai_request = AIService.process_file(file_record.checksum, file_record.user_id)
+
+    assert success, message
+    db.session.refresh(file_record)
+    assert file_record.is_processed
+    assert file_record.processing_result.startswith('Processed test.txt')
+    assert db.session.get(AIRequest, ai_request.id).status == 'completed'
+    assert ai_stub.stats()['ok'] == 1
+
+
+def test_ai_process_retries_throttled_requests(app, ai_stub, make_file):
+    """Throttled calls are retried until the retry budget is spent"""
+    app.config['AI_API_MAX_RETRIES'] = 2
+    ai_stub.configure(throttle_rate=1.0)
+    file_record = make_file()
+
+    success, message, ai_request = AIService.process_file(file_record.checksum, file_record.user_id)
+
+    assert not success
+    assert 'Too many requests' in message
+    assert ai_stub.stats()['throttled'] == 3
+    # The exhausted call is handed to the retry scheduler
+    ai_request = db.session.get(AIRequest, ai_request.id)
+    assert ai_request.status == 'retrying'
+    assert ai_request.next_attempt_at is not None
+
+
+def test_ai_process_rate_cap(app, ai_stub, make_file):
+    """Requests above the provider rate cap are answered with 429"""
+    app.config['AI_API_MAX_RETRIES'] = 0
+    ai_stub.configure(rate_cap=1)
+    first, second = make_file(b'first'), make_file(b'second', 'second.txt')
+
+    assert AIService.process_file(first.checksum, first.user_id)[0]
+    assert not AIService.process_file(second.checksum, second.user_id)[0]
+    assert ai_stub.stats()['rate_capped'] == 1
+
+
+def test_ai_process_provider_error(app, ai_stub, make_file):
+    """Provider errors mark the request as failed"""
+    app.config['AI_API_MAX_RETRIES'] = 0
+    ai_stub.configure(error_rate=1.0)
+    file_record = make_file()
+
+    success, message, ai_request = AIService.process_file(file_record.checksum, file_record.user_id)
+
+    assert not success
+    assert 'Upstream model error' in message
+    db.session.refresh(file_record)
+    assert not file_record.is_processed
+
+
+def test_ai_history(client, auth_headers, make_file, user):
+    """History is cursor-paginated newest first with an optional exact total"""
+    file_record = make_file()
+    created_at = datetime.utcnow().replace(microsecond=0)
+    for _ in range(5):
+        db.session.add(AIRequest(file_checksum=file_record.checksum, user_id=user.id,
+                                 request_type='process', created_at=created_at))
+    db.session.commit()
+
+    response = client.get('/api/ai/history?per_page=3&total=exact', headers=auth_headers)
+    assert response.status_code == 200
+    first = response.get_json()['data']
+    assert first['pagination']['total'] == 5
+    assert first['pagination']['has_more']
+
+    response = client.get('/api/ai/history', headers=auth_headers,
+                          query_string={'per_page': 3, 'cursor': first['pagination']['next_cursor']})
+    second = response.get_json()['data']
+    assert not second['pagination']['has_more']
+
+    ids = [r['id'] for r in first['requests'] + second['requests']]
+    assert ids == [5, 4, 3, 2, 1]
+
+
+def test_ai_history_fields(client, auth_headers, make_file, user):
+    """History omits response unless asked for; fields narrows list and detail output"""
+    file_record = make_file()
+    ai_request = AIRequest(file_checksum=file_record.checksum, user_id=user.id, request_type='process',
+                           status='completed', response='long result')
+    db.session.add(ai_request)
+    db.session.commit()
 
+    requests_ = client.get('/api/ai/history', headers=auth_headers).get_json()['data']['requests']
+    assert 'response' not in requests_[0]
+    assert requests_[0]['progress'] == 100
 
-def test_ai_process_request(client, auth_headers):
-    """Test AI processing request"""
-    # TODO: Implement AI processing test
-    pass
+    response = client.get('/api/ai/history?fields=id,progress', headers=auth_headers)
+    assert response.get_json()['data']['requests'] == [{'id': ai_request.id, 'progress': 100}]
 
+    response = client.get(f'/api/ai/requests/{ai_request.id}?fields=response', headers=auth_headers)
+    assert response.get_json()['data']['request'] == {'response': 'long result'}
 
-def test_ai_history(client, auth_headers):
-    """Test AI request history"""
-    # TODO: Implement history test
-    pass
+    response = client.get('/api/ai/history?fields=prompt', headers=auth_headers)
+    assert response.status_code == 400
 
 
-def test_get_ai_request(client, auth_headers):
+def test_get_ai_request(client, auth_headers, make_file, user):
     """Test getting specific AI request"""
-    # TODO: Implement specific request test
-    pass
+    file_record = make_file()
+    ai_request = AIRequest(file_checksum=file_record.checksum, user_id=user.id, request_type='process')
+    db.session.add(ai_request)
+    db.session.commit()
+
+    response = client.get(f'/api/ai/requests/{ai_request.id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['request']['id'] == ai_request.id
+
+    response = client.get(f'/api/ai/requests/{ai_request.id + 1}', headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_large_text_is_split_and_merged(app, ai_stub, make_file):
+    """Texts above AI_CHUNK_MAX_CHARS are processed as segments and merged in order"""
+    app.config.update({'AI_CHUNK_MAX_CHARS': 1000, 'AI_CHUNK_CONCURRENCY': 3})
+    ai_stub.configure(max_request_kb=2, response_size=0, latency='uniform:0:20')
+    content = ('line of document text\n' * 200).encode()
+    file_record = make_file(content, 'large.txt')
+
+    success, message, ai_request = AIService.process_file(file_record.checksum, file_record.user_id)
+
+    assert success, message
+    ai_request = db.session.get(AIRequest, ai_request.id)
+    assert ai_request.chunks_total == 5
+    assert ai_request.chunks_completed == 5
+    assert ai_request.progress == 100
+    segments = ai_request.response.split('\n\n')
+    assert [s.split('[segment ')[1].split(']')[0] for s in segments] == \
+        ['1/5', '2/5', '3/5', '4/5', '5/5']
+
+
+def test_split_text_is_lossless():
+    """Segments respect the size bound and concatenate back to the input"""
+    text = 'alpha beta\ngamma delta epsilon\n' * 50 + 'x' * 120
+    chunks = AIService._split_text(text, 64)
+
+    assert ''.join(chunks) == text
+    assert all(len(chunk) <= 64 for chunk in chunks)
+
+
+def test_rate_governor_limits_concurrency():
+    """The governor never lets more than max_concurrency calls run at once"""
+    governor = RateGovernor(max_concurrency=2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def call():
+        with governor.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+
+def test_illegal_transition_is_rejected(app, make_file):
+    """Transitions outside the lifecycle raise before touching the database"""
+    file_record = make_file()
+    ai_request = AIRequest(file_checksum=file_record.checksum, user_id=file_record.user_id,
+                           request_type='process', status='completed')
+    db.session.add(ai_request)
+    db.session.commit()
+
+    with pytest.raises(IllegalTransitionError):
+        AIService.transition(ai_request.id, 'completed', 'processing')
+
+
+def test_completion_is_compare_and_set(app, make_file):
+    """Only the worker holding the request in 'processing' can complete it"""
+    file_record = make_file()
+    ai_request = AIRequest(file_checksum=file_record.checksum, user_id=file_record.user_id,
+                           request_type='process', status='processing', attempts=1)
+    db.session.add(ai_request)
+    db.session.commit()
+    request_id = ai_request.id
+
+    # Another worker (e.g. the reaper) moved it on first
+    assert AIService.transition(request_id, 'processing', 'retrying')
+    assert not AIService._complete_request(request_id, file_record.checksum, 'late result')
+
+    db.session.expire_all()
+    assert db.session.get(AIRequest, request_id).status == 'retrying'
+    assert not db.session.get(File, file_record.checksum).is_processed
+
+
+def test_completion_is_one_transaction_without_reads(app, make_file):
+    """Completing a request issues two conditional UPDATEs, their counter upserts and a single commit"""
+    file_record = make_file()
+    ai_request = AIRequest(file_checksum=file_record.checksum, user_id=file_record.user_id,
+                           request_type='process', status='processing', attempts=1)
+    db.session.add(ai_request)
+    db.session.commit()
+    request_id, checksum = ai_request.id, file_record.checksum
+
+    statements, commits = [], []
+    engine = db.engine
+    on_execute = lambda conn, cursor, statement, *args: statements.append(statement.split()[0])
+    on_commit = lambda conn: commits.append(True)
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    event.listen(engine, 'commit', on_commit)
+    try:
+        assert AIService._complete_request(request_id, checksum, 'result')
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+        event.remove(engine, 'commit', on_commit)
+
+    # Request status counter; file result, usage counter and file list version
+    assert statements == ['UPDATE', 'INSERT', 'UPDATE', 'INSERT', 'INSERT']
+    assert len(commits) == 1
@@ -0,0 +1,99 @@
+# API key tests
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pytest
+
+from app.extensions import db
+from app.models import ApiKey
+from app.services.api_key_service import ApiKeyService
+from app.utils import api_key_cache
+from app.utils.api_key_cache import ApiKeyCache
+
+
+def _create_key(client, auth_headers, scopes, **extra):
+    response = client.post('/api/auth/api-keys', headers=auth_headers,
+                           json={'name': 'ingestion-bot', 'scopes': scopes, **extra})
+    assert response.status_code == 201
+    return response.get_json()['data']
+
+
+def test_api_key_scopes_and_management(client, auth_headers, make_file, storage, ai_stub):
+    """Keys work on file routes within their scopes and are stored only as hashes"""
+    make_file(b'existing', 'existing.txt')
+    created = _create_key(client, auth_headers, ['files:read'])
+    key = created['key']
+    assert key.startswith('ak_') and ApiKey.query.one().key_hash not in key
+
+    response = client.get('/api/files/', headers={'X-API-Key': key})
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['files']) == 1
+
+    upload = {'file': (BytesIO(b'new content'), 'new.txt')}
+    response = client.post('/api/files/upload', data=upload, headers={'X-API-Key': key})
+    assert response.status_code == 403
+
+    writer = _create_key(client, auth_headers, ['files:read', 'files:write'])['key']
+    upload = {'file': (BytesIO(b'new content'), 'new.txt')}
+    response = client.post('/api/files/upload', data=upload, headers={'X-API-Key': writer})
+    assert response.status_code == 201
+
+    # Wrong secrets, and keys on routes outside files, are refused
+    assert client.get('/api/files/', headers={'X-API-Key': key[:-2] + 'xx'}).status_code == 401
+    assert client.get('/api/auth/api-keys', headers={'X-API-Key': key}).status_code == 401
+
+    listed = client.get('/api/auth/api-keys', headers=auth_headers).get_json()['data']['api_keys']
+    assert [k['scopes'] for k in listed] == [['files:read', 'files:write'], ['files:read']]
+    assert all('key' not in k and 'key_hash' not in k for k in listed)
+
+    response = client.post('/api/auth/api-keys', headers=auth_headers, json={'name': 'x', 'scopes': ['admin']})
+    assert response.status_code == 400
+
+
+def test_verified_keys_are_cached_and_revocation_is_immediate(client, auth_headers, monkeypatch):
+    """Repeat requests skip the database; revoking evicts the key at once"""
+    created = _create_key(client, auth_headers, ['files:read'])
+    headers = {'X-API-Key': created['key']}
+    assert client.get('/api/files/', headers=headers).status_code == 200
+
+    def no_lookups(prefix):
+        raise AssertionError('API key looked up in the database')
+
+    monkeypatch.setattr(ApiKeyService, '_load', no_lookups)
+    for _ in range(3):
+        assert client.get('/api/files/', headers=headers).status_code == 200
+    monkeypatch.undo()
+
+    response = client.delete(f"/api/auth/api-keys/{created['api_key']['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get('/api/files/', headers=headers).status_code == 401
+    assert client.delete('/api/auth/api-keys/999', headers=auth_headers).status_code == 404
+
+
+def test_expired_key_is_refused(client, auth_headers):
+    """Keys stop working when they expire, even while cached"""
+    created = _create_key(client, auth_headers, ['files:read'], expires_in_days=1)
+    headers = {'X-API-Key': created['key']}
+    assert client.get('/api/files/', headers=headers).status_code == 200
+
+    ApiKey.query.one().expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert client.get('/api/files/', headers=headers).status_code == 200  # Cached for the TTL
+    client.application.extensions['api_key_cache'].evict(created['api_key']['prefix'])
+    assert client.get('/api/files/', headers=headers).status_code == 401
+
+
+def test_revocation_propagates_through_redis(app, monkeypatch):
+    """Another process's cache drops a key revoked elsewhere on its next sync"""
+    fakeredis = pytest.importorskip('fakeredis')
+    redis = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(api_key_cache, 'get_redis', lambda: redis)
+
+    here = ApiKeyCache(ttl=30, maxsize=100, sync_interval=0)
+    elsewhere = ApiKeyCache(ttl=30, maxsize=100, sync_interval=0)
+    elsewhere.put('abc123', 'principal')
+    assert elsewhere.get('abc123') == (True, 'principal')
+
+    here.revoke('abc123')
+    elsewhere.sync()
+    assert elsewhere.get('abc123') == (False, None)
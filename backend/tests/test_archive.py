@@ -0,0 +1,103 @@
+# AI request retention and archival tests
+import gzip
+import json
+from datetime import datetime
+
+from app.extensions import db
+from app.models import AIRequest, AIRequestArchive
+from app.services.archive_service import ArchiveService, month_start, partition_name
+from app.services.usage_service import UsageService
+
+
+def _add_request(file_record, created_at, status='completed'):
+    ai_request = AIRequest(file_checksum=file_record.checksum, user_id=file_record.user_id,
+                           request_type='process', status=status, created_at=created_at)
+    db.session.add(ai_request)
+    db.session.commit()
+    return ai_request.id
+
+
+def test_month_arithmetic():
+    """Cutoffs and partition names are aligned to calendar months"""
+    assert month_start(datetime(2026, 3, 15, 12, 30)) == datetime(2026, 3, 1)
+    assert month_start(datetime(2026, 3, 15), -12) == datetime(2025, 3, 1)
+    assert month_start(datetime(2026, 1, 31), -1) == datetime(2025, 12, 1)
+    assert month_start(datetime(2026, 12, 1), 1) == datetime(2027, 1, 1)
+    assert partition_name(datetime(2025, 3, 1)) == 'ai_requests_p202503'
+
+
+def test_expired_months_are_archived(app, make_file, storage):
+    """Finished requests older than the retention window move to compressed archive storage"""
+    app.config['AI_REQUEST_RETENTION_MONTHS'] = 6
+    now = datetime.utcnow()
+    file_record = make_file()
+    old_month = month_start(now, -8)
+    archived_ids = [
+        _add_request(file_record, old_month.replace(day=3)),
+        _add_request(file_record, old_month.replace(day=20), status='failed'),
+    ]
+    older_id = _add_request(file_record, month_start(now, -10).replace(day=9), status='dead_letter')
+    active_id = _add_request(file_record, old_month.replace(day=5), status='retrying')
+    recent_id = _add_request(file_record, now)
+    UsageService.reconcile()
+
+    archives = ArchiveService.archive_expired()
+
+    assert [(a.label, a.row_count) for a in archives] == [
+        (partition_name(month_start(now, -10)), 1),
+        (partition_name(old_month), 2),
+    ]
+    with open(archives[1].storage_path, 'rb') as archive_file:
+        rows = [json.loads(line) for line in gzip.decompress(archive_file.read()).splitlines()]
+    assert [row['id'] for row in rows] == archived_ids
+    assert rows[0]['created_at'] == old_month.replace(day=3).isoformat()
+    assert rows[1]['status'] == 'failed'
+
+    assert sorted(r.id for r in AIRequest.query.all()) == sorted([active_id, recent_id])
+    assert AIRequestArchive.query.count() == 2
+    # Counters were moved with the rows: reconciling changes nothing
+    stats = UsageService.get_user_stats(file_record.user_id)
+    assert stats['ai_requests'] == {'completed': 1, 'retrying': 1}
+    UsageService.reconcile()
+    assert UsageService.get_user_stats(file_record.user_id) == stats
+
+    # Nothing left to archive
+    assert ArchiveService.archive_expired() == []
+
+
+def test_history_is_bounded_to_retention_window(client, app, auth_headers, make_file):
+    """History only covers the retention window, which lets PostgreSQL prune old partitions"""
+    app.config['AI_REQUEST_RETENTION_MONTHS'] = 6
+    file_record = make_file()
+    _add_request(file_record, month_start(datetime.utcnow(), -7))
+    recent_id = _add_request(file_record, datetime.utcnow())
+
+    response = client.get('/api/ai/history', headers=auth_headers)
+    assert [r['id'] for r in response.get_json()['data']['requests']] == [recent_id]
+
+    app.config['AI_REQUEST_RETENTION_MONTHS'] = 0
+    response = client.get('/api/ai/history', headers=auth_headers)
+    assert len(response.get_json()['data']['requests']) == 2
+
+
+def test_partition_maintenance_is_a_no_op_without_partitioning(app):
+    """Partition creation only applies to a partitioned PostgreSQL table"""
+    assert not ArchiveService.is_partitioned()
+    assert ArchiveService.ensure_partitions() == []
+
+
+def test_rows_are_archived_from_a_named_partition(app, make_file, storage):
+    """The row-by-row archiver also works on a partition addressed by name, like ai_requests_default"""
+    app.config['AI_REQUEST_RETENTION_MONTHS'] = 6
+    file_record = make_file()
+    old_month = month_start(datetime.utcnow(), -9)
+    _add_request(file_record, old_month.replace(day=2))
+    recent_id = _add_request(file_record, datetime.utcnow())
+    UsageService.reconcile()
+
+    archives = ArchiveService._archive_rows(ArchiveService.retention_cutoff(),
+                                            ArchiveService._partition_table('ai_requests'))
+
+    assert [(a.label, a.row_count) for a in archives] == [(partition_name(old_month), 1)]
+    assert [r.id for r in AIRequest.query.all()] == [recent_id]
+    assert UsageService.get_user_stats(file_record.user_id)['ai_requests'] == {'completed': 1}
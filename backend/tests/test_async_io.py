@@ -0,0 +1,219 @@
+# ASGI serving mode tests: coroutine storage and AI API I/O
+import asyncio
+import importlib
+import time
+from io import BytesIO
+
+import pytest
+
+from app.extensions import db
+from app.models import AIRequest, File
+from app.services.ai_service import AIService
+from app.services.rate_governor import RateGovernor, RateGovernorTimeout
+from app.services.storage_service import StorageService
+from app.utils import aio
+
+
+@pytest.fixture
+def async_io(app):
+    """Route storage and AI API calls through coroutines, as asgi.py does"""
+    pytest.importorskip('aiohttp')
+    app.config['ASYNC_IO'] = True
+    yield app
+    aio.run(aio.close_loop_resources())
+
+
+def test_upload_and_delete_through_async_storage(async_io, client, auth_headers, storage):
+    """Local files are written and removed from a worker thread of the I/O loop"""
+    response = client.post('/api/files/upload', data={'file': (BytesIO(b'async content'), 'async.txt')},
+                           headers=auth_headers)
+    assert response.status_code == 201
+    checksum = response.get_json()['data']['file']['checksum']
+    path = db.session.get(File, checksum).filepath
+    with open(path, 'rb') as f:
+        assert f.read() == b'async content'
+
+    assert StorageService.file_exists(path)
+    assert StorageService.delete_file(path)[0]
+    assert not StorageService.file_exists(path)
+
+
+def test_stalled_storage_call_times_out(async_io, storage, monkeypatch):
+    """A storage coroutine that never finishes is cancelled after STORAGE_IO_TIMEOUT"""
+    async_io.config['STORAGE_IO_TIMEOUT'] = 0.05
+    cancelled = []
+
+    async def stalled(*args):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(StorageService.get_backend(), 'save_async', stalled)
+    success, message, path = StorageService.save_file(b'data', 'stalled.txt')
+
+    assert not success and 'timed out' in message and path is None
+    deadline = time.monotonic() + 2
+    while not cancelled and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cancelled
+
+
+def test_ai_process_request_async(async_io, ai_stub, make_file):
+    """The aiohttp client sends the same request and retries throttled calls"""
+    file_record = make_file()
+    assert AIService.process_file(file_record.checksum, file_record.user_id)[0]
+    db.session.refresh(file_record)
+    assert file_record.processing_result.startswith('Processed test.txt')
+
+    async_io.config['AI_API_MAX_RETRIES'] = 1
+    ai_stub.configure(throttle_rate=1.0)
+    other = make_file(b'other', 'other.txt')
+    success, message, _ = AIService.process_file(other.checksum, other.user_id)
+    assert not success
+    assert 'Too many requests' in message
+    assert ai_stub.stats()['throttled'] == 2
+
+
+def test_segments_are_sent_as_coroutines(async_io, ai_stub, make_file):
+    """Segments run concurrently on the I/O loop and merge in order"""
+    async_io.config.update({'AI_CHUNK_MAX_CHARS': 1000, 'AI_CHUNK_CONCURRENCY': 3})
+    ai_stub.configure(max_request_kb=2, response_size=0, latency='uniform:0:20')
+    file_record = make_file(('line of document text\n' * 200).encode(), 'large.txt')
+
+    success, message, ai_request = AIService.process_file(file_record.checksum, file_record.user_id)
+
+    assert success, message
+    ai_request = db.session.get(AIRequest, ai_request.id)
+    assert ai_request.chunks_completed == ai_request.chunks_total == 5
+    segments = ai_request.response.split('\n\n')
+    assert [s.split('[segment ')[1].split(']')[0] for s in segments] == ['1/5', '2/5', '3/5', '4/5', '5/5']
+
+
+def test_stalled_ai_calls_give_up(async_io, make_file, monkeypatch):
+    """A call or segment batch that never completes fails retryably instead of hanging the thread"""
+    async def stalled(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(AIService, '_send_to_ai_api_async', staticmethod(stalled))
+    monkeypatch.setattr(AIService, '_call_timeout', staticmethod(lambda: 0.1))
+    file_record = make_file()
+
+    response = AIService._send_to_ai_api('http://ai.invalid', 'key', file_record, None, text='x')
+    assert response == {'success': False, 'error': "AI API call did not finish", 'retryable': True}
+
+    completed, cancel = AIService._send_chunks_async('http://ai.invalid', 'key', file_record, ['a', 'b'], 2)
+    assert [(index, r['success']) for index, r in completed] == [(0, False)]
+    cancel()
+
+
+@pytest.mark.parametrize('timeout', [5, None])
+def test_rate_governor_async_slot(timeout):
+    """aslot() enforces the same concurrency limit without blocking the loop, waiting forever without a timeout"""
+    governor = RateGovernor(max_concurrency=2)
+    active, peak = [0], [0]
+
+    async def call():
+        async with governor.aslot(timeout=timeout):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+    async def main():
+        ticks = 0
+        calls = asyncio.gather(*(call() for _ in range(8)))
+        while not calls.done():
+            ticks += 1
+            await asyncio.sleep(0.001)
+        await calls
+        return ticks
+
+    started = time.monotonic()
+    assert asyncio.run(main()) > 5
+    assert peak[0] == 2
+    assert time.monotonic() - started < 2
+
+
+def test_saturated_governor_parks_no_threads():
+    """Coroutines waiting for a slot leave the loop's default executor free"""
+    governor = RateGovernor(max_concurrency=1)
+
+    async def waiter():
+        try:
+            async with governor.aslot(timeout=0.5):
+                pass
+        except RateGovernorTimeout:
+            return 'timeout'
+        return 'ok'
+
+    async def main():
+        with governor.slot():
+            waiters = [asyncio.ensure_future(waiter()) for _ in range(40)]
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            await asyncio.to_thread(lambda: None)
+            executor_wait = time.monotonic() - started
+            # A slot released by a sync caller wakes a waiting coroutine
+            await asyncio.sleep(0.05)
+        return executor_wait, await asyncio.gather(*waiters)
+
+    executor_wait, outcomes = asyncio.run(main())
+    assert executor_wait < 0.1
+    assert outcomes.count('ok') == 40
+
+
+def test_asgi_entry_point(monkeypatch):
+    """asgi.py serves the app and runs coroutines on the server's loop"""
+    pytest.importorskip('a2wsgi')
+    from app.config import ProductionConfig
+
+    monkeypatch.setattr(ProductionConfig, 'SQLALCHEMY_DATABASE_URI', 'sqlite://')
+    asgi = importlib.import_module('asgi')
+
+    async def _loop_id():
+        return id(asyncio.get_running_loop())
+
+    @asgi.flask_app.route('/_test/loop')
+    def _loop():
+        return {'loop': aio.run(_loop_id())}
+
+    async def request(path):
+        sent = []
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'root_path': '', 'headers': [(b'host', b'testserver')],
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        await asgi.app(scope, receive, send)
+        return sent[0]['status'], b''.join(m.get('body', b'') for m in sent[1:])
+
+    async def main():
+        lifespan = asyncio.Queue()
+        for message in ('lifespan.startup', 'lifespan.shutdown'):
+            lifespan.put_nowait({'type': message})
+        replies = []
+
+        async def send(message):
+            replies.append(message['type'])
+
+        status, body = await request('/_test/loop')
+        await asgi.app({'type': 'lifespan'}, lifespan.get, send)
+        return status, body, id(asyncio.get_running_loop()), replies
+
+    try:
+        status, body, loop_id, replies = asyncio.run(main())
+    finally:
+        aio.set_server_loop(None)
+    assert status == 200
+    assert asgi.flask_app.json.loads(body)['loop'] == loop_id
+    assert replies == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
@@ -1,6 +1,10 @@
 # Authentication tests
 import pytest
 
+from app.extensions import db
+from app.models import User
+from app.services.password_service import PasswordService, needs_rehash
+
 
 def test_register(client):
     """Test user registration"""
@@ -9,14 +13,18 @@ def test_register(client):
         'email': 'test@example.com',
         'password': 'Test123456'
     })
-    # TODO: Implement test assertions
-    pass
+    assert response.status_code == 201
+    assert User.query.one().check_password('Test123456')
 
 
-def test_login(client):
+def test_login(client, user):
     """Test user login"""
-    # TODO: Implement login test
-    pass
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'Test123456'})
+    assert response.status_code == 200
+    assert response.get_json()['data']['access_token']
+
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'wrong'})
+    assert response.status_code == 401
 
 
 def test_logout(client, auth_headers):
@@ -29,3 +37,43 @@ def test_get_profile(client, auth_headers):
     """Test get user profile"""
     # TODO: Implement profile test
     pass
+
+
+def test_login_upgrades_outdated_hash(client, app, user):
+    """A successful login rehashes the password when the hash parameters changed"""
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    old_hash = user.password_hash
+    assert needs_rehash(old_hash, 'pbkdf2:sha256:1000', 16)
+
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'Test123456'})
+
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+    assert not needs_rehash(user.password_hash, 'pbkdf2:sha256:1000', 16)
+    assert user.check_password('Test123456')
+    # Failed logins never touch the stored hash
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    client.post('/api/auth/login', json={'email': user.email, 'password': 'wrong'})
+    db.session.refresh(user)
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+
+
+def test_login_runs_in_process_pool_and_sheds_load(client, app, user):
+    """Hashing is offloaded to worker processes; a full queue is answered with 503 at once"""
+    app.config.update({'PASSWORD_HASH_WORKERS': 1, 'PASSWORD_HASH_MAX_PENDING': 1})
+    login = {'email': user.email, 'password': 'Test123456'}
+    try:
+        assert client.post('/api/auth/login', json=login).status_code == 200
+        assert PasswordService._executor is not None
+
+        # Occupy the only slot, as a login in progress would
+        PasswordService._slots.acquire()
+        response = client.post('/api/auth/login', json=login)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        PasswordService._slots.release()
+
+        assert client.post('/api/auth/login', json=login).status_code == 200
+    finally:
+        PasswordService.shutdown()
@@ -0,0 +1,138 @@
+# Bulk delete and storage purge tests
+import os
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import AIRequest, DeleteJob, File, StoragePurgeTask
+from app.services.bulk_delete_service import BulkDeleteService
+from app.services.usage_service import UsageService
+
+
+def _bulk_delete(client, headers, body):
+    return client.post('/api/files/bulk-delete', headers=headers, json=body)
+
+
+def test_bulk_delete_removes_rows_requests_and_objects(client, auth_headers, user, make_file, storage):
+    """Selected files and their AI requests go in one call; objects are purged"""
+    first = make_file(b'first', 'first.txt')
+    second = make_file(b'second', 'second.txt')
+    kept = make_file(b'kept', 'kept.txt')
+    for status in ('completed', 'failed'):
+        ai_request = AIRequest(file_checksum=first.checksum, user_id=user.id, request_type='process', status=status)
+        db.session.add(ai_request)
+        db.session.flush()
+        first.latest_request_id = ai_request.id
+    db.session.commit()
+    UsageService.reconcile()
+    paths = [first.filepath, second.filepath]
+
+    response = _bulk_delete(client, auth_headers, {'checksums': [first.checksum, second.checksum, first.checksum]})
+
+    assert response.status_code == 202
+    job = response.get_json()['data']['job']
+    assert job['files_deleted'] == 2
+    assert job['requests_deleted'] == 2
+    assert job['objects_total'] == 2
+    assert [f.checksum for f in File.query.all()] == [kept.checksum]
+    assert AIRequest.query.count() == 0
+    assert not any(os.path.exists(path) for path in paths)
+    assert os.path.exists(kept.filepath)
+
+    response = client.get(f"/api/files/delete-jobs/{job['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    job = response.get_json()['data']['job']
+    assert (job['status'], job['objects_purged'], job['progress']) == ('completed', 2, 100)
+
+    stats = client.get('/api/files/stats', headers=auth_headers).get_json()['data']
+    assert stats['files']['count'] == 1
+    assert stats['ai_requests'] == {}
+
+
+def test_bulk_delete_all(client, auth_headers, user, make_file, storage):
+    """all: true deletes every file of the user and no one else's"""
+    from app.models import User
+
+    other = User(username='other', email='other@example.com')
+    other.set_password('Test123456')
+    db.session.add(other)
+    db.session.commit()
+    make_file(b'one', 'one.txt')
+    make_file(b'two', 'two.txt')
+    theirs = make_file(b'theirs', 'theirs.txt', owner=other)
+
+    response = _bulk_delete(client, auth_headers, {'all': True})
+
+    assert response.status_code == 202
+    assert response.get_json()['data']['job']['files_deleted'] == 2
+    assert [f.checksum for f in File.query.all()] == [theirs.checksum]
+
+
+def test_bulk_delete_validates_body(client, auth_headers, app):
+    """Missing, malformed or oversized checksum lists are rejected"""
+    app.config['BULK_DELETE_MAX_CHECKSUMS'] = 2
+
+    assert _bulk_delete(client, auth_headers, {}).status_code == 400
+    assert _bulk_delete(client, auth_headers, {'checksums': []}).status_code == 400
+    assert _bulk_delete(client, auth_headers, {'checksums': [1]}).status_code == 400
+    assert _bulk_delete(client, auth_headers, {'checksums': ['a'], 'all': True}).status_code == 400
+    assert _bulk_delete(client, auth_headers, {'checksums': ['a', 'b', 'c']}).status_code == 400
+    assert DeleteJob.query.count() == 0
+
+
+def test_delete_job_is_scoped_to_owner(client, auth_headers, make_file, storage):
+    """Another user's job id is not found"""
+    from flask_jwt_extended import create_access_token
+
+    job_id = _bulk_delete(client, auth_headers, {'all': True}).get_json()['data']['job']['id']
+    other = {'Authorization': f"Bearer {create_access_token(identity='999')}"}
+
+    assert client.get(f'/api/files/delete-jobs/{job_id}', headers=other).status_code == 404
+
+
+def test_failed_deletes_are_retried_then_given_up(client, auth_headers, app, make_file, storage, monkeypatch):
+    """Failed deletes back off and retry; after max attempts the job completes with errors"""
+    app.config.update({'STORAGE_PURGE_BACKOFF_BASE': 0, 'STORAGE_PURGE_MAX_ATTEMPTS': 3})
+    flaky = make_file(b'flaky', 'flaky.txt')
+    broken = make_file(b'broken', 'broken.txt')
+    calls = {}
+    real_delete = storage.delete
+
+    def _delete(path):
+        calls[path] = calls.get(path, 0) + 1
+        if path == broken.filepath or calls[path] == 1:
+            return False, "Storage unavailable"
+        return real_delete(path)
+    monkeypatch.setattr(storage, 'delete', _delete)
+    flaky_path, broken_path = flaky.filepath, broken.filepath
+
+    job = _bulk_delete(client, auth_headers, {'all': True}).get_json()['data']['job']
+
+    job = db.session.get(DeleteJob, job['id'])
+    assert (job.status, job.objects_purged, job.objects_failed) == ('completed_with_errors', 1, 1)
+    assert calls == {flaky_path: 2, broken_path: 3}
+    failed = StoragePurgeTask.query.filter_by(status='failed').one()
+    assert (failed.storage_path, failed.attempts, failed.last_error) == (broken_path, 3, "Storage unavailable")
+
+
+def test_purge_resumes_after_lease_expiry_and_skips_reuploads(app, user, make_file, storage, monkeypatch):
+    """Tasks of a stopped worker are reclaimed; objects of re-uploaded content are kept"""
+    monkeypatch.setattr(BulkDeleteService, 'start_purge', lambda job_id: None)
+    gone = make_file(b'gone', 'gone.txt')
+    back = make_file(b'back', 'back.txt')
+    gone_path, back_path = gone.filepath, back.filepath
+
+    success, _, job = BulkDeleteService.delete_files(user.id)
+    assert success
+    # A worker claims the batch and dies before deleting anything
+    assert len(BulkDeleteService._claim(10)) == 2
+    assert BulkDeleteService.process_due() == (0, 0, 0)
+    # The same content is uploaded again before the purge catches up
+    make_file(b'back', 'back.txt')
+
+    later = datetime.utcnow() + timedelta(seconds=app.config['STORAGE_PURGE_LEASE_SECONDS'] + 1)
+    assert BulkDeleteService.process_due(now=later) == (2, 0, 0)
+
+    assert not os.path.exists(gone_path)
+    assert os.path.exists(back_path)
+    job = db.session.get(DeleteJob, job.id)
+    assert (job.status, job.objects_purged) == ('completed', 2)
@@ -0,0 +1,93 @@
+# Response compression tests
+import gzip
+import json
+
+import pytest
+from flask import Response, send_file
+
+from app.middleware import compression
+from app.middleware.compression import is_compressible, negotiate
+from app.extensions import db
+
+
+@pytest.fixture
+def routes(app, tmp_path):
+    """Extra routes returning bodies of a given size and type"""
+    image = tmp_path / 'image.png'
+    image.write_bytes(b'\x89PNG' + b'\0' * 5000)
+
+    @app.route('/_test/body/<int:size>/<path:mimetype>')
+    def _body(size, mimetype):
+        return Response('a' * size, mimetype=mimetype)
+
+    @app.route('/_test/file')
+    def _file():
+        return send_file(image)
+
+    return app
+
+
+def test_large_json_is_gzipped(client, auth_headers, make_file):
+    """Large lists are compressed, with Vary and a smaller Content-Length"""
+    file_record = make_file()
+    file_record.processing_result = 'quarterly revenue grew ' * 500
+    db.session.commit()
+    url = f'/api/files/{file_record.checksum}'
+
+    plain = client.get(url, headers=auth_headers)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = client.get(url, headers=dict(auth_headers, **{'Accept-Encoding': 'gzip, deflate'}))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) < len(plain.get_data()) / 10
+    assert json.loads(gzip.decompress(response.get_data())) == plain.get_json()
+    # Weak ETags stay valid across encodings
+    assert response.headers['ETag'] == plain.headers['ETag']
+
+
+@pytest.mark.parametrize('size, mimetype, accept, encoded', [
+    (500, 'application/json', 'gzip', False),           # below the threshold
+    (5000, 'application/json', 'gzip;q=0, *;q=0.5', False),
+    (5000, 'application/json', 'identity', False),
+    (5000, 'text/csv', '*', True),
+    (5000, 'image/png', 'gzip', False),                 # already compressed
+    (5000, 'image/svg+xml', 'gzip', True),
+    (5000, 'application/zip', 'gzip', False),
+])
+def test_compression_rules(routes, client, size, mimetype, accept, encoded):
+    response = client.get(f'/_test/body/{size}/{mimetype}', headers={'Accept-Encoding': accept})
+    assert ('Content-Encoding' in response.headers) == encoded
+    if encoded:
+        assert gzip.decompress(response.get_data()) == b'a' * size
+
+
+def test_streamed_and_file_responses_pass_through(routes, client, auth_headers, make_file):
+    make_file()
+    headers = {'Accept-Encoding': 'gzip'}
+    assert 'Content-Encoding' not in client.get('/_test/file', headers=headers).headers
+    export = client.get('/api/files/export', headers=dict(auth_headers, **headers))
+    assert export.is_streamed
+    assert 'Content-Encoding' not in export.headers
+
+
+def test_levels_and_threshold_are_configurable(routes, app, client):
+    app.config.update({'COMPRESSION_MIN_SIZE': 100, 'COMPRESSION_LEVELS': {'gzip': 1}})
+    response = client.get('/_test/body/500/text/plain', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == b'a' * 500
+
+
+def test_negotiation(monkeypatch):
+    """The client's preference wins, server order breaks ties, unavailable encoders are skipped"""
+    from werkzeug.http import parse_accept_header
+
+    monkeypatch.setitem(compression.ENCODERS, 'br', lambda data, level: data)
+    algorithms = ['br', 'zstd', 'gzip']
+    assert negotiate(parse_accept_header('gzip, br'), algorithms) == 'br'
+    assert negotiate(parse_accept_header('gzip, br;q=0.5'), algorithms) == 'gzip'
+    assert negotiate(parse_accept_header('zstd'), algorithms) == ('zstd' if compression.zstandard else None)
+    assert negotiate(parse_accept_header(''), algorithms) is None
+    assert is_compressible('application/json', ('image/',))
+    assert not is_compressible(None, ())
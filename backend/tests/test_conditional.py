@@ -0,0 +1,132 @@
+# Conditional request (ETag / If-None-Match) tests
+import hashlib
+from datetime import datetime
+from io import BytesIO
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import AIRequest, User
+from app.services.ai_service import AIService
+from app.services.file_service import FileService
+
+
+def _get(client, url, headers, etag=None):
+    """Request url (conditionally if etag is given) and return the response and its statements"""
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    if etag:
+        headers = dict(headers, **{'If-None-Match': etag})
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+    return response, statements
+
+
+def test_file_details_revalidate(client, auth_headers, make_file):
+    """A current ETag gets an empty 304 from a single narrow lookup"""
+    file_record = make_file()
+    file_record.processing_result = 'x' * 1000
+    db.session.commit()
+    url = f'/api/files/{file_record.checksum}'
+
+    response, _ = _get(client, url, auth_headers)
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert etag.startswith('W/"')
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert response.last_modified is not None
+
+    response, statements = _get(client, url, auth_headers, etag)
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert len(statements) == 1
+    assert 'processing_result' not in statements[0]
+
+    # Different fields are a different representation
+    assert _get(client, f'{url}?fields=checksum', auth_headers, etag)[0].status_code == 200
+
+    FileService.mark_as_processed(file_record.checksum, 'done')
+    response, _ = _get(client, url, auth_headers, etag)
+    assert response.status_code == 200
+    assert response.get_json()['data']['file']['is_processed'] is True
+    assert response.headers['ETag'] != etag
+
+
+def test_conditional_requests_still_check_ownership(client, auth_headers, make_file):
+    """Validators are never compared for files the caller cannot see"""
+    other = User(username='other', email='other@example.com')
+    other.set_password('Test123456')
+    db.session.add(other)
+    db.session.commit()
+    file_record = make_file(owner=other)
+
+    for path in ('', '/processing-status'):
+        url = f'/api/files/{file_record.checksum}{path}'
+        assert _get(client, url, auth_headers, 'W/"x"')[0].status_code == 403
+        assert _get(client, f'/api/files/{"0" * 64}{path}', auth_headers, 'W/"x"')[0].status_code == 404
+
+
+def test_processing_status_poll(client, auth_headers, make_file):
+    """Polls are answered with 304 until the latest request moves"""
+    file_record = make_file()
+    url = f'/api/files/{file_record.checksum}/processing-status'
+
+    response, _ = _get(client, url, auth_headers)
+    etag = response.headers['ETag']
+    assert response.get_json()['data']['latest_request'] is None
+
+    response, statements = _get(client, url, auth_headers, etag)
+    assert response.status_code == 304
+    assert len(statements) == 1
+
+    ai_request = AIRequest(file_checksum=file_record.checksum, user_id=file_record.user_id,
+                           request_type='process', status='processing', attempts=1)
+    db.session.add(ai_request)
+    db.session.flush()
+    file_record.latest_request_id = ai_request.id
+    db.session.commit()
+    response, _ = _get(client, url, auth_headers, etag)
+    assert response.status_code == 200
+    assert response.get_json()['data']['latest_request']['id'] == ai_request.id
+    etag = response.headers['ETag']
+
+    assert _get(client, url, auth_headers, etag)[0].status_code == 304
+    AIService.transition(ai_request.id, 'processing', 'retrying', next_attempt_at=datetime.utcnow())
+    response, _ = _get(client, url, auth_headers, etag)
+    assert response.status_code == 200
+    assert response.get_json()['data']['latest_request']['status'] == 'retrying'
+
+
+def test_file_list_revalidate(client, auth_headers, make_file, storage):
+    """Listings change ETag on every upload, processing change and delete"""
+    existing = make_file(b'existing', 'existing.txt')
+    response, _ = _get(client, '/api/files/', auth_headers)
+    etag = response.headers['ETag']
+
+    response, statements = _get(client, '/api/files/', auth_headers, etag)
+    assert response.status_code == 304
+    assert len(statements) == 1
+    # The query string is part of the representation
+    assert _get(client, '/api/files/?per_page=1', auth_headers, etag)[0].status_code == 200
+
+    checksum = hashlib.sha256(b'one').hexdigest()
+    changes = [
+        lambda: client.post('/api/files/upload', data={'file': (BytesIO(b'one'), 'one.txt')}, headers=auth_headers),
+        lambda: FileService.mark_as_processed(checksum, 'done'),
+        lambda: FileService.mark_as_processed(checksum, 'done again'),
+        lambda: client.delete(f'/api/files/{existing.checksum}', headers=auth_headers),
+    ]
+    for change in changes:
+        change()
+        response, _ = _get(client, '/api/files/', auth_headers, etag)
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        etag = response.headers['ETag']
+    assert [f['checksum'] for f in response.get_json()['data']['files']] == [checksum]
@@ -0,0 +1,166 @@
+# Connection pool profile and telemetry tests
+import os
+import subprocess
+import sys
+
+import pytest
+from prometheus_client import multiprocess
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+
+from app.config import _env_int
+from app.utils.db_pool import InstrumentedQueuePool, build_engine_options
+from app.utils.metrics import (
+    DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_CHECKOUT_WAIT, DB_POOL_IDLE, DB_POOL_IN_USE, register_pool_gauges
+)
+
+POSTGRES_URI = 'postgresql://user:secret@db:5432/app'
+
+
+def test_profile_with_overrides():
+    """Profiles supply pool settings and DB_* values override them"""
+    options = build_engine_options({
+        'SQLALCHEMY_DATABASE_URI': POSTGRES_URI,
+        'DB_POOL_PROFILE': 'web',
+        'DB_POOL_SIZE': 20,
+        'DB_STATEMENT_TIMEOUT_MS': 5000,
+    })
+
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert options['pool_size'] == 20
+    assert options['max_overflow'] == 5
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+
+def test_statement_timeout_merges_with_engine_options():
+    """connect_args from SQLALCHEMY_ENGINE_OPTIONS keep the statement timeout"""
+    options = build_engine_options({
+        'SQLALCHEMY_DATABASE_URI': POSTGRES_URI,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'sslmode': 'require', 'options': '-c lock_timeout=1000'}},
+        'DB_STATEMENT_TIMEOUT_MS': 5000,
+    })
+
+    assert options['connect_args'] == {
+        'sslmode': 'require',
+        'options': '-c lock_timeout=1000 -c statement_timeout=5000',
+    }
+
+
+def test_pgbouncer_profile_disables_client_pool():
+    """Transaction pooling mode leaves pooling and startup options to PgBouncer"""
+    options = build_engine_options({
+        'SQLALCHEMY_DATABASE_URI': POSTGRES_URI,
+        'DB_POOL_PROFILE': 'pgbouncer',
+        'DB_POOL_SIZE': 20,
+        'DB_STATEMENT_TIMEOUT_MS': 5000,
+    })
+
+    assert options['poolclass'] is NullPool
+    assert 'pool_size' not in options
+    assert 'connect_args' not in options
+
+
+def test_sqlite_and_unknown_profiles():
+    """SQLite keeps its own pooling; unknown profile names are rejected"""
+    assert build_engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}) == {}
+    with pytest.raises(ValueError):
+        build_engine_options({'SQLALCHEMY_DATABASE_URI': POSTGRES_URI, 'DB_POOL_PROFILE': 'huge'})
+
+
+def test_statement_timeout_can_be_turned_off(monkeypatch):
+    """DB_STATEMENT_TIMEOUT_MS=0 disables the timeout instead of falling back to the default"""
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '0')
+    assert _env_int('DB_STATEMENT_TIMEOUT_MS', 30000) == 0
+    monkeypatch.delenv('DB_STATEMENT_TIMEOUT_MS')
+    assert _env_int('DB_STATEMENT_TIMEOUT_MS', 30000) == 30000
+
+    options = build_engine_options({'SQLALCHEMY_DATABASE_URI': POSTGRES_URI, 'DB_STATEMENT_TIMEOUT_MS': 0})
+    assert 'connect_args' not in options
+
+
+def test_checkout_wait_and_timeouts_are_recorded(tmp_path):
+    """Waiting for an exhausted pool is observed and timeouts are counted"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    timeouts_before = DB_POOL_CHECKOUT_TIMEOUTS._value.get()
+    waits_before = DB_POOL_CHECKOUT_WAIT._sum.get()
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+    engine.dispose()
+
+    assert DB_POOL_CHECKOUT_TIMEOUTS._value.get() == timeouts_before + 1
+    assert DB_POOL_CHECKOUT_WAIT._sum.get() - waits_before >= 0.05
+
+
+def test_metrics_endpoint(client):
+    """Pool metrics are exposed in the Prometheus format"""
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert b'db_pool_checkout_wait_seconds' in response.data
+
+
+def test_pool_gauges_follow_checkouts(tmp_path):
+    """Gauges are updated as connections move, also after dispose() replaces the pool"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                           pool_size=2, max_overflow=0)
+    register_pool_gauges('gauges', engine.pool)
+    in_use, idle = DB_POOL_IN_USE.labels(bind='gauges'), DB_POOL_IDLE.labels(bind='gauges')
+
+    connection = engine.connect()
+    assert (in_use._value.get(), idle._value.get()) == (1, 0)
+    connection.close()
+    assert (in_use._value.get(), idle._value.get()) == (0, 1)
+
+    engine.dispose()
+    assert idle._value.get() == 0
+    engine.connect().close()
+    assert idle._value.get() == 1
+    engine.dispose()
+
+
+def test_metrics_are_merged_across_processes(tmp_path):
+    """With PROMETHEUS_MULTIPROC_DIR each process writes its own values and a scrape adds them up"""
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    cwd = os.path.join(os.path.dirname(__file__), '..')
+    record = (
+        "import os\n"
+        "from app.utils.metrics import DB_POOL_CONNECTIONS, DB_POOL_IN_USE\n"
+        "DB_POOL_CONNECTIONS.labels(bind='merged').inc()\n"
+        "DB_POOL_IN_USE.labels(bind='merged').set(3)\n"
+        "print(os.getpid())\n"
+    )
+    pids = [
+        int(subprocess.run([sys.executable, '-c', record], env=env, cwd=cwd, check=True,
+                           capture_output=True, text=True).stdout)
+        for _ in range(2)
+    ]
+
+    def scrape():
+        render = "from app.utils.metrics import render_metrics; print(render_metrics()[0].decode())"
+        return subprocess.run([sys.executable, '-c', render], env=env, cwd=cwd, check=True,
+                              capture_output=True, text=True).stdout
+
+    output = scrape()
+    assert 'db_pool_connections_opened_total{bind="merged"} 2.0' in output
+    assert 'db_pool_checked_out{bind="merged"} 6.0' in output
+
+    # gunicorn's child_exit hook: an exited worker's gauges stop counting, its counters stay
+    multiprocess.mark_process_dead(pids[0], str(tmp_path))
+    output = scrape()
+    assert 'db_pool_connections_opened_total{bind="merged"} 2.0' in output
+    assert 'db_pool_checked_out{bind="merged"} 3.0' in output
+
+
+def test_metrics_token(app, client):
+    """A configured METRICS_TOKEN must be sent as a bearer token"""
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
@@ -0,0 +1,141 @@
+# Local text extraction tests
+import base64
+import io
+import json
+import time
+import zipfile
+
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.extraction_service import (
+    EXTRACTORS, ExtractionTimeout, TextExtractionService, extract_text, extract_text_with_deadline,
+    DOCX_MIME_TYPE
+)
+
+
+def _docx_bytes(*paragraphs):
+    """Build a minimal DOCX document in memory"""
+    body = ''.join(f'<w:p><w:r><w:t>{p}</w:t></w:r></w:p>' for p in paragraphs)
+    document = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', document)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def clear_extraction_cache():
+    TextExtractionService.clear_cache()
+    yield
+    TextExtractionService.clear_cache()
+
+
+def test_extract_text_by_mime_type():
+    """Text is extracted per supported MIME type"""
+    assert extract_text('text/plain', b'hello') == 'hello'
+    assert extract_text('text/csv', b'a,b\n1,2\n') == 'a\tb\n1\t2'
+    assert extract_text(DOCX_MIME_TYPE, _docx_bytes('First', 'Second')) == 'First\nSecond'
+    assert extract_text('image/png', b'\x89PNG') is None
+
+
+def test_extracted_text_is_cached_by_checksum(app, make_file, monkeypatch):
+    """A second extraction for the same checksum is served from the cache"""
+    file_record = make_file(b'cached text')
+    assert TextExtractionService.get_text(file_record, b'cached text') == 'cached text'
+
+    monkeypatch.setattr('app.services.extraction_service.extract_text',
+                        lambda *args: pytest.fail('cache miss'))
+    assert TextExtractionService.get_text(file_record, b'cached text') == 'cached text'
+
+
+def test_ai_payload_sends_text_only(app, make_file, monkeypatch):
+    """Supported documents are sent as extracted text instead of base64 content"""
+    content = _docx_bytes('Quarterly report', 'Revenue grew')
+    file_record = make_file(content, 'report.docx', DOCX_MIME_TYPE)
+    app.config.update({'AI_API_URL': 'http://ai.invalid', 'AI_API_KEY': 'key'})
+    sent = {}
+
+    def fake_send(api_url, api_key, record, file_base64, text=None):
+        sent.update(file_base64=file_base64, text=text)
+        return {'success': True, 'result': 'ok'}
+
+    monkeypatch.setattr(AIService, '_send_to_ai_api', staticmethod(fake_send))
+    assert AIService.process_file(file_record.checksum, file_record.user_id)[0]
+
+    assert sent == {'file_base64': None, 'text': 'Quarterly report\nRevenue grew'}
+
+
+def test_ai_payload_keeps_binary_when_no_text_is_extracted(app, make_file, monkeypatch):
+    """An image-only PDF yields no text, so the whole file is sent instead"""
+    pypdf = pytest.importorskip('pypdf')
+    writer = pypdf.PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    content = buffer.getvalue()
+    assert extract_text('application/pdf', content) == ''
+
+    file_record = make_file(content, 'scan.pdf', 'application/pdf')
+    app.config.update({'AI_API_URL': 'http://ai.invalid', 'AI_API_KEY': 'key'})
+    sent = {}
+
+    def fake_send(api_url, api_key, record, file_base64, text=None):
+        sent.update(file_base64=file_base64, text=text)
+        return {'success': True, 'result': 'ok'}
+
+    monkeypatch.setattr(AIService, '_send_to_ai_api', staticmethod(fake_send))
+    assert AIService.process_file(file_record.checksum, file_record.user_id)[0]
+
+    assert sent['text'] is None
+    assert base64.b64decode(sent['file_base64']) == content
+
+
+def test_ai_payload_keeps_binary_for_other_request_types(app, ai_stub, make_file):
+    """Request types outside AI_TEXT_ONLY_REQUEST_TYPES still send the whole file"""
+    file_record = make_file(b'plain text body')
+
+    assert AIService.process_file(file_record.checksum, file_record.user_id, request_type='ocr')[0]
+    # The stub reports the length of what it received: base64 of 15 bytes
+    assert file_record.processing_result.startswith('Processed test.txt (20 chars)')
+
+
+def test_extraction_runs_in_process_pool(app, make_file):
+    """Extraction is offloaded to worker processes when configured"""
+    app.config['TEXT_EXTRACTION_WORKERS'] = 1
+    try:
+        file_record = make_file(b'a,b\n', 'data.csv', 'text/csv')
+        assert TextExtractionService.get_text(file_record, b'a,b\n') == 'a\tb'
+        assert TextExtractionService._executor is not None
+    finally:
+        TextExtractionService.shutdown()
+
+
+def test_worker_deadline_interrupts_a_stuck_parser(monkeypatch):
+    """A parser that overruns the deadline raises instead of holding its worker"""
+    monkeypatch.setitem(EXTRACTORS, 'text/plain', lambda data: time.sleep(5))
+    started = time.monotonic()
+    with pytest.raises(ExtractionTimeout):
+        extract_text_with_deadline('text/plain', b'stuck', 0.05)
+    assert time.monotonic() - started < 1
+
+
+def test_timed_out_extraction_recycles_the_pool(app, make_file):
+    """When a running extraction times out, later ones go to a fresh pool"""
+    app.config.update({'TEXT_EXTRACTION_WORKERS': 1, 'TEXT_EXTRACTION_TIMEOUT': 0.2})
+    try:
+        stuck = TextExtractionService.get_executor()
+        # Occupies the only worker; the extraction behind it is already handed to the pool
+        stuck.submit(time.sleep, 2)
+        file_record = make_file(b'a,b\n', 'data.csv', 'text/csv')
+        assert TextExtractionService.get_text(file_record, b'a,b\n') is None
+        assert TextExtractionService._executor is None
+
+        app.config['TEXT_EXTRACTION_TIMEOUT'] = 30
+        assert TextExtractionService.get_text(file_record, b'a,b\n') == 'a\tb'
+        assert TextExtractionService._executor is not stuck
+    finally:
+        TextExtractionService.shutdown()
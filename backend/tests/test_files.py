@@ -1,7 +1,14 @@
 # File upload tests
-import pytest
+from datetime import datetime
 from io import BytesIO
 
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import AIRequest
+from app.services.ai_service import AIService
+
 
 def test_file_upload(client, auth_headers):
     """Test file upload"""
@@ -12,19 +19,138 @@ def test_file_upload(client, auth_headers):
     pass
 
 
-def test_list_files(client, auth_headers):
-    """Test listing files"""
-    # TODO: Implement list files test
-    pass
+def test_list_files(client, auth_headers, make_file):
+    """Cursor pagination walks every file once, newest first, ties broken by checksum"""
+    same_time = datetime(2024, 1, 1, 12, 0, 0)
+    files = [make_file(f'content {i}'.encode(), f'file{i}.txt') for i in range(5)]
+    for file_record in files[:3]:
+        file_record.uploaded_at = same_time
+    files[3].uploaded_at = datetime(2024, 1, 2)
+    files[4].uploaded_at = datetime(2023, 12, 31)
+    db.session.commit()
 
+    seen = []
+    cursor = None
+    while True:
+        query = {'per_page': 2, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/api/files/', query_string=query, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        seen.extend(f['checksum'] for f in data['files'])
+        assert 'total' not in data['pagination']
+        cursor = data['pagination']['next_cursor']
+        if not data['pagination']['has_more']:
+            assert cursor is None
+            break
 
-def test_get_file(client, auth_headers):
-    """Test getting specific file"""
-    # TODO: Implement get file test
-    pass
+    tied = sorted((f.checksum for f in files[:3]), reverse=True)
+    assert seen == [files[3].checksum, *tied, files[4].checksum]
+
+
+def test_list_files_total_and_legacy_pages(client, auth_headers, make_file):
+    """Totals are opt-in and page numbers still select offset pagination"""
+    for i in range(3):
+        make_file(f'content {i}'.encode(), f'file{i}.txt')
+
+    response = client.get('/api/files/?total=estimate', headers=auth_headers)
+    pagination = response.get_json()['data']['pagination']
+    assert pagination['total'] == 3
+    assert pagination['total_is_estimate'] is False  # SQLite counts exactly
+
+    response = client.get('/api/files/?page=2&per_page=2', headers=auth_headers)
+    data = response.get_json()['data']
+    assert len(data['files']) == 1
+    assert data['pagination']['pages'] == 2
+
+
+@pytest.mark.parametrize('query', ['cursor=not-a-cursor', 'cursor=WzFd', 'cursor=WzEyMywieCJd', 'total=all',
+                                   'fields=checksum,owner'])
+def test_list_files_rejects_bad_arguments(client, auth_headers, query):
+    """Malformed cursors, unknown total modes and unknown fields are client errors"""
+    response = client.get(f'/api/files/?{query}', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def _selects(client, url, headers):
+    """Request url and return the SELECT statements issued against files"""
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+    assert response.status_code == 200
+    return response.get_json()['data'], [s for s in statements if s.startswith('SELECT') and 'files' in s]
+
+
+def test_list_files_projects_fields(client, auth_headers, make_file):
+    """Lists skip processing_result by default and fetch only the requested fields"""
+    file_record = make_file()
+    file_record.processing_result = 'x' * 10000
+    db.session.commit()
+
+    data, selects = _selects(client, '/api/files/', auth_headers)
+    assert 'processing_result' not in data['files'][0]
+    assert data['files'][0]['filename'] == 'test.txt'
+    assert all('processing_result' not in s for s in selects)
+
+    data, selects = _selects(client, '/api/files/?fields=filename,size,uploaded_at&per_page=1', auth_headers)
+    assert data['files'] == [{'filename': 'test.txt', 'size': file_record.file_size,
+                              'uploaded_at': file_record.uploaded_at.isoformat()}]
+    assert all('mime_type' not in s and 'processing_result' not in s for s in selects)
+
+    data, _ = _selects(client, '/api/files/?page=1&fields=checksum,processing_result', auth_headers)
+    assert data['files'] == [{'checksum': file_record.checksum, 'processing_result': 'x' * 10000}]
+
+
+def test_get_file(client, auth_headers, make_file):
+    """Details include every field unless fields narrows them"""
+    file_record = make_file()
+
+    data, _ = _selects(client, f'/api/files/{file_record.checksum}', auth_headers)
+    assert set(data['file']) == set(file_record.FIELDS)
+
+    data, selects = _selects(client, f'/api/files/{file_record.checksum}?fields=is_processed', auth_headers)
+    assert data['file'] == {'is_processed': False}
+    assert all('original_filename' not in s for s in selects)
 
 
 def test_delete_file(client, auth_headers):
     """Test deleting file"""
     # TODO: Implement delete file test
     pass
+
+
+def test_processing_status_uses_latest_request_pointer(client, auth_headers, make_file, app, ai_stub):
+    """Creating a request moves the file's pointer; status is one join however long the history"""
+    file_record = make_file()
+    for _ in range(20):
+        db.session.add(AIRequest(file_checksum=file_record.checksum, user_id=file_record.user_id,
+                                 request_type='process', status='failed'))
+    db.session.commit()
+
+    success, _, ai_request = AIService.process_file(file_record.checksum, file_record.user_id)
+    assert success
+    db.session.expire_all()
+    assert file_record.latest_request_id == ai_request.id
+
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        response = client.get(f'/api/files/{file_record.checksum}/processing-status', headers=auth_headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+
+    assert response.status_code == 200
+    latest = response.get_json()['data']['latest_request']
+    assert latest['id'] == ai_request.id
+    assert latest['status'] == 'completed'
+    assert len([s for s in statements if 'ai_requests' in s]) == 1
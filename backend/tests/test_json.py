@@ -0,0 +1,62 @@
+# JSON provider and streamed response tests
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.utils import json_provider
+from app.utils.responses import streamed_list_response
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_provider_encodes_dates_as_iso(app, monkeypatch, use_orjson):
+    """Both encoders write ISO 8601 datetimes and keep key order"""
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+
+    value = {'b': datetime(2024, 1, 2, 3, 4, 5, 678000), 'a': date(2024, 1, 2), 'n': Decimal('1.5'), 'é': None}
+    encoded = app.json.dumps(value)
+    assert json.loads(encoded) == {'b': '2024-01-02T03:04:05.678000', 'a': '2024-01-02', 'n': '1.5', 'é': None}
+    assert list(app.json.loads(encoded)) == ['b', 'a', 'n', 'é']
+    body = app.json.dumps_bytes(value)
+    assert json.loads(body) == json.loads(encoded)
+    with app.test_request_context():
+        assert app.json.response(value).get_data() == body + b'\n'
+
+
+def test_model_datetimes_in_responses(client, auth_headers, make_file):
+    """to_dict hands datetimes to the provider, clients still get ISO strings"""
+    file_record = make_file()
+    data = client.get(f'/api/files/{file_record.checksum}', headers=auth_headers).get_json()['data']
+    assert data['file']['uploaded_at'] == file_record.uploaded_at.isoformat()
+    assert client.get('/apispec.json').status_code == 200
+
+
+@pytest.mark.parametrize('count', [0, 2, 5])
+def test_streamed_list_response(app, count):
+    """Streamed arrays decode to the same document success_response would build"""
+    with app.test_request_context():
+        response = streamed_list_response('items', iter(range(count)), lambda i: {'i': i},
+                                          extra={'next': None}, message='Done', chunk_size=2)
+        body = b''.join(response.response)
+    assert json.loads(body) == {
+        'data': {'items': [{'i': i} for i in range(count)], 'next': None},
+        'message': 'Done',
+        'status': 'success'
+    }
+
+
+def test_export_streams_every_file(client, auth_headers, make_file):
+    """The export endpoint returns all files, newest first, with sparse fields"""
+    files = [make_file(f'content {i}'.encode(), f'file{i}.txt') for i in range(3)]
+    response = client.get('/api/files/export?fields=checksum,uploaded_at', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    exported = response.get_json()['data']['files']
+    expected = sorted(files, key=lambda f: (f.uploaded_at, f.checksum), reverse=True)
+    assert exported == [{'checksum': f.checksum, 'uploaded_at': f.uploaded_at.isoformat()} for f in expected]
+
+    assert client.get('/api/files/export?fields=nope', headers=auth_headers).status_code == 400
@@ -0,0 +1,220 @@
+# Query plan regression tests for the hot paths
+"""
+Seeds realistic volumes, runs each service call while capturing the SQL it
+issues, and EXPLAINs every captured statement. A full scan (or a sort that
+the index should have provided) on a hot table fails the test.
+
+Runs on in-memory SQLite by default. Set QUERY_PLAN_DATABASE_URL to a
+scratch PostgreSQL database to check real plans, including row estimates.
+The seeded tables are small enough that PostgreSQL may rightly prefer a
+sequential scan, so plans are made with enable_seqscan off: a Seq Scan left
+in the plan means no index can serve the statement.
+"""
+import hashlib
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app import create_app
+from app.extensions import db
+from app.models import User, File, AIRequest
+from app.services.ai_service import AIService
+from app.services.auth_service import AuthService
+from app.services.bulk_delete_service import BulkDeleteService
+from app.services.file_service import FileService
+from app.services.recovery_service import RecoveryService
+from app.services.usage_service import UsageService
+from app.utils.pagination import encode_cursor
+
+HOT_TABLES = {'users', 'files', 'ai_requests', 'usage_counters', 'request_status_counters',
+              'storage_purge_tasks'}
+
+USERS = 50
+FILES_PER_USER = 100
+REQUESTS_PER_FILE = 4
+# A single-user query may be estimated at up to this many rows (PostgreSQL)
+MAX_ESTIMATED_ROWS = FILES_PER_USER * REQUESTS_PER_FILE * 2
+
+BASE_TIME = datetime(2024, 1, 1)
+STATUSES = ('completed', 'completed', 'failed', 'processing', 'retrying', 'dead_letter')
+
+
+def _checksum(user_index, file_index):
+    return hashlib.sha256(f'{user_index}:{file_index}'.encode()).hexdigest()
+
+
+def _seed():
+    db.session.execute(insert(User), [
+        {'username': f'user{u}', 'email': f'user{u}@example.com',
+         'password_hash': 'x', 'is_admin': False, 'created_at': BASE_TIME}
+        for u in range(USERS)
+    ])
+    files, requests_ = [], []
+    for u in range(USERS):
+        for f in range(FILES_PER_USER):
+            uploaded_at = BASE_TIME + timedelta(minutes=f)
+            checksum = _checksum(u, f)
+            files.append({
+                'checksum': checksum, 'original_filename': f'{f}.txt', 'stored_filename': f'{f}.txt',
+                'filepath': f'/nonexistent/{checksum}.txt', 'file_size': 1, 'mime_type': 'text/plain',
+                'user_id': u + 1, 'uploaded_at': uploaded_at, 'is_processed': False,
+            })
+            for r in range(REQUESTS_PER_FILE):
+                status = STATUSES[(f + r) % len(STATUSES)]
+                requests_.append({
+                    'file_checksum': checksum, 'user_id': u + 1, 'request_type': 'process',
+                    'status': status, 'attempts': 1, 'max_attempts': 5, 'chunks_completed': 0,
+                    'created_at': uploaded_at + timedelta(seconds=r),
+                    'lease_expires_at': uploaded_at + timedelta(hours=1) if status == 'processing' else None,
+                    'next_attempt_at': uploaded_at + timedelta(hours=1) if status == 'retrying' else None,
+                })
+    db.session.execute(insert(File), files)
+    db.session.execute(insert(AIRequest), requests_)
+    db.session.commit()
+    UsageService.reconcile()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def plan_app():
+    """Application with a seeded database, shared by every plan test"""
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': os.getenv('QUERY_PLAN_DATABASE_URL', 'sqlite:///:memory:'),
+        'JWT_SECRET_KEY': 'test-secret-key',
+    })
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        _seed()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@contextmanager
+def captured_statements():
+    """Collect the SELECT/UPDATE/DELETE statements executed inside the block"""
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', _capture)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _capture)
+
+
+def _sqlite_problems(connection, statement, parameters):
+    problems = []
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    for row in plan:
+        detail = row[-1]
+        words = detail.split()
+        if words[0] == 'SCAN' and words[1] in HOT_TABLES:
+            problems.append(detail)
+        if detail.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in detail:
+            problems.append(detail)
+    return problems
+
+
+def _postgres_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _postgres_nodes(child)
+
+
+def _postgres_problems(connection, statement, parameters):
+    problems = []
+    # Only for this transaction; assert_indexed rolls it back
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()[0]['Plan']
+    for node in _postgres_nodes(plan):
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in HOT_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+        if node['Node Type'] in ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan') \
+                and node['Plan Rows'] > MAX_ESTIMATED_ROWS:
+            problems.append(f"{node['Node Type']} estimated at {node['Plan Rows']} rows")
+    return problems
+
+
+def assert_indexed(operation):
+    """Run an operation and fail if any statement it issues scans a hot table"""
+    with captured_statements() as statements:
+        operation()
+    db.session.rollback()
+    assert statements, "operation issued no queries"
+
+    connection = db.session.connection()
+    explain = _postgres_problems if connection.dialect.name == 'postgresql' else _sqlite_problems
+    failures = {}
+    for statement, parameters in statements:
+        problems = explain(connection, statement, parameters)
+        if problems:
+            failures[statement] = problems
+    db.session.rollback()
+    assert not failures, failures
+
+
+def _quietly(call):
+    """Run a call that is expected to raise ValueError (e.g. bad credentials)"""
+    def _run():
+        try:
+            call()
+        except ValueError:
+            pass
+    return _run
+
+
+USER_ID = USERS // 2
+CHECKSUM = _checksum(USER_ID - 1, FILES_PER_USER // 2)
+MID_TIME = BASE_TIME + timedelta(minutes=FILES_PER_USER // 2)
+PAST = BASE_TIME - timedelta(days=1)
+
+HOT_PATHS = {
+    # FileService
+    'file_by_checksum': lambda: FileService.get_file_by_checksum(CHECKSUM),
+    'file_list_offset': lambda: FileService.get_user_files(USER_ID, page=3, per_page=20),
+    'file_list_keyset': lambda: FileService.get_user_files_page(
+        USER_ID, encode_cursor([MID_TIME, CHECKSUM]), per_page=20, total='exact'),
+    'file_delete_not_owned': lambda: FileService.delete_file(CHECKSUM, USER_ID + 1),
+    'file_with_latest_request': lambda: FileService.get_file_with_latest_request(CHECKSUM),
+    'file_validator': lambda: FileService.get_file_validator(CHECKSUM, with_request=True),
+    # AIService
+    'ai_history_offset': lambda: AIService.get_request_history(USER_ID, page=3, per_page=20),
+    'ai_history_keyset': lambda: AIService.get_request_history_page(
+        USER_ID, encode_cursor([MID_TIME, 10 ** 6]), per_page=20, total='exact'),
+    'ai_request_by_id': lambda: AIService.get_request_by_id(123, USER_ID),
+    'ai_transition': lambda: AIService.transition(123, 'processing', 'completed', commit=False),
+    # AuthService
+    'auth_login': _quietly(lambda: AuthService().authenticate_user('user1@example.com', 'wrong')),
+    'auth_register_existing': _quietly(lambda: AuthService().register_user('user1', 'x', 'user1@example.com')),
+    # UsageService
+    'usage_stats': lambda: UsageService.get_user_stats(USER_ID),
+    'file_list_version': lambda: UsageService.get_file_list_version(USER_ID),
+    # RecoveryService
+    'recovery_reap': lambda: RecoveryService.reap_expired_leases(now=PAST, batch_size=100),
+    'recovery_due_retries': lambda: RecoveryService.claim_due_retries(limit=10, now=PAST),
+    # BulkDeleteService
+    'bulk_delete_missing': lambda: BulkDeleteService.delete_files(USER_ID, ['0' * 64]),
+    'purge_claim': lambda: BulkDeleteService._claim(10, now=PAST),
+    'purge_claim_job': lambda: BulkDeleteService._claim(10, job_id=1, now=PAST),
+}
+
+
+@pytest.mark.parametrize('name', sorted(HOT_PATHS))
+def test_hot_path_uses_indexes(plan_app, name):
+    """Every statement on a hot path is served by an index"""
+    assert_indexed(HOT_PATHS[name])
+
+
+def test_plan_check_detects_full_scans(plan_app):
+    """The checker itself flags an unindexed filter"""
+    with pytest.raises(AssertionError):
+        assert_indexed(lambda: File.query.filter_by(original_filename='1.txt').all())
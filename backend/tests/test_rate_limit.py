@@ -0,0 +1,111 @@
+# API rate limiting tests
+import jwt
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.middleware.rate_limiter import LocalWindowStore, RateLimiter, RedisWindowStore
+
+
+@pytest.fixture
+def limited_app(app):
+    """The app with rate limiting on and a small budget"""
+    app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT=20, RATE_LIMIT_WINDOW_SECONDS=60)
+    return app
+
+
+def test_sliding_window_counts_previous_window():
+    """The previous window's usage counts in proportion to its overlap"""
+    limiter = RateLimiter(10, 60, LocalWindowStore())
+    for _ in range(10):
+        assert limiter.hit('k', now=60.0)[0]
+    assert limiter.hit('k', now=119.0) == (False, 0, 1)
+
+    # A quarter into the next window, three quarters of the old usage remains
+    allowed, remaining, reset = limiter.hit('k', now=135.0)
+    assert allowed and remaining == 2 and reset == 45
+    assert limiter.hit('k', cost=3, now=135.0)[0] is False
+    assert limiter.hit('k', cost=2, now=135.0)[0] is True
+
+
+def test_headers_costs_and_429(client, limited_app, auth_headers):
+    """Requests spend their route's cost and are refused once the budget is gone"""
+    response = client.get('/api/files/', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers['X-RateLimit-Limit'] == '20'
+    assert response.headers['X-RateLimit-Remaining'] == '19'
+
+    response = client.get('/api/files/search?q=report', headers=auth_headers)
+    assert response.headers['X-RateLimit-Remaining'] == '17'
+
+    for _ in range(17):
+        client.get('/api/files/', headers=auth_headers)
+    response = client.get('/api/files/', headers=auth_headers)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert response.headers['X-RateLimit-Remaining'] == '0'
+
+    # Health checks and metrics are never limited
+    assert client.get('/api/health/').status_code == 200
+    assert 'X-RateLimit-Limit' not in client.get('/api/health/').headers
+
+
+def test_keys_by_identity_then_ip(client, limited_app, user):
+    """Each user has their own budget; anonymous clients are keyed by IP"""
+    other = create_access_token(identity='999')
+    for _ in range(20):
+        client.get('/api/files/', headers={'Authorization': f'Bearer {other}'})
+    assert client.get('/api/files/', headers={'Authorization': f'Bearer {other}'}).status_code == 429
+
+    token = create_access_token(identity=str(user.id))
+    assert client.get('/api/files/', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+    # Logins cost 5 and share the IP's budget
+    for _ in range(4):
+        client.post('/api/auth/login', json={'email': user.email, 'password': 'wrong'})
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'Test123456'})
+    assert response.status_code == 429
+    # A token that fails verification does not buy a fresh budget
+    forged = jwt.encode({'sub': '12345', 'type': 'access'}, 'other-secret', algorithm='HS256')
+    assert client.get('/api/files/', headers={'Authorization': f'Bearer {forged}'}).status_code == 429
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'Test123456'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 200
+
+
+def test_trusted_proxy_address(client, limited_app, user):
+    """Behind a trusted proxy the client address comes from X-Forwarded-For"""
+    limited_app.config['RATE_LIMIT_TRUSTED_PROXIES'] = 1
+    for _ in range(4):
+        client.post('/api/auth/login', json={'email': user.email, 'password': 'wrong'},
+                    headers={'X-Forwarded-For': '198.51.100.7, 203.0.113.1'})
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'wrong'},
+                           headers={'X-Forwarded-For': '203.0.113.1'})
+    assert response.status_code == 429
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'wrong'},
+                           headers={'X-Forwarded-For': '203.0.113.1, 203.0.113.2'})
+    assert response.status_code == 401
+
+
+def test_store_errors_fail_open(client, limited_app, auth_headers):
+    """An unreachable store lets requests through without limit headers"""
+    class BrokenStore:
+        def hit(self, *args):
+            raise ConnectionError('redis down')
+
+    limited_app.extensions['rate_limiter'] = RateLimiter(20, 60, BrokenStore())
+    response = client.get('/api/files/', headers=auth_headers)
+    assert response.status_code == 200
+    assert 'X-RateLimit-Limit' not in response.headers
+
+
+def test_redis_store_shared_between_limiters():
+    """Limiters in different processes share one budget through Redis"""
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeStrictRedis()
+    first = RateLimiter(10, 60, RedisWindowStore(client, 60))
+    second = RateLimiter(10, 60, RedisWindowStore(client, 60))
+
+    assert first.hit('user:1', cost=6, now=60.0)[0]
+    assert second.hit('user:1', cost=5, now=61.0)[0] is False
+    assert second.hit('user:1', cost=4, now=61.0) == (True, 0, 59)
+    assert client.ttl('ratelimit:user:1:1') > 0
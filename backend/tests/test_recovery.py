@@ -0,0 +1,108 @@
+# Crash recovery, retry and dead-letter tests
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import AIRequest, User
+from app.services.ai_service import AIService
+from app.services.recovery_service import RecoveryService
+
+
+def _stuck_request(file_record, attempts=1, max_attempts=3, minutes_ago=30):
+    ai_request = AIRequest(
+        file_checksum=file_record.checksum,
+        user_id=file_record.user_id,
+        request_type='process',
+        status='processing',
+        attempts=attempts,
+        max_attempts=max_attempts,
+        lease_expires_at=datetime.utcnow() - timedelta(minutes=minutes_ago)
+    )
+    db.session.add(ai_request)
+    db.session.commit()
+    return ai_request
+
+
+def test_reaper_reschedules_and_dead_letters(app, make_file):
+    """Expired leases are retried while attempts remain, dead-lettered otherwise"""
+    file_record = make_file()
+    retryable = _stuck_request(file_record, attempts=1)
+    exhausted = _stuck_request(file_record, attempts=3)
+    live = _stuck_request(file_record, minutes_ago=-10)
+
+    rescheduled, dead_lettered = RecoveryService.reap_expired_leases(batch_size=1)
+
+    assert (rescheduled, dead_lettered) == (1, 1)
+    db.session.expire_all()
+    assert db.session.get(AIRequest, retryable.id).status == 'retrying'
+    assert db.session.get(AIRequest, exhausted.id).status == 'dead_letter'
+    assert db.session.get(AIRequest, live.id).status == 'processing'
+
+
+def test_due_retry_is_processed(app, ai_stub, make_file):
+    """The retry scheduler claims due retries and runs them"""
+    file_record = make_file()
+    ai_request = _stuck_request(file_record)
+    RecoveryService.reap_expired_leases()
+
+    assert RecoveryService.process_due_retries() == (1, 0)
+
+    ai_request = db.session.get(AIRequest, ai_request.id)
+    assert ai_request.status == 'completed'
+    assert ai_request.attempts == 2
+    assert db.session.get(type(file_record), file_record.checksum).is_processed
+
+
+def test_failures_back_off_until_dead_letter(app, ai_stub, make_file):
+    """Each failed attempt backs off exponentially and the last one dead-letters"""
+    app.config.update({'AI_API_MAX_RETRIES': 0, 'AI_MAX_ATTEMPTS': 2, 'AI_RETRY_BACKOFF_BASE': 60})
+    ai_stub.configure(error_rate=1.0)
+    file_record = make_file()
+
+    _, _, ai_request = AIService.process_file(file_record.checksum, file_record.user_id)
+    ai_request = db.session.get(AIRequest, ai_request.id)
+    assert ai_request.status == 'retrying'
+    assert ai_request.next_attempt_at > datetime.utcnow() + timedelta(seconds=50)
+
+    # Not due yet, then due
+    assert RecoveryService.process_due_retries() == (0, 0)
+    assert RecoveryService.process_due_retries(now=ai_request.next_attempt_at) == (0, 1)
+    assert db.session.get(AIRequest, ai_request.id).status == 'dead_letter'
+
+
+def test_admin_requeue_endpoint(app, client, auth_headers, make_file):
+    """Admins can bulk requeue dead letters; other users cannot"""
+    file_record = make_file()
+    ai_request = _stuck_request(file_record, attempts=3)
+    RecoveryService.reap_expired_leases()
+
+    response = client.post('/api/admin/ai-requests/requeue', json={}, headers=auth_headers)
+    assert response.status_code == 403
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('Admin123456')
+    db.session.add(admin)
+    db.session.commit()
+    admin_headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+
+    listed = client.get('/api/admin/ai-requests/dead-letter', headers=admin_headers)
+    assert [r['id'] for r in listed.get_json()['data']['requests']] == [ai_request.id]
+
+    for limit in ('10', -1, 0, True):
+        response = client.post('/api/admin/ai-requests/requeue', json={'limit': limit}, headers=admin_headers)
+        assert response.status_code == 400
+
+    # An empty selection requeues nothing
+    response = client.post('/api/admin/ai-requests/requeue', json={'ids': []}, headers=admin_headers)
+    assert response.get_json()['data']['requeued'] == 0
+    assert db.session.get(AIRequest, ai_request.id).status == 'dead_letter'
+
+    response = client.post('/api/admin/ai-requests/requeue',
+                           json={'ids': [ai_request.id]}, headers=admin_headers)
+    assert response.get_json()['data']['requeued'] == 1
+
+    db.session.expire_all()
+    requeued = db.session.get(AIRequest, ai_request.id)
+    assert (requeued.status, requeued.attempts) == ('retrying', 0)
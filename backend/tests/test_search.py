@@ -0,0 +1,88 @@
+# Full-text search tests
+import pytest
+
+from app.extensions import db
+from app.models import User
+from app.services.ai_service import AIService
+from app.services.bulk_delete_service import BulkDeleteService
+from app.services.file_service import FileService
+from app.services.search_service import SearchService
+
+
+def _search(client, headers, **params):
+    return client.get('/api/files/search', headers=headers, query_string=params)
+
+
+def _checksums(response):
+    return [f['checksum'] for f in response.get_json()['data']['files']]
+
+
+def test_search_ranks_filename_matches_first(client, auth_headers, make_file):
+    """Prefixes of every word must match; filename hits outrank result hits"""
+    in_result = make_file(b'one', 'notes.txt')
+    in_name = make_file(b'two', 'Quarterly_Report-2024.pdf')
+    FileService.mark_as_processed(in_result.checksum, 'Summary of the quarterly revenue report')
+    make_file(b'three', 'quarterly.txt')
+
+    response = _search(client, auth_headers, q='quart rep')
+
+    assert response.status_code == 200
+    files = response.get_json()['data']['files']
+    assert [f['checksum'] for f in files] == [in_name.checksum, in_result.checksum]
+    assert files[0]['score'] > files[1]['score']
+    assert 'processing_result' not in files[0]
+
+    response = _search(client, auth_headers, q='2024', fields='filename')
+    assert [set(f) for f in response.get_json()['data']['files']] == [{'filename', 'score'}]
+
+
+def test_search_is_scoped_to_the_user(client, auth_headers, make_file):
+    """Other users' files never match"""
+    other = User(username='other', email='other@example.com')
+    other.set_password('Test123456')
+    db.session.add(other)
+    db.session.commit()
+    mine = make_file(b'mine', 'budget.csv')
+    make_file(b'theirs', 'budget.xlsx', owner=other)
+
+    assert _checksums(_search(client, auth_headers, q='budget')) == [mine.checksum]
+
+
+def test_search_pages_by_keyset(client, auth_headers, make_file):
+    """Cursor pages cover every match exactly once"""
+    expected = {make_file(f'invoice {i}'.encode(), f'invoice-{i}.pdf').checksum for i in range(7)}
+
+    seen, cursor = [], None
+    while True:
+        response = _search(client, auth_headers, q='invoice', per_page=3, cursor=cursor)
+        data = response.get_json()['data']
+        seen += _checksums(response)
+        cursor = data['pagination']['next_cursor']
+        if not data['pagination']['has_more']:
+            break
+
+    assert len(seen) == 7
+    assert set(seen) == expected
+
+
+def test_index_follows_writes(app, ai_stub, make_file, storage):
+    """Processing results become searchable when written; deleted files drop out"""
+    file_record = make_file(b'contract text', 'contract.txt')
+    user_id, checksum = file_record.user_id, file_record.checksum
+    assert SearchService.search_files(user_id, 'processed').items == []
+
+    success, message, _ = AIService.process_file(checksum, user_id)
+    assert success, message
+    assert [f.checksum for f, _ in SearchService.search_files(user_id, 'processed').items] == [checksum]
+
+    BulkDeleteService.delete_files(user_id, [checksum])
+    assert SearchService.search_files(user_id, 'contract').items == []
+
+
+def test_search_rejects_bad_input(client, auth_headers):
+    """Empty queries and malformed cursors are client errors"""
+    assert _search(client, auth_headers, q=' -- ').status_code == 400
+    assert _search(client, auth_headers, q='x', cursor='nope').status_code == 400
+    with pytest.raises(ValueError):
+        SearchService.parse_terms('')
+    assert SearchService.parse_terms('Foo_bar foo "baz"') == ['foo', 'bar', 'baz']
@@ -0,0 +1,95 @@
+# Token revocation tests
+import time
+
+import pytest
+
+from app.utils import token_revocation
+from app.utils.bloom import BloomFilter
+from app.utils.token_revocation import TokenRevocationList
+
+
+def _revocation_list(**overrides):
+    options = dict(capacity=1000, error_rate=0.01, sync_interval=60, rebuild_interval=3600, max_lifetime=86400)
+    options.update(overrides)
+    return TokenRevocationList(**options)
+
+
+def _login(client, user):
+    response = client.post('/api/auth/login', json={'email': user.email, 'password': 'Test123456'})
+    data = response.get_json()['data']
+    return data['access_token'], data['refresh_token']
+
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Added items are always found; others rarely are"""
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f'in-{i}')
+
+    assert all(f'in-{i}' in bloom for i in range(1000))
+    false_positives = sum(f'out-{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_refresh_and_logout(client, user):
+    """Refresh tokens renew access; logout revokes both tokens"""
+    access, refresh = _login(client, user)
+
+    response = client.post('/api/auth/refresh', headers=_bearer(refresh))
+    assert response.status_code == 200
+    renewed = response.get_json()['data']['access_token']
+    # Access tokens cannot be used to refresh
+    assert client.post('/api/auth/refresh', headers=_bearer(access)).status_code == 422
+
+    response = client.post('/api/auth/logout', headers=_bearer(access), json={'refresh_token': refresh})
+    assert response.status_code == 200
+
+    assert client.get('/api/files/', headers=_bearer(access)).status_code == 401
+    assert client.post('/api/auth/refresh', headers=_bearer(refresh)).status_code == 401
+    # Tokens that were not presented at logout stay valid until they expire
+    assert client.get('/api/files/', headers=_bearer(renewed)).status_code == 200
+
+
+def test_logout_rejects_someone_elses_refresh_token(app, client, user):
+    """A refresh token is only revoked together with its owner's session"""
+    from flask_jwt_extended import create_refresh_token
+
+    access, _ = _login(client, user)
+    response = client.post('/api/auth/logout', headers=_bearer(access),
+                           json={'refresh_token': create_refresh_token(identity='999')})
+    assert response.status_code == 400
+
+
+def test_redis_denylist_with_bloom_fast_path(app, monkeypatch):
+    """Unrevoked tokens never reach Redis; other processes' revocations arrive on sync"""
+    fakeredis = pytest.importorskip('fakeredis')
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(token_revocation, 'get_redis', lambda: redis)
+    expires_at = time.time() + 600
+    this_process, other_process = _revocation_list(), _revocation_list()
+
+    this_process.revoke('mine', expires_at)
+    assert this_process.is_revoked('mine')
+
+    # Revoked elsewhere: unseen until the next sync, then confirmed in Redis
+    other_process.revoke('theirs', expires_at)
+    assert not this_process.is_revoked('theirs')
+    this_process.sync(force=True)
+    assert this_process.is_revoked('theirs')
+
+    def no_round_trips(*args, **kwargs):
+        raise AssertionError('unexpected Redis call')
+
+    monkeypatch.setattr(redis, 'exists', no_round_trips)
+    assert not any(this_process.is_revoked(f'fresh-{i}') for i in range(100))
+
+    # Expired revocations drop out of the log on rebuild
+    monkeypatch.undo()
+    monkeypatch.setattr(token_revocation, 'get_redis', lambda: redis)
+    fresh = _revocation_list(max_lifetime=0)
+    fresh.sync()
+    assert redis.zcard(TokenRevocationList.LOG_KEY) == 0
@@ -0,0 +1,96 @@
+# Usage counter and dashboard stats tests
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from app.extensions import db
+from app.models import AIRequest, UsageCounter
+from app.services.recovery_service import RecoveryService
+from app.services.usage_service import UsageService
+
+
+def _upload(client, headers, content, filename):
+    return client.post('/api/files/upload', headers=headers, content_type='multipart/form-data',
+                       data={'file': (BytesIO(content), filename)})
+
+
+def _stats(client, headers):
+    response = client.get('/api/files/stats', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+
+def test_stats_follow_uploads_processing_and_deletes(client, auth_headers, storage, ai_stub):
+    """Counters change in the same transactions as uploads, completions and deletes"""
+    assert _upload(client, auth_headers, b'a' * 100, 'a.txt').status_code == 201
+    assert _upload(client, auth_headers, b'b' * 50, 'b.txt').status_code == 201
+    ai_stub.configure(error_rate=1.0)
+    response = _upload(client, auth_headers, b'%PDF' + b'c' * 20, 'c.pdf')
+    assert response.status_code == 201
+
+    stats = _stats(client, auth_headers)
+    assert stats['files'] == {'count': 3, 'total_bytes': 174, 'processed': 2, 'unprocessed': 1}
+    assert stats['by_mime_type'] == [
+        {'mime_type': 'text/plain', 'count': 2, 'total_bytes': 150},
+        {'mime_type': 'application/pdf', 'count': 1, 'total_bytes': 24},
+    ]
+    assert stats['ai_requests'] == {'completed': 2, 'retrying': 1}
+
+
+
+def test_stats_follow_deletes(client, auth_headers, make_file):
+    """Deleting a file removes it from the counters"""
+    kept = make_file(b'a' * 100, 'a.txt')
+    removed = make_file(b'%PDF' + b'c' * 20, 'c.pdf', mime_type='application/pdf')
+    UsageService.reconcile()
+
+    assert client.delete(f'/api/files/{removed.checksum}', headers=auth_headers).status_code == 200
+
+    stats = _stats(client, auth_headers)
+    assert stats['files'] == {'count': 1, 'total_bytes': kept.file_size, 'processed': 0, 'unprocessed': 1}
+    assert [row['mime_type'] for row in stats['by_mime_type']] == ['text/plain']
+
+
+def test_recovery_transitions_keep_counters_exact(app, user, make_file):
+    """Bulk reaper transitions move status counts; reconciling finds nothing to fix"""
+    file_record = make_file()
+    expired = datetime.utcnow() - timedelta(minutes=5)
+    for attempts in (1, 1, 5):
+        db.session.add(AIRequest(file_checksum=file_record.checksum, user_id=user.id, request_type='process',
+                                 status='processing', attempts=attempts, max_attempts=5,
+                                 lease_expires_at=expired))
+    db.session.commit()
+    UsageService.reconcile()
+
+    RecoveryService.reap_expired_leases(batch_size=1)
+    RecoveryService.requeue_dead_letters()
+    incremental = UsageService.get_user_stats(user.id)
+    assert incremental['ai_requests'] == {'retrying': 3}
+
+    UsageService.reconcile()
+    assert UsageService.get_user_stats(user.id) == incremental
+
+
+def test_reconcile_repairs_drift(app, user, make_file):
+    """Reconciliation rebuilds counters from the source tables"""
+    make_file(b'x' * 10, 'x.txt')
+    make_file(b'y' * 30, 'y.csv', mime_type=None)
+    db.session.add(UsageCounter(user_id=user.id, mime_type='image/png', file_count=7, total_bytes=1))
+    db.session.commit()
+
+    assert UsageService.reconcile(batch_size=1) == 1
+
+    stats = UsageService.get_user_stats(user.id)
+    assert stats['files'] == {'count': 2, 'total_bytes': 40, 'processed': 0, 'unprocessed': 2}
+    assert {row['mime_type'] for row in stats['by_mime_type']} == {'text/plain', None}
+
+
+def test_recount_overwrites_rows_written_after_the_lock(app, user, make_file):
+    """A writer's row created between the lock and the rebuild is replaced by the totals, not added to"""
+    make_file(b'x' * 10, 'x.txt')
+    UsageService._lock_counters([user.id])
+    # The upload's own increment, committed after the counters were cleared
+    UsageService.record_file_change(user.id, 'text/plain', files=1, size=10)
+    UsageService._recount([user.id])
+    db.session.commit()
+
+    assert UsageService.get_user_stats(user.id)['files']['count'] == 1
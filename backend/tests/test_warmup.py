@@ -0,0 +1,100 @@
+# Gunicorn configuration and per-worker warmup tests
+import os
+import runpy
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.services.ai_service import AIService
+from app.utils.warmup import PRELOAD_QUERIES, _warm_engine, preload, reset_after_fork, warm_up
+
+GUNICORN_CONF = os.path.join(os.path.dirname(__file__), '..', 'gunicorn.conf.py')
+
+
+@pytest.fixture
+def gunicorn_conf(monkeypatch, tmp_path):
+    """Evaluate gunicorn.conf.py with GUNICORN_* variables from the test"""
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path / 'prometheus'))
+    # Set by the file itself; restored after the test
+    monkeypatch.delenv('TEXT_EXTRACTION_WORKERS', raising=False)
+    monkeypatch.delenv('PASSWORD_HASH_WORKERS', raising=False)
+
+    def _load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(GUNICORN_CONF)
+    return _load
+
+
+@pytest.mark.parametrize('files, expected', [
+    ({'cpu.max': '150000 100000\n'}, 1.5),
+    ({'cpu.max': 'max 100000\n', 'cpu/cpu.cfs_quota_us': '50000', 'cpu/cpu.cfs_period_us': '100000'}, 0.5),
+    ({'cpu/cpu.cfs_quota_us': '-1', 'cpu/cpu.cfs_period_us': '100000'}, None),
+    ({}, None),
+])
+def test_cpu_quota(gunicorn_conf, tmp_path, files, expected):
+    """The cgroup v2 quota wins, then v1; unlimited falls back to the affinity mask"""
+    for name, content in files.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(content)
+    quota = gunicorn_conf()['cpu_quota'](str(tmp_path))
+    assert quota == (expected if expected is not None else len(os.sched_getaffinity(0)))
+
+
+def test_worker_settings(gunicorn_conf):
+    conf = gunicorn_conf()
+    assert conf['worker_class'] == 'gthread'
+    assert conf['workers'] >= 2 and conf['threads'] == 8
+    assert conf['preload_app'] and conf['max_requests_jitter'] == conf['max_requests'] // 10
+
+    conf = gunicorn_conf(GUNICORN_WORKER_CLASS='sync', GUNICORN_WORKERS='3', GUNICORN_PRELOAD='false')
+    assert (conf['workers'], conf['threads'], conf['preload_app']) == (3, 1, False)
+
+
+def test_process_pools_follow_cpu_quota(gunicorn_conf, monkeypatch):
+    """Extraction and hashing processes share out the CPU quota among the workers unless pinned"""
+    conf = gunicorn_conf()
+    # Two workers per CPU leave one process of each kind per worker
+    assert os.environ['TEXT_EXTRACTION_WORKERS'] == os.environ['PASSWORD_HASH_WORKERS'] == '1'
+
+    for name in ('TEXT_EXTRACTION_WORKERS', 'PASSWORD_HASH_WORKERS'):
+        monkeypatch.delenv(name)
+    gunicorn_conf(GUNICORN_WORKERS='1', PASSWORD_HASH_WORKERS='3')
+    assert os.environ['TEXT_EXTRACTION_WORKERS'] == str(max(1, int(conf['cpus'])))
+    assert os.environ['PASSWORD_HASH_WORKERS'] == '3'
+
+
+def test_warm_up_connects_without_calling_the_model(app, storage, ai_stub):
+    """The AI API session gets keep-alive connections from HEAD requests; no model call is made"""
+    results = warm_up(app, connections=3)
+
+    assert all(isinstance(ms, float) for ms in results.values()), results
+    pool = AIService._get_http_session().get_adapter(ai_stub.url).get_connection(ai_stub.url)
+    assert pool.num_connections >= 3
+    assert ai_stub.stats()['requests'] == 0
+
+
+def test_pool_is_filled_and_reset_after_fork(tmp_path):
+    """Warm pools hold idle connections; a forked worker drops the inherited ones"""
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "warm.db"}'})
+    with app.app_context():
+        engine = db.engine
+    assert _warm_engine(engine, 3) == 3
+    assert engine.pool.checkedin() == 3
+
+    reset_after_fork(app)
+    assert engine.pool.checkedin() == 0
+
+
+def test_preload_caches_compiled_queries(tmp_path):
+    """The master compiles the hot lookups once and keeps no connections"""
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "preload.db"}'})
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+
+    preload(app)
+
+    assert len(engine._compiled_cache) >= len(PRELOAD_QUERIES)
+    assert engine.pool.checkedin() == engine.pool.checkedout() == 0
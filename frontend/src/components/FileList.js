@@ -124,7 +124,7 @@ const FileList = ({ refreshTrigger, onFileSelect }) => {
                     <div className="file-checksum">
                       Checksum: {file.checksum.substring(0, 16)}...
                     </div>
-                    {file.processing_result && (
+                    {file.is_processed && (
                       <div className="file-result-preview">
                         <small>✓ Analysis available - Click to view</small>
                       </div>
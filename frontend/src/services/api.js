@@ -28,13 +28,50 @@ api.interceptors.request.use(
   }
 );
 
+// One refresh at a time, shared by every request that hit an expired token
+let refreshPromise = null;
+
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    refreshPromise = (refreshToken
+      ? axios.post(`${API_URL}/auth/refresh`, null, {
+          headers: { Authorization: `Bearer ${refreshToken}` },
+        })
+      : Promise.reject(new Error('No refresh token'))
+    )
+      .then((response) => {
+        const token = response.data.data.access_token;
+        localStorage.setItem('token', token);
+        return token;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 // Handle response errors
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status === 401 && original && !original._retried && !original.url?.startsWith('/auth/')) {
+      // Access tokens are short-lived: renew once and replay the request
+      original._retried = true;
+      try {
+        const token = await refreshAccessToken();
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      } catch (refreshError) {
+        // Fall through to the login redirect
+      }
+    }
     if (error.response?.status === 401) {
-      // Clear token and redirect to login if unauthorized
+      // Clear tokens and redirect to login if unauthorized
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
       window.location.href = '/login';
     }
     return Promise.reject(error);
@@ -52,15 +89,18 @@ export const authAPI = {
     const response = await api.post('/auth/login', { email, password });
     if (response.data.data?.access_token) {
       localStorage.setItem('token', response.data.data.access_token);
+      localStorage.setItem('refreshToken', response.data.data.refresh_token);
     }
     return response.data;
   },
 
   logout: async () => {
     try {
-      await api.post('/auth/logout');
+      // Revokes the access token and the refresh token server-side
+      await api.post('/auth/logout', { refresh_token: localStorage.getItem('refreshToken') });
     } finally {
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
     }
   },
 };